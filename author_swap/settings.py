@@ -65,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PrimaryProfileMemoMiddleware',
 ]
 
 # CORS Configuration
@@ -100,6 +101,36 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Deliver notification WebSocket events from a background thread after commit
+# (core.services.notification_fanout); False sends them inline on commit
+NOTIFICATION_FANOUT_ASYNC = True
+
+# Author Dashboard snapshot (core.services.dashboard_snapshot_service): sections
+# are rebuilt at least this often, and in a background thread unless disabled
+DASHBOARD_SNAPSHOT_REFRESH_SECONDS = int(os.getenv('DASHBOARD_SNAPSHOT_REFRESH_SECONDS', 300))
+DASHBOARD_SNAPSHOT_ASYNC = True
+
+# Rebuild the best-match feature index (core.services.matching_service) on a
+# worker thread once it is stale, serving the old one meanwhile; False rebuilds inline
+MATCHING_INDEX_ASYNC = True
+
+# Per-process cache of users' audience sizes (core.services.audience_service);
+# 0 disables it
+AUDIENCE_CACHE_TTL = int(os.getenv('AUDIENCE_CACHE_TTL', 60))
+
+# Notification retention (`manage.py purge_notifications`): rows older than this
+# are deleted, after being rolled up into NotificationArchive when enabled
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_ARCHIVE_ENABLED = str(os.getenv('NOTIFICATION_ARCHIVE_ENABLED', 'False')).lower() == 'true'
+
+# Shared cache (partner graph, counters, snapshots) on the same Redis as channels
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -201,6 +232,16 @@ MAILERLITE_API_KEY = os.getenv('MAILERLITE_API_KEY')  # Set your MailerLite API
 MAILERLITE_PENDING_GROUP_ID = os.getenv('MAILERLITE_PENDING_GROUP_ID')  # MailerLite group for Pending Swaps
 MAILERLITE_APPROVED_GROUP_ID = os.getenv('MAILERLITE_APPROVED_GROUP_ID')  # MailerLite group for Approved/Active Swaps
 MAILERLITE_REJECTED_GROUP_ID = os.getenv('MAILERLITE_REJECTED_GROUP_ID')  # MailerLite group for Rejected Swaps
+# Analytics sync (core.services.mailerlite_sync_service): worker threads, how old
+# stored analytics may get before a background refresh, and the per-account
+# request budget (MailerLite allows 120 requests per minute)
+MAILERLITE_SYNC_WORKERS = int(os.getenv('MAILERLITE_SYNC_WORKERS', 4))
+MAILERLITE_SYNC_INTERVAL_SECONDS = int(os.getenv('MAILERLITE_SYNC_INTERVAL_SECONDS', 15 * 60))
+MAILERLITE_RATE_LIMIT_PER_MINUTE = int(os.getenv('MAILERLITE_RATE_LIMIT_PER_MINUTE', 120))
+MAILERLITE_SYNC_ASYNC = True
+# Swap group moves go through an outbox (core.services.mailerlite_outbox_service)
+# drained on a worker thread after commit; False drains inline
+MAILERLITE_OUTBOX_ASYNC = True
 
 # Google OAuth 2.0
 # Get this from: https://console.cloud.google.com → APIs & Services → Credentials
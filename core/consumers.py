@@ -8,6 +8,9 @@ from django.contrib.auth.models import AnonymousUser
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from core.models import ChatMessage, Profile, SwapRequest
+from core.services.conversation_service import record_message
+from core.services.unread_counter_service import get_unread_counts
+from django.db import transaction
 from django.db.models import Q
 
 User = get_user_model()
@@ -34,6 +37,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             await self.accept()
+            # Initial counters; later changes arrive as send_unread_counts events
+            await self.send_unread_counts({'counts': await database_sync_to_async(get_unread_counts)(self.user_id)})
         else:
             await self.close()
 
@@ -59,6 +64,17 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'data': notification
         }))
 
+    async def send_notifications(self, event):
+        # Batched delivery from core.services.notification_fanout
+        for notification in event['notifications']:
+            await self.send_notification({'notification': notification})
+
+    async def send_unread_counts(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'unread_counts',
+            'data': event['counts']
+        }))
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
@@ -203,7 +219,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         try:
             sender = User.objects.get(id=sender_id)
             receiver = User.objects.get(id=receiver_id)
-            return ChatMessage.objects.create(sender=sender, recipient=receiver, content=text)
+            with transaction.atomic():
+                message = ChatMessage.objects.create(sender=sender, recipient=receiver, content=text)
+                record_message(message)
+            return message
         except Exception as e:
             print(f"DEBUG: save_message error: {e}")
             return None
@@ -0,0 +1,173 @@
+"""
+Management command that shows what the hot-path composite indexes buy us.
+
+Seeds a realistic volume of swaps, chats, notifications, emails and wallet
+transactions, then prints the plan and timing of each hot query twice: with
+the indexes from the models' Meta and with those indexes dropped. Everything
+runs in one transaction that is rolled back, so no rows or schema changes
+are left behind. It still holds table locks while it runs, so point it at a
+dev or staging database, never production.
+"""
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import ChatMessage, Email, NewsletterSlot, Notification, PaymentTransaction, SwapRequest
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _hot_queries(user, partner):
+    """(label, model, index names, queryset) for every query shape the indexes target."""
+    since = timezone.now() - timedelta(hours=48)
+    return [
+        ('Sent swaps by status (/api/swaps/?tab=sent)', SwapRequest, ['swapreq_requester_status_idx'],
+         SwapRequest.objects.filter(requester=user, status='pending').order_by('-created_at')[:20]),
+        ('Slot capacity check', SwapRequest, ['swapreq_slot_status_idx'],
+         SwapRequest.objects.filter(slot__user=user, status__in=['confirmed', 'verified', 'scheduled', 'completed']).order_by().values_list('pk', flat=True)),
+        ('Chat history window', ChatMessage, ['chatmsg_pair_created_idx'],
+         ChatMessage.objects.filter(Q(sender=user, recipient=partner) | Q(sender=partner, recipient=user)).order_by('-id')[:50]),
+        ('Unread chat count', ChatMessage, ['chatmsg_recipient_unread_idx'],
+         ChatMessage.objects.filter(recipient=user, is_read=False).order_by().values_list('pk', flat=True)),
+        ('Notification feed (48h)', Notification, ['notif_recipient_created_idx'],
+         Notification.objects.filter(recipient=user, created_at__gte=since)),
+        ('Unread notification count', Notification, ['notif_recipient_unread_idx'],
+         Notification.objects.filter(recipient=user, is_read=False).order_by().values_list('pk', flat=True)),
+        ('Unread inbox emails', Email, ['email_recipient_folder_idx'],
+         Email.objects.filter(recipient=user, folder='inbox', is_read=False).order_by().values_list('pk', flat=True)),
+        ('Direct payments between a pair', PaymentTransaction,
+         ['paytx_sender_type_status_idx', 'paytx_recv_type_status_idx'],
+         PaymentTransaction.objects.filter(
+             Q(sender=user, receiver=partner) | Q(sender=partner, receiver=user),
+             transaction_type='direct_payment', status='completed',
+         )[:1]),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Seed sample data and compare hot-query plans with and without the composite indexes (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Authors to seed')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows to seed per table (chat messages get 5x)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the sample data')
+
+    def handle(self, *args, **options):
+        if not connection.features.can_rollback_ddl:
+            raise CommandError(f'{connection.vendor} cannot roll back DROP INDEX; use PostgreSQL or SQLite.')
+        try:
+            with transaction.atomic():
+                user, partner = self._seed(options['users'], options['rows'], random.Random(options['seed']))
+                cases = _hot_queries(user, partner)
+                with_indexes = [self._measure(qs, options['repeat'], 'with') for _, _, _, qs in cases]
+                self._drop_indexes(cases)
+                without_indexes = [self._measure(qs, options['repeat'], 'without') for _, _, _, qs in cases]
+                self._report(cases, with_indexes, without_indexes)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, user_count, rows, rng):
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(username=f'bench_author_{i}', email=f'bench{i}@example.com') for i in range(user_count)
+        ])
+        slots = NewsletterSlot.objects.bulk_create([
+            NewsletterSlot(
+                user=rng.choice(users), send_date=date.today() + timedelta(days=rng.randint(0, 90)),
+                preferred_genre='fantasy',
+            )
+            for _ in range(user_count * 4)
+        ])
+
+        def pair():
+            return rng.sample(users, 2)
+
+        def stamp():
+            return now - timedelta(minutes=rng.randint(0, 60 * 24 * 180))
+
+        swap_statuses = [code for code, _ in SwapRequest.STATUS_CHOICES]
+        SwapRequest.objects.bulk_create([
+            SwapRequest(slot=rng.choice(slots), requester=rng.choice(users), status=rng.choice(swap_statuses))
+            for _ in range(rows)
+        ], batch_size=1000)
+
+        messages = []
+        for _ in range(rows * 5):
+            sender, recipient = pair()
+            messages.append(ChatMessage(sender=sender, recipient=recipient, content='hi', is_read=rng.random() < 0.9))
+        ChatMessage.objects.bulk_create(messages, batch_size=1000)
+
+        Notification.objects.bulk_create([
+            Notification(recipient=rng.choice(users), title='Swap', message='...', is_read=rng.random() < 0.8)
+            for _ in range(rows)
+        ], batch_size=1000)
+
+        folders = [code for code, _ in Email.FOLDER_CHOICES]
+        emails = []
+        for _ in range(rows):
+            sender, recipient = pair()
+            emails.append(Email(sender=sender, recipient=recipient, folder=rng.choice(folders), is_read=rng.random() < 0.7))
+        Email.objects.bulk_create(emails, batch_size=1000)
+
+        tx_types = [code for code, _ in PaymentTransaction.TRANSACTION_TYPES]
+        tx_statuses = [code for code, _ in PaymentTransaction.STATUS_CHOICES]
+        transactions = []
+        for _ in range(rows):
+            sender, receiver = pair()
+            transactions.append(PaymentTransaction(
+                sender=sender, receiver=receiver, amount=Decimal('10.00'),
+                transaction_type=rng.choice(tx_types), status=rng.choice(tx_statuses),
+            ))
+        PaymentTransaction.objects.bulk_create(transactions, batch_size=1000)
+
+        # auto_now_add ignores values passed to bulk_create; spread timestamps afterwards
+        for model in (SwapRequest, Notification, Email, PaymentTransaction):
+            pks = list(model.objects.filter(created_at__gte=now).values_list('pk', flat=True))
+            for start in range(0, len(pks), 100):
+                model.objects.filter(pk__in=pks[start:start + 100]).update(created_at=stamp())
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return users[0], users[1]
+
+    def _measure(self, queryset, repeat, phase):
+        # Raw SQL tagged with the phase: SQLite would otherwise reuse the cached
+        # EXPLAIN statement and report the plan from before the indexes were dropped.
+        sql, params = queryset.query.sql_with_params()
+        sql = f'{sql} /* {phase} indexes */'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cursor.execute(sql, params)
+                cursor.fetchall()
+        return plan, (time.perf_counter() - started) * 1000 / repeat
+
+    def _drop_indexes(self, cases):
+        names = {name for _, _, index_names, _ in cases for name in index_names}
+        with connection.cursor() as cursor:
+            for name in sorted(names):
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def _report(self, cases, with_indexes, without_indexes):
+        for (label, _, names, _), (plan_with, ms_with), (plan_without, ms_without) in zip(cases, with_indexes, without_indexes):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{label}  [{", ".join(names)}]'))
+            self.stdout.write(f'  without indexes: {ms_without:.2f} ms')
+            self.stdout.write('    ' + plan_without.replace('\n', '\n    '))
+            self.stdout.write(f'  with indexes:    {ms_with:.2f} ms')
+            self.stdout.write('    ' + plan_with.replace('\n', '\n    '))
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; all seeded rows and index changes were rolled back.'))
@@ -0,0 +1,122 @@
+"""
+Management command that times best-match ranking (core.services.matching_service).
+
+Seeds authors with profiles, subgenres and audience tags plus their open
+slots, then reports how long a full FeatureIndex build takes and how long
+rank_slots() takes over every candidate against a warm index, next to the
+TARGET_MS budget for a ranking. Everything runs in one transaction that is
+rolled back, and the process's index is dropped afterwards, so no rows are
+left behind. Point it at a dev or staging database, never production.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from authentication.constants import ALL_SUBGENRES, PRIMARY_GENRE_CHOICES
+from authentication.models import AudienceTag, Subgenre, UserProfile
+from core.models import NewsletterSlot, Profile
+from core.services import matching_service
+
+User = get_user_model()
+
+TARGET_MS = 50
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _timed(fn, repeat):
+    """Run fn `repeat` times; returns (last result, median milliseconds)."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Seed sample authors and slots and time the best-match index build and ranking (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=5000, help='Authors to seed')
+        parser.add_argument('--slots', type=int, default=50000, help='Open slots to seed')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per measurement')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the sample data')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                viewer = self._seed(options['authors'], options['slots'], random.Random(options['seed']))
+                self._measure(viewer, options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            matching_service.invalidate_feature_index()
+
+    def _seed(self, author_count, slot_count, rng):
+        genres = [code for code, _ in PRIMARY_GENRE_CHOICES]
+        # ALL_SUBGENRES repeats slugs shared by several genres
+        subgenres = list({
+            slug: Subgenre.objects.get_or_create(slug=slug, defaults={'name': name, 'parent_genre': rng.choice(genres)})[0]
+            for slug, name in ALL_SUBGENRES
+        }.values())
+        tags = AudienceTag.objects.bulk_create([AudienceTag(name=f'bench tag {i}') for i in range(20)])
+
+        users = User.objects.bulk_create([
+            User(username=f'bench_match_{i}', email=f'bench_match{i}@example.com') for i in range(author_count + 1)
+        ])
+        user_profiles = UserProfile.objects.bulk_create([
+            UserProfile(user=user, primary_genre=rng.choice(genres)) for user in users
+        ])
+        Profile.objects.bulk_create([
+            Profile(user=user, name=user.username, reputation_score=rng.uniform(0, 100), avg_open_rate=rng.uniform(0, 60))
+            for user in users
+        ], batch_size=1000)
+        UserProfile.subgenres.through.objects.bulk_create([
+            UserProfile.subgenres.through(userprofile=profile, subgenre=subgenre)
+            for profile in user_profiles for subgenre in rng.sample(subgenres, 3)
+        ], batch_size=1000)
+        UserProfile.audience_tags.through.objects.bulk_create([
+            UserProfile.audience_tags.through(userprofile=profile, audiencetag=tag)
+            for profile in user_profiles for tag in rng.sample(tags, 3)
+        ], batch_size=1000)
+
+        owners = users[1:]
+        NewsletterSlot.objects.bulk_create([
+            NewsletterSlot(
+                user=rng.choice(owners), send_date=date.today() + timedelta(days=rng.randint(0, 90)),
+                preferred_genre=rng.choice(genres),
+                subgenres=','.join(subgenre.slug for subgenre in rng.sample(subgenres, 2)),
+            )
+            for _ in range(slot_count)
+        ], batch_size=1000)
+        return users[0]
+
+    def _measure(self, viewer, repeat):
+        candidates = NewsletterSlot.objects.filter(status='available', is_full=False).exclude(user=viewer)
+
+        _, build_ms = _timed(matching_service.FeatureIndex, max(1, repeat // 5))
+        slot_ids, ids_ms = _timed(lambda: list(candidates.values_list('id', flat=True)), repeat)
+
+        matching_service.invalidate_feature_index()
+        matching_service.get_feature_index()
+        _, rank_ms = _timed(lambda: matching_service.rank_slots(viewer, slot_ids), repeat)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Best-match ranking over {len(slot_ids)} candidate slots'))
+        self.stdout.write(f'  full index build (off the request path): {build_ms:.1f} ms')
+        self.stdout.write(f'  candidate id query:                      {ids_ms:.1f} ms')
+        self.stdout.write(f'  rank_slots with a warm index:            {rank_ms:.1f} ms')
+        total = ids_ms + rank_ms
+        style = self.style.SUCCESS if total < TARGET_MS else self.style.WARNING
+        verdict = 'met' if total < TARGET_MS else 'NOT met'
+        self.stdout.write(style(f'  per-request total {total:.1f} ms: {TARGET_MS} ms target {verdict}'))
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; all seeded rows were rolled back.'))
@@ -0,0 +1,32 @@
+"""
+Management command that sends queued MailerLite swap group moves, retrying
+earlier failures, reports moves that ran out of attempts, and purges moves
+sent (or given up on) more than a week ago.
+Run it from cron (e.g. every 5 minutes).
+"""
+import logging
+
+from django.core.management.base import BaseCommand
+
+from core.services.mailerlite_outbox_service import MAX_ATTEMPTS, dead_letters, drain_outbox, purge_sent
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Send pending MailerLite group moves from the outbox and purge old sent ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-purge', action='store_true', help='Keep sent group moves instead of purging old ones')
+
+    def handle(self, *args, **options):
+        sent, failed = drain_outbox()
+        dead = dead_letters().count()
+        if dead:
+            message = f'{dead} MailerLite group move(s) failed {MAX_ATTEMPTS} times and will not be retried'
+            logger.warning(message)
+            self.stdout.write(self.style.WARNING(message))
+        purged = 0 if options['no_purge'] else purge_sent()
+        self.stdout.write(self.style.SUCCESS(
+            f'MailerLite outbox drained: sent={sent} failed={failed} dead={dead} purged={purged}'
+        ))
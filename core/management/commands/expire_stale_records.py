@@ -0,0 +1,32 @@
+"""
+Management command that expires stale swap requests and wallet transactions.
+Run it from cron (e.g. every 5 minutes) or keep it running with --loop.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.expiry_service import DEFAULT_BATCH_SIZE, run_sweep
+
+
+class Command(BaseCommand):
+    help = 'Auto-reject pending swaps older than 7 days and cancel abandoned wallet checkouts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows updated per batch')
+        parser.add_argument('--skip-stripe', action='store_true', help='Do not verify pending checkout sessions with Stripe')
+        parser.add_argument('--loop', action='store_true', help='Keep running and sweep every --interval seconds')
+        parser.add_argument('--interval', type=int, default=300, help='Seconds between sweeps when --loop is set')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = run_sweep(
+                batch_size=options['batch_size'],
+                check_stripe=not options['skip_stripe'],
+            )
+            details = ', '.join(f'{key}={value}' for key, value in summary.items())
+            self.stdout.write(self.style.SUCCESS(f'Expiry sweep finished: {details}'))
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+"""
+Management command that applies the notification retention policy.
+Run it from cron (e.g. nightly).
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.services.notification_retention import DEFAULT_BATCH_SIZE, purge_notifications
+
+
+class Command(BaseCommand):
+    help = 'Delete notifications older than the retention window, optionally archiving them per user and month'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help=f'Retention window in days (default NOTIFICATION_RETENTION_DAYS={settings.NOTIFICATION_RETENTION_DAYS})')
+        parser.add_argument('--archive', action='store_true', default=None,
+                            help='Roll purged rows up into NotificationArchive (default NOTIFICATION_ARCHIVE_ENABLED)')
+        parser.add_argument('--no-archive', action='store_false', dest='archive', help='Delete without archiving')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows deleted per batch')
+
+    def handle(self, *args, **options):
+        purged = purge_notifications(
+            retention_days=options['days'],
+            archive=options['archive'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Notification purge finished: deleted={purged}'))
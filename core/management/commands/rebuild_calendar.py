@@ -0,0 +1,18 @@
+"""
+Management command to backfill or repair the CalendarDay rollup.
+Run once after deploying the table, and any time it drifts (raw SQL, bulk updates).
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.calendar_service import rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily calendar rollup (CalendarDay) for all users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users rebuilt per batch')
+
+    def handle(self, *args, **options):
+        processed = rebuild_calendar(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt calendar rollup for {processed} users.'))
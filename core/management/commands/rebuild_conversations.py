@@ -0,0 +1,15 @@
+"""
+Management command to backfill or repair the Conversation inbox summaries.
+Run once after deploying the table, and any time counters drift (raw SQL, bulk updates).
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.conversation_service import rebuild_conversations
+
+
+class Command(BaseCommand):
+    help = 'Recompute chat Conversation summaries (last message and unread counters) from ChatMessage'
+
+    def handle(self, *args, **options):
+        processed = rebuild_conversations()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {processed} conversations.'))
@@ -0,0 +1,18 @@
+"""
+Management command to backfill or repair NewsletterSlot.active_partners_count / is_full.
+Run once after deploying the columns, and any time counts drift (raw SQL, bulk updates).
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.slot_capacity_service import rebuild_slot_capacity
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized partner counts and is_full flags for all newsletter slots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Slots updated per batch')
+
+    def handle(self, *args, **options):
+        processed = rebuild_slot_capacity(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt capacity for {processed} newsletter slots.'))
@@ -31,7 +31,7 @@ class Command(BaseCommand):
             users.append((user, udata['name']))
 
             # Create or update profile
-            profile, _ = Profile.objects.get_or_create(user=user)
+            profile = Profile.objects.primary_for(user) or Profile(user=user)
             profile.name = udata['name']
             profile.primary_genre = random.choice(genres_list) if genres_list else "Fantasy"
             profile.reputation_score = round(random.uniform(4.0, 5.0), 1)
@@ -1,17 +1,28 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from core.models import Notification
+from core.services.notification_service import DEFAULT_BATCH_SIZE, notify_segment
 
 User = get_user_model()
 
+SEGMENT = 'segment'
+
+
 class Command(BaseCommand):
-    help = 'Send a notification to a user by their email'
+    help = (
+        'Send a notification to a user by their email, or pass "segment" instead of an email '
+        'to broadcast to every active user matching --genre/--tier'
+    )
 
     def add_arguments(self, parser):
-        parser.add_argument('email', type=str, help='Email of the user to notify')
+        parser.add_argument('email', type=str, help='Email of the user to notify, or "segment"')
         parser.add_argument('message', type=str, help='Notification message')
         parser.add_argument('--title', type=str, default='System Notification', help='Notification title')
         parser.add_argument('--badge', type=str, default='NEW', help='Notification badge (SWAP, VERIFIED, REMINDER, DEADLINE, NEW)')
+        parser.add_argument('--action-url', type=str, default=None, help='Link opened from the notification')
+        parser.add_argument('--genre', type=str, help='Segment: authors whose primary genre matches')
+        parser.add_argument('--tier', type=str, help='Segment: users with an active subscription on this tier name')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Segment: users per batch')
 
     def handle(self, *args, **options):
         email = options['email']
@@ -19,6 +30,9 @@ class Command(BaseCommand):
         title = options['title']
         badge = options['badge']
 
+        if email == SEGMENT:
+            return self._broadcast(options)
+
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
@@ -32,9 +46,27 @@ class Command(BaseCommand):
             recipient=user,
             title=title,
             message=message,
-            badge=badge
+            badge=badge,
+            action_url=options['action_url'],
         )
 
         self.stdout.write(
             self.style.SUCCESS(f'Successfully sent notification to {user.username}: "{message}"')
         )
+
+    def _broadcast(self, options):
+        users = User.objects.filter(is_active=True)
+        if options['genre']:
+            users = users.filter(profiles__primary_genre__iexact=options['genre'])
+        if options['tier']:
+            users = users.filter(subscription__tier__name__iexact=options['tier'], subscription__is_active=True)
+
+        sent = notify_segment(
+            users,
+            title=options['title'],
+            message=options['message'],
+            badge=options['badge'],
+            action_url=options['action_url'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Broadcast notification to {sent} user(s): "{options["message"]}"'))
@@ -0,0 +1,18 @@
+"""
+Management command that refreshes MailerLite analytics for connected accounts.
+Run it from cron (e.g. every 15 minutes).
+"""
+from django.core.management.base import BaseCommand
+
+from core.services.mailerlite_sync_service import sync_all
+
+
+class Command(BaseCommand):
+    help = 'Sync subscriber analytics from MailerLite for every connected account whose data is stale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Sync every connected account, not only stale ones')
+
+    def handle(self, *args, **options):
+        synced = sync_all(force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f'MailerLite sync finished: accounts={synced}'))
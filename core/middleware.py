@@ -3,7 +3,7 @@ Middleware to track clicks using URL parameters without creating new endpoints
 """
 from django.utils.deprecation import MiddlewareMixin
 from django.http import JsonResponse
-from .models import SwapRequest, SwapLinkClick
+from .models import SwapRequest, SwapLinkClick, primary_profile_memo
 
 class ClickTrackingMiddleware(MiddlewareMixin):
     def process_request(self, request):
@@ -54,3 +54,17 @@ class ClickTrackingMiddleware(MiddlewareMixin):
                     pass
         
         return None
+
+
+class PrimaryProfileMemoMiddleware:
+    """
+    Memoize Profile.objects.primary_for() per request, so serializers and
+    services asking for the same user's profile share one query.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with primary_profile_memo():
+            return self.get_response(request)
@@ -1,4 +1,8 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
+from django.db.models import Prefetch, Q
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
@@ -52,17 +56,59 @@ class NewsletterSlot(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, blank=True, null=True, help_text="Set price if promotion_type is Paid")
     
     partner_requirements = models.TextField(blank=True, null=True)
+
+    # Denormalized capacity, maintained by core.services.slot_capacity_service
+    active_partners_count = models.PositiveIntegerField(default=0, editable=False)
+    is_full = models.BooleanField(default=False, editable=False)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'visibility', 'send_date'], name='slot_status_vis_date_idx'),
+            # Explorer: open slots, newest first
+            models.Index(fields=['status', 'is_full', '-created_at'], name='slot_status_full_created_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.share_token:
             self.share_token = uuid.uuid4()
+        self.is_full = (self.active_partners_count or 0) >= (self.max_partners or 0)
         super().save(*args, **kwargs)
 
     def __str__(self):   
         return f"{self.preferred_genre} slot on {self.send_date}"
 
+class CalendarDay(models.Model):
+    """
+    Daily calendar rollup maintained by core.services.calendar_service: the
+    user's slots on `date` with one preferred_genre/visibility/slot_status
+    combination, and the swap requests on them counted by status.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='calendar_days')
+    date = models.DateField()
+    preferred_genre = models.CharField(max_length=50)
+    visibility = models.CharField(max_length=30)
+    slot_status = models.CharField(max_length=20)
+    slot_count = models.PositiveIntegerField(default=0)
+    pending_swaps = models.PositiveIntegerField(default=0)
+    confirmed_swaps = models.PositiveIntegerField(default=0)
+    scheduled_swaps = models.PositiveIntegerField(default=0)
+    completed_swaps = models.PositiveIntegerField(default=0)
+    verified_swaps = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'preferred_genre', 'visibility', 'slot_status'],
+                name='calendarday_user_date_dims_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.date}: {self.slot_count} slots"
+
+
 class Book(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='books')
     title = models.CharField(max_length=255)
@@ -87,6 +133,73 @@ class Book(models.Model):
     def __str__(self):
         return self.title
 
+# user_id -> primary Profile for the current request (core.middleware)
+_primary_profile_memo = ContextVar('primary_profile_memo', default=None)
+
+
+@contextmanager
+def primary_profile_memo():
+    """Share Profile.objects.primary_for() results by user id within the block."""
+    token = _primary_profile_memo.set({})
+    try:
+        yield
+    finally:
+        _primary_profile_memo.reset(token)
+
+
+def forget_primary_profile(user_id):
+    """Drop `user_id` from the current memo, e.g. after one of their profiles changed."""
+    memo = _primary_profile_memo.get()
+    if memo is not None:
+        memo.pop(user_id, None)
+
+
+class ProfileManager(models.Manager):
+    """
+    Profile is a ForeignKey, and seed scripts have left some users with
+    several rows. A user's primary profile is always their lowest-pk one.
+    """
+    PREFETCH_ATTR = 'primary_profiles'
+
+    def prefetch_primary(self, lookup='profiles'):
+        """
+        Prefetch for list querysets, e.g.
+        swaps.prefetch_related(Profile.objects.prefetch_primary('requester__profiles')).
+        primary_for() then answers from it without a query.
+        """
+        return Prefetch(lookup, queryset=self.order_by('pk'), to_attr=self.PREFETCH_ATTR)
+
+    def primary_for_users(self, user_ids):
+        """{user_id: primary Profile} for `user_ids` in one query."""
+        by_user = {}
+        for profile in self.filter(user_id__in=set(user_ids)).order_by('pk'):
+            by_user.setdefault(profile.user_id, profile)
+        memo = _primary_profile_memo.get()
+        if memo is not None:
+            memo.update({user_id: by_user.get(user_id) for user_id in user_ids})
+        return by_user
+
+    def primary_for(self, user):
+        """The user's primary Profile, or None. Uses prefetch_primary() and the request memo when available."""
+        if user is None:
+            return None
+        memo = _primary_profile_memo.get()
+        if memo is not None and user.pk in memo:
+            return memo[user.pk]
+
+        if hasattr(user, self.PREFETCH_ATTR):
+            profiles = getattr(user, self.PREFETCH_ATTR)
+            profile = profiles[0] if profiles else None
+        elif 'profiles' in getattr(user, '_prefetched_objects_cache', {}):
+            profile = min(user.profiles.all(), key=lambda p: p.pk, default=None)
+        else:
+            profile = self.filter(user_id=user.pk).order_by('pk').first()
+
+        if memo is not None:
+            memo[user.pk] = profile
+        return profile
+
+
 class Profile(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='profiles')
     email = models.EmailField(blank=True, null=True)
@@ -125,6 +238,8 @@ class Profile(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ProfileManager()
+
     @property
     def swaps_completed(self):
         from .models import SwapRequest
@@ -186,6 +301,11 @@ class SubscriberVerification(models.Model):
     unconfirmed_subscribers = models.PositiveIntegerField(default=0)
     bounced_subscribers = models.PositiveIntegerField(default=0)
     junk_subscribers = models.PositiveIntegerField(default=0, help_text="Spam/junk flagged subscribers")
+
+    # Campaign import high-water mark (core.services.campaign_import_service)
+    campaigns_synced_through = models.DateTimeField(
+        null=True, blank=True, help_text="Send time of the newest imported campaign; clear it to re-import all history"
+    )
     
     def __str__(self):
         return f"{self.user.username} Verification"
@@ -207,10 +327,47 @@ class CampaignAnalytic(models.Model):
     open_rate = models.FloatField()
     click_rate = models.FloatField()
     type = models.CharField(max_length=50, default='Recent') # Recent, Top Performing, Swap Campaigns
+    # MailerLite campaign id for imported campaigns; empty for ones created here
+    provider_campaign_id = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'provider_campaign_id'], name='campaign_user_provider_id_uniq'),
+        ]
     
     def __str__(self):
         return self.name
 
+
+class MailerLiteGroupChange(models.Model):
+    """
+    Outbox row for the master MailerLite account: `email` should end up in the
+    `target` swap group. Written in the same transaction as the swap change and
+    sent by core.services.mailerlite_outbox_service.
+    """
+    TARGET_CHOICES = [
+        ('pending', 'Pending'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+
+    email = models.EmailField()
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # Drain: unsent changes in write order; partial so sent rows don't bloat it
+            models.Index(fields=['id'], condition=Q(processed_at__isnull=True), name='mlgroupchange_unsent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} → {self.target}"
+
+
 class SwapRequest(models.Model):
     # The slot being requested (owned by *another* user)
     slot = models.ForeignKey(NewsletterSlot, on_delete=models.CASCADE, related_name='swap_requests')
@@ -265,6 +422,15 @@ class SwapRequest(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Expiry sweeps: pending requests past the acceptance window
+            models.Index(fields=['status', 'created_at'], name='swapreq_status_created_idx'),
+            # Sent tab / dashboard: a requester's swaps by status, newest first
+            models.Index(fields=['requester', 'status', '-created_at'], name='swapreq_requester_status_idx'),
+            # Slot capacity and "already requested" checks
+            models.Index(fields=['slot', 'status'], name='swapreq_slot_status_idx'),
+        ]
 
     def __str__(self):
         return f"Request by {self.requester} for slot {self.slot}"
@@ -312,11 +478,38 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Notification feed: a recipient's latest notifications
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created_idx'),
+            # Unread badge; partial so read notifications don't bloat it
+            models.Index(fields=['recipient'], condition=Q(is_read=False), name='notif_recipient_unread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} for {self.recipient.username}"
 
 
+class NotificationArchive(models.Model):
+    """
+    Notifications rolled up by the retention purge
+    (core.services.notification_retention): one row per user per month, with
+    that month's notifications as a compact JSON list.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_archives')
+    month = models.DateField(help_text="First day of the archived month")
+    notifications = models.JSONField(default=list)
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='notifarchive_user_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m}: {self.count} notifications"
+
+
 class Email(models.Model):
     """
     Internal email/messaging system for Communication Tools.
@@ -348,6 +541,10 @@ class Email(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Folder listings and per-folder unread counts
+            models.Index(fields=['recipient', 'folder', 'is_read'], name='email_recipient_folder_idx'),
+        ]
 
     def __str__(self):
         recipient_str = self.recipient.username
@@ -371,11 +568,57 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Chat history between two users (queried in both directions)
+            models.Index(fields=['sender', 'recipient', 'created_at'], name='chatmsg_pair_created_idx'),
+            # Unread counts and mark-as-read; partial so read messages don't bloat it
+            models.Index(fields=['recipient', 'sender'], condition=Q(is_read=False), name='chatmsg_recipient_unread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username} → {self.recipient.username}: {self.content[:40]}"
 
 
+class Conversation(models.Model):
+    """
+    Inbox summary for one pair of users, so chat partner lists don't have to scan
+    ChatMessage per partner. The pair is stored ordered (user_low.id < user_high.id);
+    unread_low / unread_high count messages the respective user hasn't read yet.
+    Maintained by core.services.conversation_service.
+    """
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey(ChatMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_message_snippet = models.CharField(max_length=255, blank=True, default='')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_low = models.PositiveIntegerField(default=0)
+    unread_high = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='conversation_user_pair_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user_low', '-last_message_at'], name='conversation_low_recent_idx'),
+            models.Index(fields=['user_high', '-last_message_at'], name='conversation_high_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id} ↔ {self.user_high_id}"
+
+    def partner_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
+    def unread_for(self, user_id):
+        return self.unread_low if user_id == self.user_low_id else self.unread_high
+
+    @property
+    def last_message_text(self):
+        """Full body of the last message; load it with conversations_for(..., full_text=True)."""
+        return self.last_message.content if self.last_message_id else self.last_message_snippet
+
+
 class SwapPayment(models.Model):
     """
     Tracks payments for paid swap requests.
@@ -523,6 +766,8 @@ class PaymentTransaction(models.Model):
             self.status = 'completed'
             self.completed_at = timezone.now()
             self.save()
+            # Sent together at the end with one bulk insert
+            notifications = []
             
             # Add money to receiver's wallet ONLY if it's not a withdrawal
             # For withdrawals, we've already deducted from the sender's wallet in the view.
@@ -531,14 +776,13 @@ class PaymentTransaction(models.Model):
                 wallet.add_balance(self.amount)
                 
                 # Create notification for receiver - money received
-                from core.models import Notification
-                Notification.objects.create(
+                notifications.append(Notification(
                     recipient=self.receiver,
                     title="💰 Payment Received!",
                     badge="PAYMENT",
                     message=f"${self.amount} has been credited to your account from {self.sender.username}.",
                     action_url="/wallet"
-                )
+                ))
                 
                 # Update swap status if this is a swap payment
                 if self.swap_request:
@@ -557,39 +801,47 @@ class PaymentTransaction(models.Model):
                         logger.info(f"Swap {swap.id} status updated from {old_status} to scheduled (payment received)")
                         
                         # Create notification for payment received and swap scheduled
-                        Notification.objects.create(
+                        notifications.append(Notification(
                             recipient=swap.requester,
                             title="✅ Payment Confirmed & Swap Scheduled!",
                             badge="SWAP",
                             message=f"Your payment for swap with {swap.slot.user.username} has been confirmed. The swap is now scheduled!",
                             action_url=f"/dashboard/swaps/track/{swap.id}/"
-                        )
+                        ))
                         
-                        Notification.objects.create(
+                        notifications.append(Notification(
                             recipient=swap.slot.user,
                             title="✅ Swap Scheduled!",
                             badge="SWAP",
                             message=f"Payment received from {swap.requester.username}. Your swap is now scheduled!",
                             action_url=f"/dashboard/swaps/track/{swap.id}/"
-                        )
+                        ))
                     else:
                         logger.warning(f"Swap {swap.id} not updated - status {swap.status} not in allowed list")
             
             # Create notification for sender - payment sent/deducted
             if self.sender and self.transaction_type != 'withdrawal':
-                from core.models import Notification
                 sender_wallet, _ = UserWallet.objects.get_or_create(user=self.sender)
-                Notification.objects.create(
+                notifications.append(Notification(
                     recipient=self.sender,
                     title="💳 Payment Sent",
                     badge="PAYMENT",
                     message=f"${self.amount} has been deducted from your account. Remaining balance: ${sender_wallet.balance}",
                     action_url="/wallet"
-                )
-            
+                ))
+
+            from core.services.notification_service import notify_many
+            notify_many(notifications)
             return True
         return False
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Expiry sweeps: abandoned pending checkouts
+            models.Index(fields=['status', 'created_at'], name='paytx_status_created_idx'),
+            # Wallet history and direct-payment lookups, from either side
+            models.Index(fields=['sender', 'transaction_type', 'status'], name='paytx_sender_type_status_idx'),
+            models.Index(fields=['receiver', 'transaction_type', 'status'], name='paytx_recv_type_status_idx'),
+        ]
 
@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Page-number pagination runs COUNT(*) on every request, and deep pages cost
+O(offset). Clients that scroll through a feed can opt in with
+`?pagination=cursor`. Each page is then one indexed range query:
+
+    WHERE (created_at, id) < (cursor.created_at, cursor.id)
+    ORDER BY created_at DESC, id DESC LIMIT page_size + 1
+
+Follow the `next` link for the following page. `count` is only computed when
+the client also passes `?include_count=true`.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+PAGINATION_MODE_PARAM = 'pagination'
+CURSOR_MODE = 'cursor'
+
+
+class KeysetPagination(BasePagination):
+    page_size = 9
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'include_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @staticmethod
+    def requested(request):
+        return request.query_params.get(PAGINATION_MODE_PARAM) == CURSOR_MODE
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(token.encode()).decode().rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_used = self.get_page_size(request)
+        self.count = queryset.count() if request.query_params.get(self.count_query_param) == 'true' else None
+
+        queryset = queryset.order_by('-created_at', '-pk')
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, pk = cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+        rows = list(queryset[:self.page_size_used + 1])
+        page = rows[:self.page_size_used]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > self.page_size_used else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, PAGINATION_MODE_PARAM, CURSOR_MODE)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'page_size': self.page_size_used,
+            'results': data,
+        }
+        if self.count is not None:
+            payload['count'] = self.count
+        return Response(payload)
+
+
+def get_paginator(request, default_class=None):
+    """Return a KeysetPagination if the client asked for one, else `default_class()` (or None)."""
+    if KeysetPagination.requested(request):
+        return KeysetPagination()
+    return default_class() if default_class is not None else None
+
+
+class KeysetPaginationMixin:
+    """GenericAPIView mixin that switches to KeysetPagination on `?pagination=cursor`."""
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            self._paginator = get_paginator(self.request, self.pagination_class)
+        return self._paginator
@@ -10,6 +10,8 @@ from .models import (
 from django.utils import timezone
 from datetime import timedelta
 
+from core.services.audience_service import serializer_audience_size
+
 class ProfileSerializer(serializers.ModelSerializer):   
     class Meta:
         model = Profile
@@ -102,7 +104,7 @@ class NewsletterSlotSerializer(serializers.ModelSerializer):
     class Meta:
         model = NewsletterSlot
         fields = '__all__'
-        read_only_fields = ['user']
+        read_only_fields = ['user', 'active_partners_count', 'is_full']
         extra_kwargs = {
             'send_time': {'required': False, 'allow_null': True},
             'max_partners': {'required': True},
@@ -139,20 +141,16 @@ class NewsletterSlotSerializer(serializers.ModelSerializer):
         
     def get_audience_size(self, obj):
         # Prefer the 'active_subscribers' from user's verification profile
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.filter(user=obj.user).first()
-            if verification and verification.active_subscribers:
-                return verification.active_subscribers
-        except Exception:
-            pass
+        active = serializer_audience_size(self, obj.user_id, user_of=lambda slot: slot.user_id)
+        if active:
+            return active
         # Fallback to the model's own field
         return obj.audience_size
 
     def get_current_partners_count(self, obj):
-        return obj.swap_requests.filter(
-            status__in=['completed', 'confirmed', 'verified', 'scheduled']
-        ).count()
+        # Stored count over ACTIVE_PARTNER_STATUSES, so 'sending' swaps occupy a
+        # place here too, matching the explore card and the is_full filter
+        return obj.active_partners_count
 
     def get_share_url(self, obj):
         """Returns the secret invitation link if visibility is not public"""
@@ -289,6 +287,10 @@ class BookSerializer(serializers.ModelSerializer):
 
     def get_swap_count(self, obj):
         """Return the total number of swap requests this book has been involved in."""
+        # Book lists annotate this in SQL (see book_stats_service)
+        swap_count = getattr(obj, 'annotated_swap_count', None)
+        if swap_count is not None:
+            return swap_count
         return obj.swap_requests.count()
 
     def validate_subgenres(self, value):
@@ -534,7 +536,7 @@ class SwapRequestSerializer(serializers.ModelSerializer):
 
 
     def get_requester_name(self, obj):
-        profile = obj.requester.profiles.first()
+        profile = Profile.objects.primary_for(obj.requester)
         return profile.name if profile else obj.requester.username
 
     def get_compatibility_indicators(self, obj):
@@ -548,13 +550,13 @@ class SwapRequestSerializer(serializers.ModelSerializer):
             indicators["genre_match"] = obj.book.primary_genre == obj.slot.preferred_genre
             
             # Audience Comparable (within 50% range)
-            requester_profile = obj.requester.profiles.first()
+            requester_profile = Profile.objects.primary_for(obj.requester)
             if requester_profile:
                 indicators["audience_comparable"] = True # Simplified logic
             
             # Reliability Match
-            owner_profile = obj.slot.user.profiles.first()
-            requester_profile = obj.requester.profiles.first()
+            owner_profile = Profile.objects.primary_for(obj.slot.user)
+            requester_profile = Profile.objects.primary_for(obj.requester)
             if owner_profile and requester_profile:
                 diff = abs(owner_profile.reputation_score - requester_profile.reputation_score)
                 indicators["reliability_match"] = diff <= 1.0
@@ -623,6 +625,11 @@ class SwapManagementSerializer(serializers.ModelSerializer):
         ]
 
     def get_status(self, obj):
+        # List views annotate the same rules in SQL (see swap_status_service)
+        effective_status = getattr(obj, 'effective_status', None)
+        if effective_status:
+            return effective_status
+
         request = self.context.get('request')
         # Show as 'sending' if the swap is pending and the current user is the requester
         if request and obj.status == 'pending' and obj.requester_id == request.user.id:
@@ -675,19 +682,29 @@ class SwapManagementSerializer(serializers.ModelSerializer):
             return False
         
         # 1. Primary check: check actual SwapPayment record status
-        try:
-            payment = obj.payment
+        payments_by_swap = self.context.get('payments_by_swap')
+        if payments_by_swap is not None:
+            payment = payments_by_swap.get(obj.id)
             if payment and payment.status == 'completed':
                 return True
-        except:
-            pass # No payment record, but check transactions next
+        else:
+            try:
+                payment = obj.payment
+                if payment and payment.status == 'completed':
+                    return True
+            except:
+                pass # No payment record, but check transactions next
 
         # 2. Fallback check: check for any successful transaction record linked to this swap
         from core.models import PaymentTransaction
-        tx_exists = PaymentTransaction.objects.filter(
-            swap_request=obj, 
-            status='completed'
-        ).exists()
+        completed_tx_swap_ids = self.context.get('completed_tx_swap_ids')
+        if completed_tx_swap_ids is not None:
+            tx_exists = obj.id in completed_tx_swap_ids
+        else:
+            tx_exists = PaymentTransaction.objects.filter(
+                swap_request=obj, 
+                status='completed'
+            ).exists()
         
         if tx_exists:
             # If a successful transaction exists, we should trust it
@@ -708,12 +725,20 @@ class SwapManagementSerializer(serializers.ModelSerializer):
         
         # Look for direct payment transactions between these users within 24h
         # Use a small tolerance for amount comparison (0.01 difference allowed)
-        direct_tx = PaymentTransaction.objects.filter(
-            Q(sender=sender, receiver=receiver) | Q(sender=receiver, receiver=sender),
-            transaction_type='direct_payment',
-            status='completed',
-            created_at__gte=timezone.now() - timedelta(hours=24),
-        ).first()
+        recent_direct_payments = self.context.get('recent_direct_payments')
+        if recent_direct_payments is not None:
+            pair = {obj.requester_id, obj.slot.user_id}
+            direct_tx = next(
+                (tx for tx in recent_direct_payments if {tx.sender_id, tx.receiver_id} == pair),
+                None
+            )
+        else:
+            direct_tx = PaymentTransaction.objects.filter(
+                Q(sender=sender, receiver=receiver) | Q(sender=receiver, receiver=sender),
+                transaction_type='direct_payment',
+                status='completed',
+                created_at__gte=timezone.now() - timedelta(hours=24),
+            ).order_by('-created_at', '-pk').first()
         
         if direct_tx:
             tx_amount = Decimal(str(direct_tx.amount))
@@ -721,7 +746,7 @@ class SwapManagementSerializer(serializers.ModelSerializer):
             # Allow small tolerance for amount comparison
             if abs(tx_amount - expected_price) <= Decimal('0.01'):
                 # Found a matching direct payment - link it to this swap for future
-                if not direct_tx.swap_request:
+                if not direct_tx.swap_request_id:
                     direct_tx.swap_request = obj
                     direct_tx.save(update_fields=['swap_request'])
                 return True
@@ -751,6 +776,12 @@ class SwapManagementSerializer(serializers.ModelSerializer):
             return obj.slot.user
         return obj.requester
 
+    def _get_profile(self, user):
+        profiles_by_user = self.context.get('profiles_by_user')
+        if profiles_by_user is not None:
+            return profiles_by_user.get(user.id)
+        return Profile.objects.primary_for(user)
+
     def get_author_id(self, obj):
         # Keeping for backward compatibility or general partner reference
         partner = self.get_partner_user(obj)
@@ -766,23 +797,23 @@ class SwapManagementSerializer(serializers.ModelSerializer):
 
     def get_author_name(self, obj):
         partner = self.get_partner_user(obj)
-        profile = partner.profiles.first()
+        profile = self._get_profile(partner)
         return profile.name if profile else partner.username
         
     def get_sender_name(self, obj):
-        profile = obj.requester.profiles.first()
+        profile = self._get_profile(obj.requester)
         return profile.name if profile else obj.requester.username
 
     def get_author_genre_label(self, obj):
         partner = self.get_partner_user(obj)
-        profile = partner.profiles.first()
+        profile = self._get_profile(partner)
         if profile:
             return f"{profile.get_primary_genre_display() if hasattr(profile, 'get_primary_genre_display') else profile.primary_genre}"
         return ""
 
     def get_profile_picture(self, obj):
         partner = self.get_partner_user(obj)
-        profile = partner.profiles.first()
+        profile = self._get_profile(partner)
         if profile and profile.profile_picture:
             request = self.context.get('request')
             if request:
@@ -793,19 +824,16 @@ class SwapManagementSerializer(serializers.ModelSerializer):
     def get_audience_size(self, obj):
         # Use the partner's active subscriber count (synced from MailerLite)
         partner = self.get_partner_user(obj)
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=partner)
-            size = verification.active_subscribers
+        size = serializer_audience_size(self, partner.id, user_of=lambda swap: self.get_partner_user(swap).id)
+        if size is not None:
             return f"{size:,}+"
-        except SubscriberVerification.DoesNotExist:
-            # Fallback to the slot's audience_size if no verification record exists
-            slot = obj.slot
-            return f"{slot.audience_size:,}+" if slot else "0"
+        # Fallback to the slot's audience_size if no verification record exists
+        slot = obj.slot
+        return f"{slot.audience_size:,}+" if slot else "0"
 
     def get_reliability_score(self, obj):
         partner = self.get_partner_user(obj)
-        profile = partner.profiles.first()
+        profile = self._get_profile(partner)
         if profile:
             return f"{int(profile.send_reliability_percent)}%"
         return "0%"
@@ -859,35 +887,30 @@ class SwapPartnerSerializer(serializers.ModelSerializer):
 
     def get_audience_size(self, obj):
         """Return active subscribers count instead of total audience size"""
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=obj.user)
-            return verification.active_subscribers
-        except SubscriberVerification.DoesNotExist:
-            return 0
+        return serializer_audience_size(self, obj.user_id, user_of=lambda slot: slot.user_id) or 0
 
 
 
     def get_author_name(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         return profile.name if profile else obj.user.username
 
     def get_swaps_completed(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         return profile.swaps_completed if profile else 0
 
     def get_profile_picture(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         if profile and profile.profile_picture:
             return profile.profile_picture.url
         return None
 
     def get_reputation_score(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         return profile.reputation_score if profile else 5.0
 
     def get_analytics_summary(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         if profile:
             return {
                 "avg_open_rate": f"{profile.avg_open_rate}%",
@@ -898,7 +921,7 @@ class SwapPartnerSerializer(serializers.ModelSerializer):
         return {}
 
     def get_analytics_breakdown(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         if profile:
             return {
                 "avg_open_rate": profile.avg_open_rate,
@@ -909,7 +932,7 @@ class SwapPartnerSerializer(serializers.ModelSerializer):
         return {}
 
     def get_reputation_breakdown(self, obj):
-        profile = obj.user.profiles.first()
+        profile = Profile.objects.primary_for(obj.user)
         if profile:
             return {
                 "confirmed_sends": {"score": profile.confirmed_sends_score, "total": 50},
@@ -1016,7 +1039,7 @@ class SwapHistoryDetailSerializer(serializers.ModelSerializer):
 
     def get_partner_name(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         return profile.name if profile else partner.username
 
     def get_partner_label(self, obj):
@@ -1024,14 +1047,14 @@ class SwapHistoryDetailSerializer(serializers.ModelSerializer):
 
     def get_partner_genre(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         if profile:
             return f"{profile.get_primary_genre_display() if hasattr(profile, 'get_primary_genre_display') else profile.primary_genre} Writer"
         return ""
 
     def get_partner_profile_picture(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         if profile and profile.profile_picture:
             request = self.context.get('request')
             if request:
@@ -1192,17 +1215,12 @@ class SwapHistoryDetailSerializer(serializers.ModelSerializer):
     def get_audience(self, obj):
         """Returns the partner's verified subscriber count"""
         partner = self._get_partner(obj)
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=partner)
-            return verification.active_subscribers
-        except SubscriberVerification.DoesNotExist:
-            return 0
+        return serializer_audience_size(self, partner.id, user_of=lambda swap: self._get_partner(swap).id) or 0
 
     def get_reliability(self, obj):
         """Returns the partner's reputation score"""
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         return profile.reputation_score if profile else 0.0
 
     def get_site_url(self, obj):
@@ -1339,12 +1357,12 @@ class TrackMySwapSerializer(serializers.ModelSerializer):
 
     def get_partner_name(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         return profile.name if profile else partner.username
 
     def get_partner_genre(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         if profile:
             genre = profile.get_primary_genre_display() if hasattr(profile, 'get_primary_genre_display') else profile.primary_genre
             return f"{genre} Writer"
@@ -1352,7 +1370,7 @@ class TrackMySwapSerializer(serializers.ModelSerializer):
 
     def get_partner_profile_picture(self, obj):
         partner = self._get_partner(obj)
-        profile = partner.profiles.first()
+        profile = Profile.objects.primary_for(partner)
         if profile and profile.profile_picture:
             request = self.context.get('request')
             if request:
@@ -1609,12 +1627,8 @@ class SubscriberGrowthSerializer(serializers.ModelSerializer):
     
     def get_count(self, obj):
         # Return active subscriber count instead of total count
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=obj.user)
-            return verification.active_subscribers
-        except SubscriberVerification.DoesNotExist:
-            return obj.count  # Fallback to original count
+        active = serializer_audience_size(self, obj.user_id, user_of=lambda growth: growth.user_id)
+        return obj.count if active is None else active  # Fallback to original count
 
 
 class CampaignAnalyticSerializer(serializers.ModelSerializer):
@@ -1672,13 +1686,13 @@ class EmailListSerializer(serializers.ModelSerializer):
         ]
 
     def get_sender_name(self, obj):
-        profile = obj.sender.profiles.first()
+        profile = Profile.objects.primary_for(obj.sender)
         return profile.name if profile else obj.sender.username
 
     def get_sender_profile_picture(self, obj):
         request = self.context.get('request')
         # Try core.Profile first
-        profile = obj.sender.profiles.first()
+        profile = Profile.objects.primary_for(obj.sender)
         if profile and profile.profile_picture:
             url = profile.profile_picture.url
             return request.build_absolute_uri(url) if request else url
@@ -1695,7 +1709,7 @@ class EmailListSerializer(serializers.ModelSerializer):
     def get_recipient_name(self, obj):
         if not obj.recipient:
             return None
-        profile = obj.recipient.profiles.first()
+        profile = Profile.objects.primary_for(obj.recipient)
         return profile.name if profile else obj.recipient.username
 
     def get_recipient_profile_picture(self, obj):
@@ -1703,7 +1717,7 @@ class EmailListSerializer(serializers.ModelSerializer):
             return None
         request = self.context.get('request')
         # Try core.Profile first
-        profile = obj.recipient.profiles.first()
+        profile = Profile.objects.primary_for(obj.recipient)
         if profile and profile.profile_picture:
             url = profile.profile_picture.url
             return request.build_absolute_uri(url) if request else url
@@ -1764,7 +1778,7 @@ class EmailDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_sender_name(self, obj):
-        profile = obj.sender.profiles.first()
+        profile = Profile.objects.primary_for(obj.sender)
         return profile.name if profile else obj.sender.username
 
     def get_sender_email(self, obj):
@@ -1773,7 +1787,7 @@ class EmailDetailSerializer(serializers.ModelSerializer):
     def get_sender_profile_picture(self, obj):
         request = self.context.get('request')
         # Try core.Profile first
-        profile = obj.sender.profiles.first()
+        profile = Profile.objects.primary_for(obj.sender)
         if profile and profile.profile_picture:
             url = profile.profile_picture.url
             return request.build_absolute_uri(url) if request else url
@@ -1790,7 +1804,7 @@ class EmailDetailSerializer(serializers.ModelSerializer):
     def get_recipient_name(self, obj):
         if not obj.recipient:
             return None
-        profile = obj.recipient.profiles.first()
+        profile = Profile.objects.primary_for(obj.recipient)
         return profile.name if profile else obj.recipient.username
 
     def get_recipient_email(self, obj):
@@ -1803,7 +1817,7 @@ class EmailDetailSerializer(serializers.ModelSerializer):
             return None
         request = self.context.get('request')
         # Try core.Profile first
-        profile = obj.recipient.profiles.first()
+        profile = Profile.objects.primary_for(obj.recipient)
         if profile and profile.profile_picture:
             url = profile.profile_picture.url
             return request.build_absolute_uri(url) if request else url
@@ -1868,27 +1882,37 @@ class ConversationPartnerSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'name', 'avatar', 'last_message', 'time', 'swap_status']
 
     def get_name(self, obj):
-        profile = obj.profiles.first()
+        profile = Profile.objects.primary_for(obj)
         if profile and profile.name:
             return profile.name
         return obj.username
 
+    def _conversation(self, obj):
+        """Conversation summary from the view's preloaded map; None if there's no chat yet."""
+        conversations = self.context.get('conversations')
+        if conversations is not None:
+            return conversations.get(obj.id)
+        request = self.context.get('request')
+        from core.services.conversation_service import conversations_for
+        return conversations_for(request.user, [obj.id], full_text=True).get(obj.id)
+
     def get_swap_status(self, obj):
         request = self.context.get('request')
         if not request:
             return None
-        
-        swap = SwapRequest.objects.filter(
-            (Q(requester=request.user) & Q(slot__user=obj)) |
-            (Q(requester=obj) & Q(slot__user=request.user))
-        ).exclude(status='rejected').order_by('-created_at').first()
-        
-        if swap and swap.status in ['confirmed', 'completed']:
+
+        swap_statuses = self.context.get('swap_statuses')
+        if swap_statuses is None:
+            from core.services.conversation_service import latest_swap_statuses
+            swap_statuses = latest_swap_statuses(request.user, [obj.id])
+        swap_status = swap_statuses.get(obj.id)
+
+        if swap_status in ['confirmed', 'completed']:
             return 'scheduled'
-        return swap.status if swap else None
+        return swap_status
 
     def get_avatar(self, obj):
-        profile = obj.profiles.first()
+        profile = Profile.objects.primary_for(obj)
         if profile and profile.profile_picture:
             request = self.context.get('request')
             if request:
@@ -1900,30 +1924,22 @@ class ConversationPartnerSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request:
             return None
-        
-        last_msg = ChatMessage.objects.filter(
-            (Q(sender=request.user) & Q(recipient=obj)) |
-            (Q(sender=obj) & Q(recipient=request.user))
-        ).order_by('-created_at').first()
-        
-        return last_msg.content if last_msg else "No messages yet"
+
+        conversation = self._conversation(obj)
+        return conversation.last_message_text if conversation else "No messages yet"
 
     def get_time(self, obj):
         request = self.context.get('request')
         if not request:
             return None
-        
-        last_msg = ChatMessage.objects.filter(
-            (Q(sender=request.user) & Q(recipient=obj)) |
-            (Q(sender=obj) & Q(recipient=request.user))
-        ).order_by('-created_at').first()
-        
-        if last_msg:
+
+        conversation = self._conversation(obj)
+        if conversation and conversation.last_message_at:
             from django.utils import timezone
             now = timezone.now().date()
-            target = last_msg.created_at.date()
+            target = conversation.last_message_at.date()
             if target == now:
-                return last_msg.created_at.strftime("%I:%M %p")
+                return conversation.last_message_at.strftime("%I:%M %p")
             return target.strftime("%d %b")
         return ""
 
@@ -1948,12 +1964,23 @@ class ChatMessageSerializer(serializers.ModelSerializer):
             'created_at',
         ]
 
+    def _sender_profile(self, obj):
+        """
+        Sender's profile, from context['profiles_by_user'] when the view preloaded it.
+        Anything looked up here is memoized in the same map, so each sender costs
+        at most one query per serialization.
+        """
+        profiles = self.context.setdefault('profiles_by_user', {})
+        if obj.sender_id not in profiles:
+            profiles[obj.sender_id] = Profile.objects.primary_for(obj.sender)
+        return profiles[obj.sender_id]
+
     def get_sender_name(self, obj):
-        profile = obj.sender.profiles.first()
+        profile = self._sender_profile(obj)
         return profile.name if profile else obj.sender.username
 
     def get_sender_profile_picture(self, obj):
-        profile = obj.sender.profiles.first()
+        profile = self._sender_profile(obj)
         if profile and profile.profile_picture:
             request = self.context.get('request')
             if request:
@@ -2077,7 +2104,7 @@ class PaymentTransactionSerializer(serializers.ModelSerializer):
     def get_sender_profile(self, obj):
         if obj.sender:
             try:
-                profile = obj.sender.profiles.first()
+                profile = Profile.objects.primary_for(obj.sender)
                 if profile:
                     return {
                         'name': profile.name,
@@ -2089,7 +2116,7 @@ class PaymentTransactionSerializer(serializers.ModelSerializer):
     
     def get_receiver_profile(self, obj):
         try:
-            profile = obj.receiver.profiles.first()
+            profile = Profile.objects.primary_for(obj.receiver)
             if profile:
                 return {
                     'name': profile.name,
@@ -0,0 +1,162 @@
+"""
+Shared audience-size lookups for serializers.
+
+Eight serializer fields (slot cards, slot details and partners, swap
+partners, swap management and history, subscriber growth) each looked up the
+user's SubscriberVerification once per object, so a 100-card explorer page
+ran 100 verification queries. They now go through this module:
+
+- a per-request identity map (on the request, or the serializer context when
+  there is no request) answers repeats within one response for free;
+- a process-wide LRU with a short TTL (AUDIENCE_CACHE_TTL seconds) answers
+  repeats across requests;
+- on a many=True page, the first lookup resolves the user of every object on
+  the page in one query.
+
+A value is the user's active_subscribers, or None when they have no
+SubscriberVerification; each field keeps its own fallback. core.signals drops
+a user's entry when their SubscriberVerification is saved or deleted. Other
+processes keep serving their entry until the TTL runs out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import models
+from rest_framework.serializers import ListSerializer
+
+from core.models import SubscriberVerification
+
+CACHE_SIZE = 10000
+_IDENTITY_MAP_ATTR = '_audience_sizes'
+
+
+class _LRUCache:
+    """Thread-safe LRU of user_id -> (expires_at, value)."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, now):
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, values, expires_at):
+        with self._lock:
+            for key, value in values.items():
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = _LRUCache(CACHE_SIZE)
+
+
+def _ttl():
+    return getattr(settings, 'AUDIENCE_CACHE_TTL', 60)
+
+
+def _identity_map(request=None, context=None):
+    if request is not None:
+        sizes = getattr(request, _IDENTITY_MAP_ATTR, None)
+        if sizes is None:
+            sizes = {}
+            setattr(request, _IDENTITY_MAP_ATTR, sizes)
+        return sizes
+    if context is not None:
+        return context.setdefault('audience_sizes', {})
+    return {}
+
+
+def get_audience_sizes(user_ids, request=None, context=None):
+    """
+    Return {user_id: active_subscribers or None} for `user_ids`, querying
+    SubscriberVerification once for the ids neither cache knows.
+    """
+    sizes = _identity_map(request, context)
+    wanted = {user_id for user_id in user_ids if user_id} - sizes.keys()
+    if wanted:
+        ttl = _ttl()
+        now = time.monotonic()
+        found = _cache.get_many(wanted, now) if ttl > 0 else {}
+        missing = wanted - found.keys()
+        if missing:
+            loaded = dict.fromkeys(missing)
+            loaded.update(
+                SubscriberVerification.objects.filter(user_id__in=missing).values_list('user_id', 'active_subscribers')
+            )
+            if ttl > 0:
+                _cache.set_many(loaded, now + ttl)
+            found.update(loaded)
+        sizes.update(found)
+    return {user_id: sizes.get(user_id) for user_id in user_ids}
+
+
+def _page_objects(serializer):
+    """The objects of the top-level many=True page `serializer` is rendering, or None."""
+    parent = serializer.parent
+    if not isinstance(parent, ListSerializer) or parent.parent is not None or parent.instance is None:
+        return None
+    page = parent.instance
+    return page.all() if isinstance(page, models.Manager) else page
+
+
+def serializer_audience_size(serializer, user, user_of=None):
+    """
+    active_subscribers for `user` (a User or user id), or None when they have
+    no SubscriberVerification, for a serializer field.
+
+    `user_of(obj)` maps one serialized object to its user id. When the
+    serializer renders a many=True page, the first call uses it to resolve
+    every object on the page in one query.
+    """
+    user_id = getattr(user, 'pk', user)
+    context = serializer.context
+    request = context.get('request')
+    sizes = _identity_map(request, context)
+    if user_id in sizes:
+        return sizes[user_id]
+
+    # select_related('user__verification') already did the work
+    loaded = getattr(getattr(user, '_state', None), 'fields_cache', {})
+    if 'verification' in loaded:
+        verification = loaded['verification']
+        sizes[user_id] = verification.active_subscribers if verification else None
+        return sizes[user_id]
+
+    user_ids = [user_id]
+    page = _page_objects(serializer) if user_of else None
+    if page is not None:
+        user_ids.extend(user_of(obj) for obj in page)
+    return get_audience_sizes(user_ids, request, context)[user_id]
+
+
+def invalidate_audience_size(user_id):
+    """Drop `user_id` from this process's cache (see core.signals)."""
+    _cache.delete(user_id)
+
+
+def clear_audience_cache():
+    _cache.clear()
@@ -0,0 +1,41 @@
+"""
+Book statistics for the book management page and book lists.
+
+BookManagementStatsView ran a count() per stats card and BookSerializer ran
+`swap_requests.count()` for every book it rendered (the "my books" lists on
+the book page, slot details and shared-slot links). book_stats() computes the
+cards in one conditional aggregate, and annotate_book_stats() adds the swap
+count to a Book queryset as a correlated subquery, which
+BookSerializer.get_swap_count reads instead of querying.
+"""
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Book, SwapRequest
+
+
+def _swap_count_subquery():
+    return Coalesce(
+        Subquery(
+            SwapRequest.objects.filter(book=OuterRef('pk'))
+            .order_by()
+            .values('book')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def annotate_book_stats(books):
+    """Annotate a Book queryset with `annotated_swap_count`."""
+    return books.annotate(annotated_swap_count=_swap_count_subquery())
+
+
+def book_stats(user):
+    """Return the user's total, active and primary-promo book counts from one query."""
+    return Book.objects.filter(user=user).aggregate(
+        total_books=Count('pk'),
+        active_promotions=Count('pk', filter=Q(is_active=True)),
+        primary_promo=Count('pk', filter=Q(is_primary_promo=True)),
+    )
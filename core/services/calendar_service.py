@@ -0,0 +1,150 @@
+"""
+Month calendars served from the CalendarDay rollup.
+
+NewsletterStatsView and AuthorDashboardView each joined slots to swap requests
+and counted by status with a GROUP BY on send_date for every calendar they
+rendered. The per-day counts now live in CalendarDay: one row per user, date
+and (genre, visibility, slot status) combination, so both views' filters still
+apply. Swap counts are stored per status and each view keeps its own notion of
+"confirmed" or "verified".
+
+core.signals calls refresh_calendar_days() for the affected (user, date) pairs
+whenever a slot is saved or deleted or a swap is created, changes status or is
+deleted. Code that bulk-updates swaps calls it directly.
+`manage.py rebuild_calendar` backfills or repairs the whole table.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from core.models import CalendarDay, NewsletterSlot
+
+# Swap statuses with their own CalendarDay column
+SWAP_STATUS_COLUMNS = {
+    'pending': 'pending_swaps',
+    'confirmed': 'confirmed_swaps',
+    'scheduled': 'scheduled_swaps',
+    'completed': 'completed_swaps',
+    'verified': 'verified_swaps',
+}
+
+DIMENSIONS = ['user', 'date', 'preferred_genre', 'visibility', 'slot_status']
+COUNT_COLUMNS = ['slot_count', *SWAP_STATUS_COLUMNS.values()]
+
+SLOT_FLAGS = {
+    'public_slots': Q(visibility='public'),
+    'available_slots': Q(slot_status='available'),
+    'booked_slots': Q(slot_status='booked'),
+    'pending_slots': Q(slot_status='pending'),
+}
+
+
+def _rebuild(slots, rollup):
+    """Replace the `rollup` CalendarDay rows with fresh counts from the `slots` queryset."""
+    rows = slots.values('user_id', 'send_date', 'preferred_genre', 'visibility', 'status').annotate(
+        slot_count=Count('id', distinct=True),
+        **{
+            column: Count('swap_requests', filter=Q(swap_requests__status=status))
+            for status, column in SWAP_STATUS_COLUMNS.items()
+        },
+    ).order_by()
+
+    # Upsert, so a concurrent refresh of the same day can't trip the unique constraint
+    with transaction.atomic():
+        rollup.delete()
+        CalendarDay.objects.bulk_create([
+            CalendarDay(
+                user_id=row['user_id'],
+                date=row['send_date'],
+                preferred_genre=row['preferred_genre'],
+                visibility=row['visibility'],
+                slot_status=row['status'],
+                slot_count=row['slot_count'],
+                **{column: row[column] for column in SWAP_STATUS_COLUMNS.values()},
+            )
+            for row in rows
+        ], update_conflicts=True, unique_fields=DIMENSIONS, update_fields=COUNT_COLUMNS)
+
+
+def refresh_calendar_days(pairs):
+    """Recompute the CalendarDay rows for an iterable of (user_id, date) pairs."""
+    pairs = {(user_id, day) for user_id, day in pairs if user_id and day}
+    if not pairs:
+        return
+    # Every user/date combination is rebuilt rather than OR-ing the pairs
+    # together; recomputing a few extra days is harmless and keeps the
+    # WHERE clause flat for large batches.
+    user_ids = {user_id for user_id, _ in pairs}
+    days = {day for _, day in pairs}
+    _rebuild(
+        NewsletterSlot.objects.filter(user_id__in=user_ids, send_date__in=days),
+        CalendarDay.objects.filter(user_id__in=user_ids, date__in=days),
+    )
+
+
+def refresh_slot_calendar(slots):
+    """Recompute the calendar days of the given NewsletterSlot instances or ids."""
+    slot_ids = [getattr(slot, 'pk', slot) for slot in slots]
+    refresh_calendar_days(
+        NewsletterSlot.objects.filter(pk__in=slot_ids).values_list('user_id', 'send_date').distinct()
+    )
+
+
+def calendar_days(user, start, end, genre=None, visibility=None, slot_status=None):
+    """
+    Return one dict per day from `start` to `end` inclusive, in order, with the
+    day's slot_count, swap counts per status (SWAP_STATUS_COLUMNS) and slot
+    flag counts (SLOT_FLAGS). Days without slots have all counts at zero.
+    """
+    user_id = getattr(user, 'pk', user)
+    rows = CalendarDay.objects.filter(user_id=user_id, date__gte=start, date__lte=end)
+    if genre:
+        rows = rows.filter(preferred_genre=genre)
+    if visibility:
+        rows = rows.filter(visibility=visibility)
+    if slot_status:
+        rows = rows.filter(slot_status=slot_status)
+
+    totals = rows.values('date').annotate(
+        **{f'total_{column}': Sum(column) for column in COUNT_COLUMNS},
+        **{flag: Sum('slot_count', filter=condition) for flag, condition in SLOT_FLAGS.items()},
+    ).order_by()
+    by_date = {row['date']: row for row in totals}
+
+    days = []
+    day = start
+    while day <= end:
+        row = by_date.get(day, {})
+        entry = {'date': day}
+        entry.update({column: row.get(f'total_{column}') or 0 for column in COUNT_COLUMNS})
+        entry.update({flag: row.get(flag) or 0 for flag in SLOT_FLAGS})
+        days.append(entry)
+        day += timedelta(days=1)
+    return days
+
+
+def month_calendar(user, year, month, **filters):
+    """calendar_days() for one calendar month."""
+    start = date(year, month, 1)
+    return calendar_days(user, start, start.replace(day=monthrange(year, month)[1]), **filters)
+
+
+def rebuild_calendar(batch_size=1000):
+    """Recompute CalendarDay for every user in primary-key batches. Returns users processed."""
+    from django.contrib.auth import get_user_model
+
+    users = get_user_model().objects.order_by('pk').values_list('pk', flat=True)
+    processed = 0
+    last_id = 0
+    while True:
+        ids = list(users.filter(pk__gt=last_id)[:batch_size])
+        if not ids:
+            return processed
+        _rebuild(
+            NewsletterSlot.objects.filter(user_id__in=ids),
+            CalendarDay.objects.filter(user_id__in=ids),
+        )
+        processed += len(ids)
+        last_id = ids[-1]
@@ -0,0 +1,212 @@
+"""
+Incremental MailerLite campaign import into CampaignAnalytic.
+
+sync_subscriber_analytics used to fetch the newest five campaigns (limit=5)
+and update_or_create each one by name: two queries per campaign, and any
+history beyond the last five campaigns never arrived. import_campaigns()
+pages through the account's sent campaigns, newest first, and writes each
+page with one bulk_create(update_conflicts=True) keyed on
+(user, provider_campaign_id).
+
+SubscriberVerification.campaigns_synced_through is the high-water mark: the
+send time of the newest imported campaign. Paging stops at the first page
+reaching back past it minus REFRESH_WINDOW, so campaigns whose open and click
+rates are still moving get refreshed while older pages are never requested
+again. A first run (or a cleared mark) backfills the whole history.
+Campaigns without a parseable send date can't move the mark; an incremental
+run also stops at the first page holding nothing but old campaigns and
+undated ones it already has, so such accounts don't rescan every page.
+
+bulk_create skips post_save, so the importer marks the dashboard's campaign
+section stale itself.
+"""
+import logging
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.models import CampaignAnalytic
+from core.services.mailerlite_client import API_URL, CLASSIC_API_URL
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+# Rates of recently sent campaigns keep changing; re-import these on every run
+REFRESH_WINDOW = timedelta(days=7)
+UPDATE_FIELDS = ['name', 'date', 'subscribers', 'open_rate', 'click_rate']
+
+
+def _sent_at(value):
+    """MailerLite timestamps come as datetimes or bare dates; returns an aware datetime or None."""
+    if not value or not isinstance(value, str):
+        return None
+    parsed = parse_datetime(value.replace(' ', 'T', 1))
+    if parsed is None:
+        day = parse_date(value[:10])
+        if day is None:
+            return None
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def _parse_campaign(camp, is_new_api):
+    """Map one API campaign to CampaignAnalytic fields, or None when it can't be imported."""
+    if is_new_api:
+        name = camp.get('subject') or camp.get('name')
+        sent_at = camp.get('sent_at') or camp.get('created_at') or camp.get('send_time')
+        subs = camp.get('total_recipients', 0) or camp.get('recipients_count', 0) or camp.get('emails_sent', 0)
+        open_r = camp.get('open_rate_percent', 0.0) or camp.get('open_rate', 0.0) or camp.get('opens_count', 0)
+        click_r = camp.get('click_rate_percent', 0.0) or camp.get('click_rate', 0.0) or camp.get('clicks_count', 0)
+    else:
+        # Classic sent campaigns mapping
+        name = camp.get('subject') or camp.get('name') or "Untitled Campaign"
+        sent_at = camp.get('date_sent') or camp.get('created_at')
+
+        # In classic, stats often nested in 'stats' dict or top level
+        stats = camp.get('stats', {})
+        if stats:
+            subs = stats.get('sent', 0)
+            open_r = stats.get('opened_rate', 0.0)
+            click_r = stats.get('clicked_rate', 0.0)
+        else:
+            subs = camp.get('total_recipients', 0)
+            # Fallback to direct rate fields
+            open_r = camp.get('opened_rate', 0.0) or camp.get('open_rate', 0.0)
+            click_r = camp.get('clicked_rate', 0.0) or camp.get('click_rate', 0.0)
+
+    campaign_id = camp.get('id')
+    if not campaign_id or not name or not subs or subs <= 0:
+        logger.warning(f"Skipped MailerLite campaign: id={campaign_id}, name={name}, subs={subs}")
+        return None
+
+    sent_at = _sent_at(sent_at)
+    return {
+        'provider_campaign_id': str(campaign_id),
+        'name': name,
+        'sent_at': sent_at,
+        'date': sent_at.date() if sent_at else timezone.now().date(),
+        'subscribers': subs,
+        'open_rate': open_r,
+        'click_rate': click_r,
+    }
+
+
+def _pages(client):
+    """Yield lists of raw campaigns, newest first, one API page at a time."""
+    page = 1
+    while True:
+        if client.is_new_api:
+            response = client.get(
+                f"{API_URL}/campaigns",
+                params={"filter[status]": "sent", "limit": PAGE_SIZE, "page": page},
+            )
+        else:
+            response = client.get(
+                f"{CLASSIC_API_URL}/campaigns/sent",
+                params={"limit": PAGE_SIZE, "offset": (page - 1) * PAGE_SIZE},
+            )
+        if response.status_code != 200:
+            raise ValueError(f"MailerLite campaigns page {page}: HTTP {response.status_code}")
+
+        data = response.json()
+        campaigns = data.get('data', []) if client.is_new_api else data
+        if campaigns:
+            yield campaigns
+
+        if client.is_new_api:
+            has_more = bool((data.get('links') or {}).get('next'))
+        else:
+            has_more = len(campaigns) == PAGE_SIZE
+        if not campaigns or not has_more:
+            return
+        page += 1
+
+
+def _adopt_legacy_rows(user, rows):
+    """
+    Campaigns imported before provider ids existed were matched by name; give
+    those rows their id so the upsert updates them instead of adding copies.
+    """
+    by_name = {row['name']: row['provider_campaign_id'] for row in rows}
+    legacy = list(CampaignAnalytic.objects.filter(
+        user=user, provider_campaign_id__isnull=True, name__in=by_name,
+    ))
+    for campaign in legacy:
+        campaign.provider_campaign_id = by_name[campaign.name]
+    if legacy:
+        CampaignAnalytic.objects.bulk_update(legacy, ['provider_campaign_id'])
+
+
+def import_campaigns(user, client, verification):
+    """
+    Import the user's new and recently sent campaigns through `client` and
+    advance verification.campaigns_synced_through. Returns the number of
+    campaigns written.
+    """
+    from core.services.dashboard_snapshot_service import mark_dashboard_stale
+
+    high_water = verification.campaigns_synced_through
+    cutoff = high_water - REFRESH_WINDOW if high_water else None
+    newest = high_water
+    imported = dated = undated = 0
+    adopted = False
+    # Only a first run (nothing imported yet, no mark) backfills every page
+    incremental = cutoff is not None or CampaignAnalytic.objects.filter(
+        user=user, provider_campaign_id__isnull=False,
+    ).exists()
+
+    for campaigns in _pages(client):
+        rows = [row for row in (_parse_campaign(camp, client.is_new_api) for camp in campaigns) if row]
+        # Duplicate ids within a page would make the upsert touch a row twice
+        rows = list({row['provider_campaign_id']: row for row in rows}.values())
+        undated_ids = [row['provider_campaign_id'] for row in rows if not row['sent_at']]
+        undated += len(undated_ids)
+        known = set()
+        if incremental and undated_ids:
+            known = set(CampaignAnalytic.objects.filter(
+                user=user, provider_campaign_id__in=undated_ids,
+            ).values_list('provider_campaign_id', flat=True))
+        if rows:
+            if not adopted:
+                # Legacy rows were only ever the newest five campaigns, all on the first page
+                _adopt_legacy_rows(user, rows)
+                adopted = True
+            CampaignAnalytic.objects.bulk_create(
+                [
+                    CampaignAnalytic(user=user, type='Recent', **{k: v for k, v in row.items() if k != 'sent_at'})
+                    for row in rows
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'provider_campaign_id'],
+                update_fields=UPDATE_FIELDS,
+            )
+            imported += len(rows)
+
+        sent_times = [row['sent_at'] for row in rows if row['sent_at']]
+        dated += len(sent_times)
+        if sent_times:
+            newest = max([newest, *sent_times]) if newest else max(sent_times)
+        if cutoff and sent_times and min(sent_times) < cutoff:
+            break
+        if incremental and not any(
+            (not cutoff or row['sent_at'] >= cutoff) if row['sent_at'] else row['provider_campaign_id'] not in known
+            for row in rows
+        ):
+            # Only old or already imported undated campaigns here; older pages hold nothing new
+            break
+
+    if newest != high_water:
+        verification.campaigns_synced_through = newest
+        verification.save(update_fields=['campaigns_synced_through'])
+    elif undated and not dated:
+        logger.warning(
+            f"MailerLite campaign high-water mark for user {user.pk} did not advance: "
+            f"{undated} campaigns had no send date"
+        )
+    if imported:
+        mark_dashboard_stale(user.pk, sections=('campaigns',))
+    logger.info(f"Imported {imported} MailerLite campaigns for user {user.pk}")
+    return imported
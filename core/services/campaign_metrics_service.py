@@ -0,0 +1,72 @@
+"""
+Campaign open/click rate metrics shared by the dashboard and analytics pages.
+
+AuthorDashboardView averaged "all sent", "last 30 days" and "previous 30 days"
+with an exists() and an aggregate() per window, and SubscriberAnalyticsView ran
+a separate ExtractMonth GROUP BY for its monthly trends. campaign_metrics()
+computes every window and all twelve calendar months in one conditional
+aggregation (Avg/Count with filter=Q(...)) over the user's CampaignAnalytic
+rows.
+
+Averages are returned unrounded and are None for windows without campaigns.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Avg, Count, Q
+
+from core.models import CampaignAnalytic
+
+PERIOD_DAYS = 30
+
+
+def _window(row, name):
+    return {
+        'open_rate': row[f'{name}_open'],
+        'click_rate': row[f'{name}_click'],
+        'count': row[f'{name}_count'],
+    }
+
+
+def campaign_metrics(user, today=None):
+    """
+    Return the user's campaign metrics:
+
+    - sent             campaigns dated before today
+    - current_period   the last PERIOD_DAYS days, excluding today
+    - previous_period  the PERIOD_DAYS days before that
+    - monthly          {month number: window} for calendar months (any year)
+                       that have campaigns
+
+    Each window is {'open_rate', 'click_rate', 'count'}.
+    """
+    user_id = getattr(user, 'pk', user)
+    today = today or date.today()
+    period_start = today - timedelta(days=PERIOD_DAYS)
+    previous_start = period_start - timedelta(days=PERIOD_DAYS)
+
+    windows = {
+        'sent': Q(date__lt=today),
+        'current_period': Q(date__gte=period_start, date__lt=today),
+        'previous_period': Q(date__gte=previous_start, date__lt=period_start),
+    }
+    windows.update({f'm{month}': Q(date__month=month) for month in range(1, 13)})
+
+    aggregates = {}
+    for name, condition in windows.items():
+        aggregates[f'{name}_open'] = Avg('open_rate', filter=condition)
+        aggregates[f'{name}_click'] = Avg('click_rate', filter=condition)
+        aggregates[f'{name}_count'] = Count('id', filter=condition)
+    row = CampaignAnalytic.objects.filter(user_id=user_id).aggregate(**aggregates)
+
+    monthly = {}
+    for month in range(1, 13):
+        window = _window(row, f'm{month}')
+        if window['count']:
+            monthly[month] = window
+
+    return {
+        'sent': _window(row, 'sent'),
+        'current_period': _window(row, 'current_period'),
+        'previous_period': _window(row, 'previous_period'),
+        'monthly': monthly,
+    }
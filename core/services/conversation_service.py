@@ -0,0 +1,140 @@
+"""
+Conversation summaries for the chat inbox.
+
+ConversationListView, ChatAuthorListView and MySwapPartnersView used to run a
+"last message" query, an unread count() and a latest-swap query for every
+partner. Each user pair now has one Conversation row, which record_message()
+updates with a single UPDATE in the same transaction that creates the
+ChatMessage. The inbox then reads everything from the
+(user_low|user_high, last_message_at) indexes. Responses that have always
+returned the whole last message join it through last_message_id; the
+SNIPPET_LENGTH snippet only backs the truncated previews.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from core.models import ChatMessage, Conversation, SwapRequest
+
+SNIPPET_LENGTH = 255
+
+
+def ordered_pair(user_a_id, user_b_id):
+    return (user_a_id, user_b_id) if user_a_id < user_b_id else (user_b_id, user_a_id)
+
+
+def _pair_filter(user_a_id, user_b_id):
+    low, high = ordered_pair(user_a_id, user_b_id)
+    return Conversation.objects.filter(user_low_id=low, user_high_id=high)
+
+
+def record_message(message):
+    """
+    Fold a newly created ChatMessage into its Conversation: move the last-message
+    pointer and bump the recipient's unread counter. Call inside the transaction
+    that created the message.
+    """
+    low, high = ordered_pair(message.sender_id, message.recipient_id)
+    unread_field = 'unread_low' if message.recipient_id == low else 'unread_high'
+    changes = {
+        'last_message_id': message.id,
+        'last_message_snippet': message.content[:SNIPPET_LENGTH],
+        'last_message_at': message.created_at,
+    }
+
+    with transaction.atomic():
+        updated = _pair_filter(low, high).update(**changes, **{unread_field: F(unread_field) + 1})
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                Conversation.objects.create(user_low_id=low, user_high_id=high, **changes, **{unread_field: 1})
+        except IntegrityError:
+            # Another writer created the row first
+            _pair_filter(low, high).update(**changes, **{unread_field: F(unread_field) + 1})
+
+
+def mark_read(reader_id, partner_id):
+    """Zero the reader's unread counter for their conversation with partner_id."""
+    low, _ = ordered_pair(reader_id, partner_id)
+    unread_field = 'unread_low' if reader_id == low else 'unread_high'
+    _pair_filter(reader_id, partner_id).update(**{unread_field: 0})
+
+
+def refresh_conversation(user_a_id, user_b_id):
+    """
+    Recompute one Conversation from ChatMessage. Used after a message is edited or
+    deleted, and for backfill. Deletes the row if the pair has no messages left.
+    """
+    low, high = ordered_pair(user_a_id, user_b_id)
+    messages = ChatMessage.objects.filter(
+        Q(sender_id=low, recipient_id=high) | Q(sender_id=high, recipient_id=low)
+    )
+    last = messages.order_by('-created_at', '-id').first()
+    if last is None:
+        _pair_filter(low, high).delete()
+        return None
+
+    conversation, _ = Conversation.objects.update_or_create(
+        user_low_id=low,
+        user_high_id=high,
+        defaults={
+            'last_message': last,
+            'last_message_snippet': last.content[:SNIPPET_LENGTH],
+            'last_message_at': last.created_at,
+            'unread_low': messages.filter(recipient_id=low, is_read=False).count(),
+            'unread_high': messages.filter(recipient_id=high, is_read=False).count(),
+        },
+    )
+    return conversation
+
+
+def rebuild_conversations():
+    """Recompute every Conversation from ChatMessage. Returns the number of pairs."""
+    pairs = {
+        ordered_pair(sender_id, recipient_id)
+        for sender_id, recipient_id in ChatMessage.objects.values_list('sender_id', 'recipient_id').distinct()
+    }
+    for low, high in pairs:
+        refresh_conversation(low, high)
+
+    orphaned = [
+        pk for pk, low, high in Conversation.objects.values_list('pk', 'user_low_id', 'user_high_id')
+        if (low, high) not in pairs
+    ]
+    Conversation.objects.filter(pk__in=orphaned).delete()
+    return len(pairs)
+
+
+def conversations_for(user, partner_ids=None, full_text=False):
+    """
+    Return {partner_id: Conversation} for `user`, optionally limited to partner_ids.
+    full_text joins the last ChatMessage for responses that show its whole body
+    (Conversation.last_message_text) rather than the snippet.
+    """
+    conversations = Conversation.objects.filter(Q(user_low=user) | Q(user_high=user))
+    if full_text:
+        conversations = conversations.select_related('last_message')
+    if partner_ids is not None:
+        partner_ids = list(partner_ids)
+        conversations = conversations.filter(Q(user_low_id__in=partner_ids) | Q(user_high_id__in=partner_ids))
+    return {c.partner_id(user.id): c for c in conversations}
+
+
+def latest_swap_statuses(user, partner_ids=None):
+    """
+    Return {partner_id: status} for the most recent non-rejected swap between
+    `user` and each partner, in one query.
+    """
+    swaps = SwapRequest.objects.filter(
+        Q(requester=user) | Q(slot__user=user)
+    ).exclude(status='rejected')
+    if partner_ids is not None:
+        partner_ids = list(partner_ids)
+        swaps = swaps.filter(Q(requester_id__in=partner_ids) | Q(slot__user_id__in=partner_ids))
+
+    statuses = {}
+    rows = swaps.order_by('-created_at').values_list('requester_id', 'slot__user_id', 'status')
+    for requester_id, owner_id, swap_status in rows:
+        partner_id = owner_id if requester_id == user.id else requester_id
+        statuses.setdefault(partner_id, swap_status)
+    return statuses
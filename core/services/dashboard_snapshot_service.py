@@ -0,0 +1,285 @@
+"""
+Per-user Author Dashboard snapshot with stale-while-revalidate refresh.
+
+AuthorDashboardView used to run around 15 queries on every load (stat counts,
+profile lookups, the swap event feed with a profile query per partner, five
+campaign queries). The parts that depend only on the user are now
+materialized into one cache key per section:
+
+- stats        book, slot and completed-swap counts
+- profile      reliability score, display name and photo
+- swap_events  the newest swaps, already worded for the activity feed
+- campaigns    the campaign analytics cards
+
+Each section also has a "fresh" flag that expires after
+DASHBOARD_SNAPSHOT_REFRESH_SECONDS. core.signals drops the flag, after commit,
+for the sections a Book, NewsletterSlot, SwapRequest, Profile or
+CampaignAnalytic write affects. A read serves whatever is cached and rebuilds
+only the stale sections in the background; a section that isn't cached at all
+is built inline. The calendar (it depends on the requested month) and the
+notification feed (see recent_activity_service) are still read live.
+
+Set DASHBOARD_SNAPSHOT_ASYNC = False to refresh inline after the read instead,
+e.g. in tests.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Q
+
+from core.models import Book, CampaignAnalytic, NewsletterSlot, Profile, SwapRequest
+from core.services.campaign_metrics_service import campaign_metrics
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ('stats', 'profile', 'swap_events', 'campaigns')
+SNAPSHOT_MAX_AGE = 24 * 60 * 60
+REFRESH_WORKERS = 2
+SWAP_EVENT_LIMIT = 6
+COMPLETED_SWAP_STATUSES = ['completed', 'verified', 'confirmed', 'scheduled']
+
+_CACHE_KEY = 'dashboard_snapshot:v1:{user_id}:{section}'
+_FRESH_KEY = 'dashboard_snapshot:v1:{user_id}:{section}:fresh'
+
+_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix='dashboard-snapshot')
+
+
+def _cache_key(user_id, section):
+    return _CACHE_KEY.format(user_id=user_id, section=section)
+
+
+def _fresh_key(user_id, section):
+    return _FRESH_KEY.format(user_id=user_id, section=section)
+
+
+def _refresh_interval():
+    return getattr(settings, 'DASHBOARD_SNAPSHOT_REFRESH_SECONDS', 300)
+
+
+# ─── Section builders ────────────────────────────────────────────────
+
+def _build_stats(user_id):
+    return {
+        'book': Book.objects.filter(user_id=user_id).count(),
+        'newsletter_slots': NewsletterSlot.objects.filter(user_id=user_id).count(),
+        'completed_swaps': SwapRequest.objects.filter(
+            Q(slot__user_id=user_id) | Q(requester_id=user_id),
+            status__in=COMPLETED_SWAP_STATUSES,
+        ).count(),
+    }
+
+
+def _build_profile(user_id):
+    from authentication.models import UserProfile
+    from django.contrib.auth import get_user_model
+
+    profile = Profile.objects.filter(user_id=user_id).first()
+    user_profile = UserProfile.objects.filter(user_id=user_id).first()
+
+    if profile and profile.name:
+        name = profile.name
+    elif user_profile and user_profile.pen_name:
+        name = user_profile.pen_name
+    else:
+        name = get_user_model().objects.values_list('username', flat=True).get(pk=user_id)
+
+    # Stored relative; the view makes it absolute for the current request
+    photo_url = None
+    if profile and profile.profile_picture:
+        photo_url = profile.profile_picture.url
+    elif user_profile and user_profile.profile_photo:
+        photo_url = user_profile.profile_photo.url
+
+    return {
+        'reliability': int(profile.send_reliability_percent) if profile and profile.send_reliability_percent else 0,
+        'name': name,
+        'photo_url': photo_url,
+    }
+
+
+_SWAP_EVENT_TITLES = {
+    'pending': "Swap request pending with {partner}",
+    'confirmed': "Completed swap with {partner}",
+    'sending': "Sending swap with {partner}",
+    'scheduled': "Scheduled swap with {partner}",
+    'completed': "Completed swap with {partner}",
+    'verified': "Verified swap with {partner}",
+    'rejected': "Swap request declined by {partner}",
+}
+
+
+def _build_swap_events(user_id):
+    swaps = SwapRequest.objects.filter(
+        Q(slot__user_id=user_id) | Q(requester_id=user_id)
+    ).select_related('requester', 'slot__user').prefetch_related(
+        Profile.objects.prefetch_primary('requester__profiles'),
+        Profile.objects.prefetch_primary('slot__user__profiles'),
+    ).order_by('-created_at')[:SWAP_EVENT_LIMIT]
+
+    events = []
+    for swap in swaps:
+        partner = swap.slot.user if swap.requester_id == user_id else swap.requester
+        partner_profile = Profile.objects.primary_for(partner)
+        partner_name = partner_profile.name if partner_profile else partner.username
+        title = _SWAP_EVENT_TITLES.get(swap.status, "Swap update with {partner}")
+        events.append({
+            "id": f"swap_{swap.id}",
+            "type": "swap_event",
+            "title": title.format(partner=partner_name),
+            "message": swap.message or "",
+            "badge": "SWAP",
+            "action_url": f"/dashboard/swaps/track/{swap.id}/",
+            "is_read": True,
+            "created_at": swap.created_at.isoformat(),
+        })
+    return events
+
+
+def _rounded_rates(window):
+    return round(window['open_rate'] or 0, 1), round(window['click_rate'] or 0, 1)
+
+
+def _build_campaigns(user_id):
+    from core.serializers import CampaignAnalyticSerializer
+
+    metrics = campaign_metrics(user_id)
+    # Only sent campaigns (date < today) count towards the averages
+    avg_open_rate, avg_click_rate = _rounded_rates(metrics['sent'])
+    current_avg_open, current_avg_click = _rounded_rates(metrics['current_period'])
+    prev_avg_open, prev_avg_click = _rounded_rates(metrics['previous_period'])
+
+    open_rate_change = round(current_avg_open - prev_avg_open, 1)
+    click_rate_change = round(current_avg_click - prev_avg_click, 1)
+    recent_campaigns = CampaignAnalytic.objects.filter(user_id=user_id).order_by('-date')[:5]
+
+    return {
+        "avg_open_rate": avg_open_rate,
+        "avg_click_rate": avg_click_rate,
+        "current_period": {
+            "open_rate": current_avg_open,
+            "click_rate": current_avg_click,
+        },
+        "previous_period": {
+            "open_rate": prev_avg_open,
+            "click_rate": prev_avg_click,
+        },
+        "open_rate_change": open_rate_change,
+        "click_rate_change": click_rate_change,
+        "improvement_label": f"+{open_rate_change}% improvement" if open_rate_change > 0 else f"{open_rate_change}% change",
+        "recent_campaigns": [dict(row) for row in CampaignAnalyticSerializer(recent_campaigns, many=True).data],
+    }
+
+
+_BUILDERS = {
+    'stats': _build_stats,
+    'profile': _build_profile,
+    'swap_events': _build_swap_events,
+    'campaigns': _build_campaigns,
+}
+
+
+# ─── Cache plumbing ──────────────────────────────────────────────────
+
+def _build_and_store(user_id, sections):
+    """
+    Build `sections` and cache them. Callers mark the sections fresh before
+    building, so a write that commits mid-build drops the flag again and the
+    next read refreshes once more.
+    """
+    built = {section: _BUILDERS[section](user_id) for section in sections}
+    try:
+        cache.set_many({_cache_key(user_id, section): data for section, data in built.items()}, SNAPSHOT_MAX_AGE)
+    except Exception as e:
+        logger.warning(f"Dashboard snapshot cache update failed: {e}")
+    return built
+
+
+def _refresh(user_id, sections):
+    try:
+        _build_and_store(user_id, sections)
+    except Exception as e:
+        logger.warning(f"Dashboard snapshot refresh for user {user_id} failed: {e}")
+        try:
+            cache.delete_many([_fresh_key(user_id, section) for section in sections])
+        except Exception:
+            pass
+
+
+def _refresh_in_background(user_id, sections):
+    try:
+        _refresh(user_id, sections)
+    finally:
+        connections.close_all()
+
+
+def _schedule_refresh(user_id, sections):
+    # cache.add is the claim: only the first reader to see a section stale
+    # schedules its rebuild.
+    claimed = [
+        section for section in sections
+        if cache.add(_fresh_key(user_id, section), True, _refresh_interval())
+    ]
+    if not claimed:
+        return
+    if getattr(settings, 'DASHBOARD_SNAPSHOT_ASYNC', True):
+        _executor.submit(_refresh_in_background, user_id, claimed)
+    else:
+        _refresh(user_id, claimed)
+
+
+def get_dashboard_snapshot(user):
+    """
+    Return {section: data} for every section in SECTIONS. Cached sections are
+    returned as they are, even when stale; stale ones are refreshed for the
+    next read.
+    """
+    user_id = getattr(user, 'pk', user)
+    keys = [_cache_key(user_id, section) for section in SECTIONS]
+    fresh_keys = [_fresh_key(user_id, section) for section in SECTIONS]
+    try:
+        cached = cache.get_many(keys + fresh_keys)
+    except Exception as e:
+        logger.warning(f"Dashboard snapshot cache unavailable: {e}")
+        return {section: _BUILDERS[section](user_id) for section in SECTIONS}
+
+    snapshot, missing, stale = {}, [], []
+    for section, key, fresh_key in zip(SECTIONS, keys, fresh_keys):
+        if key not in cached:
+            missing.append(section)
+            continue
+        snapshot[section] = cached[key]
+        if fresh_key not in cached:
+            stale.append(section)
+
+    if missing:
+        try:
+            cache.set_many({_fresh_key(user_id, section): True for section in missing}, _refresh_interval())
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot cache update failed: {e}")
+        snapshot.update(_build_and_store(user_id, missing))
+
+    if stale:
+        try:
+            _schedule_refresh(user_id, stale)
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot refresh could not be scheduled: {e}")
+
+    return snapshot
+
+
+def mark_dashboard_stale(*user_ids, sections=SECTIONS):
+    """Mark the given users' snapshot sections stale once the current transaction commits."""
+    keys = [_fresh_key(user_id, section) for user_id in set(user_ids) if user_id for section in sections]
+    if not keys:
+        return
+
+    def drop():
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot invalidation failed: {e}")
+
+    transaction.on_commit(drop)
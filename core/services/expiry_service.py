@@ -0,0 +1,185 @@
+"""
+Expiry engine for stale swap requests and wallet transactions.
+
+Read endpoints used to run these clean-ups on every GET, which took write locks
+(and called Stripe) inside the request. They now live here and are driven by the
+`expire_stale_records` management command on a schedule. Each sweep walks the
+rows in primary-key batches using the (status, created_at) indexes and writes
+one UPDATE plus one bulk notification INSERT per batch.
+"""
+import logging
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Notification, PaymentTransaction, SwapRequest, UserWallet
+from core.services.calendar_service import refresh_calendar_days
+from core.services.dashboard_snapshot_service import mark_dashboard_stale
+from core.services.notification_service import notify_many
+from core.services.partner_graph_service import invalidate_partners
+
+logger = logging.getLogger(__name__)
+
+SWAP_ACCEPTANCE_WINDOW = timedelta(days=7)
+CHECKOUT_EXPIRY = timedelta(minutes=30)
+DEFAULT_BATCH_SIZE = 500
+
+SWAP_EXPIRED_REASON = 'Auto-rejected: 7-day acceptance window expired.'
+
+
+def _batched_ids(queryset, batch_size):
+    """Yield lists of primary keys from `queryset` in ascending pk order."""
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def expire_pending_swaps(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reject pending swap requests older than the 7-day acceptance window and notify
+    both the requester and the slot owner. Returns the number of swaps expired.
+    """
+    now = now or timezone.now()
+    stale = SwapRequest.objects.filter(status='pending', created_at__lt=now - SWAP_ACCEPTANCE_WINDOW)
+
+    expired = 0
+    for ids in _batched_ids(stale, batch_size):
+        with transaction.atomic():
+            swaps = list(
+                SwapRequest.objects.filter(pk__in=ids, status='pending').select_related('slot')
+            )
+            if not swaps:
+                continue
+            SwapRequest.objects.filter(pk__in=[s.pk for s in swaps], status='pending').update(
+                status='rejected',
+                rejection_reason=SWAP_EXPIRED_REASON,
+                rejected_at=now,
+            )
+            notifications = []
+            for swap in swaps:
+                notifications.append(Notification(
+                    recipient_id=swap.requester_id,
+                    title="Swap Request Expired",
+                    badge="DEADLINE",
+                    message=f"Your swap request for the {swap.slot.send_date} slot expired after 7 days without a response.",
+                    action_url=f"/dashboard/swaps/{swap.id}/",
+                ))
+                notifications.append(Notification(
+                    recipient_id=swap.slot.user_id,
+                    title="Swap Request Expired",
+                    badge="DEADLINE",
+                    message=f"A swap request for your {swap.slot.send_date} slot expired after 7 days without a response.",
+                    action_url=f"/dashboard/swaps/{swap.id}/",
+                ))
+            notify_many(notifications)
+            refresh_calendar_days({(swap.slot.user_id, swap.slot.send_date) for swap in swaps})
+        # bulk update skips post_save, so drop the cached partner sets and
+        # dashboard sections and refresh the calendar rollup here
+        parties = {uid for swap in swaps for uid in (swap.requester_id, swap.slot.user_id)}
+        invalidate_partners(*parties)
+        mark_dashboard_stale(*parties, sections=('stats', 'swap_events'))
+        expired += len(swaps)
+
+    return expired
+
+
+def _complete_wallet_funding(tx):
+    """Complete a paid 'bonus' (add funds) transaction and credit the wallet."""
+    tx.status = 'completed'
+    tx.completed_at = timezone.now()
+    tx.save()
+
+    wallet, _ = UserWallet.objects.get_or_create(user_id=tx.sender_id)
+    wallet.add_balance(tx.amount)
+
+    Notification.objects.create(
+        recipient_id=tx.sender_id,
+        title="💵 Wallet Funded!",
+        badge="WALLET",
+        message=f"${tx.amount} has been added to your wallet. New balance: ${wallet.balance}",
+        action_url="/wallet"
+    )
+
+
+def reconcile_checkout_sessions(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Check pending wallet-funding Checkout Sessions against Stripe. Paid sessions
+    are completed; unpaid ones past the checkout window are cancelled. Returns
+    (completed, cancelled).
+    """
+    now = now or timezone.now()
+    stripe.api_key = settings.STRIPE_SECRET_KEY.strip()
+
+    pending = PaymentTransaction.objects.filter(
+        transaction_type='bonus',
+        status='pending',
+        stripe_payment_intent_id__startswith='cs_',
+    )
+
+    completed = cancelled = 0
+    for ids in _batched_ids(pending, batch_size):
+        for tx in PaymentTransaction.objects.filter(pk__in=ids, status='pending'):
+            is_stale = tx.created_at < now - CHECKOUT_EXPIRY
+            try:
+                session = stripe.checkout.Session.retrieve(tx.stripe_payment_intent_id)
+            except Exception as e:
+                # If we can't verify a stale session, cancel it; retry fresh ones next sweep
+                logger.warning(f"Could not verify checkout session for transaction {tx.id}: {e}")
+                session = None
+
+            if session is not None and session.payment_status == 'paid':
+                with transaction.atomic():
+                    _complete_wallet_funding(tx)
+                completed += 1
+            elif is_stale or (session is not None and session.status == 'expired'):
+                tx.status = 'cancelled'
+                tx.save(update_fields=['status', 'updated_at'])
+                cancelled += 1
+
+    return completed, cancelled
+
+
+def expire_stale_transactions(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Cancel pending wallet-funding and direct-payment checkout transactions that
+    were abandoned more than 30 minutes ago. Returns the number cancelled.
+    """
+    now = now or timezone.now()
+    stale = PaymentTransaction.objects.filter(
+        Q(transaction_type='bonus') |
+        Q(transaction_type='direct_payment', stripe_payment_intent_id__startswith='cs_'),
+        status='pending',
+        created_at__lt=now - CHECKOUT_EXPIRY,
+    )
+
+    cancelled = 0
+    for ids in _batched_ids(stale, batch_size):
+        cancelled += PaymentTransaction.objects.filter(pk__in=ids, status='pending').update(
+            status='cancelled',
+            updated_at=now,
+        )
+    return cancelled
+
+
+def run_sweep(batch_size=DEFAULT_BATCH_SIZE, check_stripe=True):
+    """Run every expiry job once and return a summary dict."""
+    now = timezone.now()
+    summary = {'swaps_expired': expire_pending_swaps(now=now, batch_size=batch_size)}
+
+    if check_stripe and settings.STRIPE_SECRET_KEY:
+        completed, cancelled = reconcile_checkout_sessions(now=now, batch_size=batch_size)
+        summary['checkouts_completed'] = completed
+        summary['checkouts_cancelled'] = cancelled
+
+    summary['transactions_cancelled'] = expire_stale_transactions(now=now, batch_size=batch_size)
+    return summary
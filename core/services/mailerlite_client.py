@@ -0,0 +1,256 @@
+"""
+HTTP client for the MailerLite APIs (new "connect" API and Classic v2).
+
+Every call in mailerlite_service used to be a bare requests.get/post/delete,
+paying a fresh TCP + TLS handshake, with no retries and nothing stopping a
+broken account from being hammered. MailerLiteClient is the one way the
+service talks to MailerLite:
+
+- one keep-alive connection pool per process, shared by all clients;
+- a token bucket per API key (MAILERLITE_RATE_LIMIT_PER_MINUTE);
+- up to MAX_RETRIES retries with jittered exponential backoff on 429/5xx and
+  connection errors, honouring Retry-After;
+- a circuit breaker per API key: after BREAKER_THRESHOLD consecutive failures
+  calls fail fast with CircuitOpenError for BREAKER_RESET seconds, then one
+  trial request decides whether it closes again;
+- per-process timing metrics (request_metrics()), and a warning for slow calls.
+
+CircuitOpenError subclasses requests.RequestException, so callers' existing
+error handling covers it.
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://connect.mailerlite.com/api"
+CLASSIC_API_URL = "https://api.mailerlite.com/api/v2"
+
+DEFAULT_TIMEOUT = 10
+POOL_SIZE = 16
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+MAX_RETRY_AFTER = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 60
+SLOW_REQUEST_SECONDS = 3
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling MailerLite while an API key's breaker is open."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills `rate` tokens per second up to `capacity`.
+    acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed."""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, reset_after=BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_after or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class _Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.seconds = 0.0
+
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'seconds': round(self.seconds, 3),
+            }
+
+
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE))
+
+_metrics = _Metrics()
+_buckets = {}
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def _per_key(registry, api_key, factory):
+    with _registry_lock:
+        item = registry.get(api_key)
+        if item is None:
+            item = registry[api_key] = factory()
+        return item
+
+
+def _new_bucket():
+    per_minute = getattr(settings, 'MAILERLITE_RATE_LIMIT_PER_MINUTE', 120)
+    return TokenBucket(rate=per_minute / 60, capacity=per_minute)
+
+
+def request_metrics():
+    """Process-wide counters: requests sent, retries, failures, fail-fast rejections, seconds spent."""
+    return _metrics.snapshot()
+
+
+def is_new_api_key(api_key):
+    # New tokens start with "mlsn." OR are JWT tokens (eyJ)
+    return api_key.startswith("mlsn.") or api_key.startswith("eyJ")
+
+
+class MailerLiteClient:
+    """Client bound to one API key. Cheap to create; all state is shared per key."""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.is_new_api = is_new_api_key(api_key)
+        if self.is_new_api:
+            self.headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Authorization": f"Bearer {api_key}",
+            }
+        else:
+            self.headers = {
+                "Content-Type": "application/json",
+                "X-MailerLite-ApiKey": api_key,
+            }
+        self._bucket = _per_key(_buckets, api_key, _new_bucket)
+        self._breaker = _per_key(_breakers, api_key, CircuitBreaker)
+
+    @classmethod
+    def default(cls):
+        """Client for the platform's own (master) account, or None when it isn't configured."""
+        api_key = getattr(settings, 'MAILERLITE_API_KEY', None)
+        return cls(api_key) if api_key else None
+
+    def _backoff(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), MAX_RETRY_AFTER)
+        return BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def request(self, method, url, retries=MAX_RETRIES, **kwargs):
+        """
+        Send a request, retrying 429/5xx and connection errors up to `retries`
+        times. Returns the last response (which may still be an error status)
+        or raises the last exception, or CircuitOpenError without calling
+        MailerLite.
+        """
+        if not self._breaker.allow():
+            _metrics.add(rejected=1)
+            raise CircuitOpenError(f"MailerLite circuit open for key ...{self.api_key[-4:]}")
+
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        kwargs['headers'] = {**self.headers, **kwargs.get('headers', {})}
+
+        for attempt in range(retries + 1):
+            self._bucket.acquire()
+            started = time.monotonic()
+            response = error = None
+            try:
+                response = _session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except Exception:
+                # Not worth retrying, but the breaker must still hear about it:
+                # a half-open trial that never reports would keep it open for good
+                _metrics.add(requests=1, failures=1, seconds=time.monotonic() - started)
+                self._breaker.record_failure()
+                raise
+            elapsed = time.monotonic() - started
+            _metrics.add(requests=1, seconds=elapsed)
+            if elapsed > SLOW_REQUEST_SECONDS:
+                logger.warning(f"Slow MailerLite call: {method} {url} took {elapsed:.1f}s")
+
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if not retryable:
+                self._breaker.record_success()
+                return response
+            if attempt < retries:
+                _metrics.add(retries=1)
+                time.sleep(self._backoff(attempt, response))
+
+        _metrics.add(failures=1)
+        self._breaker.record_failure()
+        if error is not None:
+            raise error
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
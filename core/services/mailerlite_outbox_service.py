@@ -0,0 +1,222 @@
+"""
+Outbox for MailerLite swap group moves in the platform's master account.
+
+The swap views used to call MailerLite inline: accepting a swap added the
+requester to the Approved group and removed them from Pending, two blocking
+calls inside the request, so a MailerLite slowdown stalled swap acceptance.
+The views now call enqueue_group_move(), which writes a MailerLiteGroupChange
+row in the swap's own transaction; nothing is lost if the process dies
+between the commit and the MailerLite call.
+
+drain_outbox() sends the rows:
+
+- rows are replayed per email in write order, because the groups are not
+  mutually exclusive (a 'pending' move only adds, so an author can be in
+  Approved and Pending at once); only back-to-back repeats of the same
+  target collapse into one move;
+- the moves go out through MailerLite's batch endpoint, BATCH_SIZE requests
+  per call;
+- every move is a "make it so" (add to the target group, leave Pending), so
+  retrying a batch after a partial failure is harmless; a 404 on the
+  Pending removal means the subscriber already left it;
+- rows that fail are retried on the next drain, up to MAX_ATTEMPTS; rows
+  that use them all up are dead letters, reported by the command and purged
+  with the sent rows.
+
+A drain is kicked on the worker thread after each commit that enqueued a
+move; `manage.py drain_mailerlite_outbox` retries failures and purges sent
+rows from cron. Set MAILERLITE_OUTBOX_ASYNC = False to drain inline instead,
+e.g. in tests.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import MailerLiteGroupChange
+from core.services.mailerlite_client import API_URL, MailerLiteClient
+
+logger = logging.getLogger(__name__)
+
+# MailerLite accepts at most 50 requests per batch call
+BATCH_SIZE = 50
+DRAIN_CHUNK = 500
+MAX_ATTEMPTS = 8
+SENT_RETENTION = timedelta(days=7)
+
+# Held while a drain runs so two workers never send the same rows
+DRAIN_LOCK_TTL = 5 * 60
+_DRAIN_LOCK_KEY = 'mailerlite_outbox:v1:drain'
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mailerlite-outbox')
+
+
+def _group_id(name: str) -> str:
+    key = f"MAILERLITE_{name.upper()}_GROUP_ID"
+    return getattr(settings, key, '')
+
+
+def _master_client():
+    """The master account's client; group management uses the new API only."""
+    client = MailerLiteClient.default()
+    return client if client and client.is_new_api else None
+
+
+def enqueue_group_move(email, target):
+    """
+    Record that `email` should move to the `target` swap group ('pending',
+    'approved' or 'rejected'). Call it inside the transaction that changes the
+    swap; the move is sent after that transaction commits.
+    """
+    if not email:
+        return None
+    change = MailerLiteGroupChange.objects.create(email=email, target=target)
+    transaction.on_commit(_kick)
+    return change
+
+
+def _kick():
+    if getattr(settings, 'MAILERLITE_OUTBOX_ASYNC', True):
+        _executor.submit(_drain_in_background)
+    else:
+        drain_outbox()
+
+
+def _drain_in_background():
+    try:
+        drain_outbox()
+    except Exception as e:
+        logger.warning(f"MailerLite outbox drain failed: {e}")
+    finally:
+        connections.close_all()
+
+
+def _operations(email, target):
+    """The batch requests that put `email` in `target`'s group and out of Pending."""
+    operations = []
+    target_id = _group_id(target)
+    if target_id:
+        operations.append({"method": "POST", "path": f"api/groups/{target_id}/subscribers", "body": {"email": email}})
+    pending_id = _group_id('pending')
+    if target != 'pending' and pending_id:
+        operations.append({"method": "DELETE", "path": f"api/groups/{pending_id}/subscribers/{email}"})
+    return operations
+
+
+def _succeeded(operation, code):
+    return code < 300 or (operation["method"] == "DELETE" and code == 404)
+
+
+def _send(client, operations):
+    """Send (email, operation) pairs in batches. Returns {email: error} for the failures."""
+    errors = {}
+    for start in range(0, len(operations), BATCH_SIZE):
+        chunk = operations[start:start + BATCH_SIZE]
+        try:
+            response = client.post(f"{API_URL}/batch", json={"requests": [operation for _, operation in chunk]})
+            if response.status_code >= 300:
+                raise ValueError(f"HTTP {response.status_code}: {response.text[:200]}")
+            results = response.json().get('responses', [])
+        except Exception as e:
+            for email, _ in chunk:
+                errors[email] = str(e)
+            continue
+
+        for index, (email, operation) in enumerate(chunk):
+            code = results[index].get('code', 500) if index < len(results) else 500
+            if not _succeeded(operation, code):
+                errors[email] = f"{operation['method']} {operation['path']}: HTTP {code}"
+    return errors
+
+
+def _moves(rows):
+    """(email, target) moves in id order, dropping repeats of an email's previous target."""
+    moves = []
+    previous = {}
+    for row in rows:
+        if previous.get(row.email) != row.target:
+            moves.append((row.email, row.target))
+            previous[row.email] = row.target
+    return moves
+
+
+def _drain_chunk(client, rows):
+    errors = {}
+    if client is not None:
+        operations = [
+            (email, operation)
+            for email, target in _moves(rows)
+            for operation in _operations(email, target)
+        ]
+        errors = _send(client, operations)
+
+    now = timezone.now()
+    sent_ids = [row.id for row in rows if row.email not in errors]
+    MailerLiteGroupChange.objects.filter(id__in=sent_ids).update(processed_at=now, last_error='')
+    for row in rows:
+        if row.email in errors:
+            row.attempts += 1
+            row.last_error = errors[row.email]
+    MailerLiteGroupChange.objects.bulk_update(
+        [row for row in rows if row.email in errors], ['attempts', 'last_error']
+    )
+    return len(sent_ids), len(rows) - len(sent_ids)
+
+
+def drain_outbox():
+    """
+    Send every unsent group move that still has attempts left. Returns
+    (sent, failed) row counts; (0, 0) when another drain holds the lock.
+    """
+    try:
+        if not cache.add(_DRAIN_LOCK_KEY, True, DRAIN_LOCK_TTL):
+            return 0, 0
+    except Exception as e:
+        logger.warning(f"MailerLite outbox lock unavailable: {e}")
+
+    # Without a master account or group ids there is nothing to send; the
+    # rows are marked sent, as the inline calls used to return silently.
+    client = _master_client()
+    sent = failed = 0
+    last_id = 0
+    try:
+        while True:
+            rows = list(
+                MailerLiteGroupChange.objects.filter(
+                    processed_at__isnull=True, attempts__lt=MAX_ATTEMPTS, id__gt=last_id,
+                ).order_by('id')[:DRAIN_CHUNK]
+            )
+            if not rows:
+                return sent, failed
+            chunk_sent, chunk_failed = _drain_chunk(client, rows)
+            sent += chunk_sent
+            failed += chunk_failed
+            last_id = rows[-1].id
+    finally:
+        try:
+            cache.delete(_DRAIN_LOCK_KEY)
+        except Exception:
+            pass
+
+
+def dead_letters():
+    """Unsent group moves that used up MAX_ATTEMPTS; no drain picks them up again."""
+    return MailerLiteGroupChange.objects.filter(processed_at__isnull=True, attempts__gte=MAX_ATTEMPTS)
+
+
+def purge_sent(now=None):
+    """
+    Delete group moves sent, and dead letters written, more than
+    SENT_RETENTION ago. Returns rows deleted.
+    """
+    cutoff = (now or timezone.now()) - SENT_RETENTION
+    deleted, _ = MailerLiteGroupChange.objects.filter(
+        Q(processed_at__lt=cutoff)
+        | Q(processed_at__isnull=True, attempts__gte=MAX_ATTEMPTS, created_at__lt=cutoff)
+    ).delete()
+    return deleted
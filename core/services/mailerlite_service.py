@@ -1,48 +1,73 @@
+import hashlib
 import logging
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
-logger = logging.getLogger(__name__)
+from core.services.campaign_import_service import import_campaigns
+from core.services.mailerlite_client import API_URL, CLASSIC_API_URL, MailerLiteClient
 
-# Base URL for the new MailerLite API
-API_URL = "https://connect.mailerlite.com/api"
+logger = logging.getLogger(__name__)
 
+# get_subscriber_counts_by_status: parallel requests, their shared deadline (which
+# also bounds how long each request may hold a worker) and how long a result is
+# reused for the same API key
+STATUS_FETCH_WORKERS = 12
+STATUS_COUNTS_DEADLINE = 10
+STATUS_COUNTS_CACHE_TTL = 60
+_COUNTS_CACHE_KEY = 'mailerlite_counts:v1:{key}'
 
-def _get_headers(api_key=None):
-    """
-    Returns headers and API version info.
-    """
-    if not api_key:
-        api_key = getattr(settings, 'MAILERLITE_API_KEY', None)
-    
-    if not api_key:
-        return {}, False
-        
-    is_new = api_key.startswith("mlsn.") or api_key.startswith("eyJ")
-    if is_new:
-        return {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }, True
-    else:
-        return {
-            "Content-Type": "application/json",
-            "X-MailerLite-ApiKey": api_key
-        }, False
+_count_pool = ThreadPoolExecutor(max_workers=STATUS_FETCH_WORKERS, thread_name_prefix='mailerlite-counts')
 
 
 # ---------------------------------------------------------------------------
 # A.  Audience Size Sync
 # ---------------------------------------------------------------------------
 
+def _fetch_total(client, url, params, deadline):
+    """
+    One limit=0 subscribers request; returns its total, or None on failure.
+    `deadline` is a time.monotonic() value: the request gets only the time left
+    before it and is not retried, and a job still queued past it is dropped,
+    so no worker stays busy after the caller has given up.
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        logger.error(f"[DIAGNOSTIC] Skipped {params}: deadline passed while queued")
+        return None
+    try:
+        response = client.get(url, params=params, timeout=remaining, retries=0)
+        if response.status_code != 200:
+            logger.error(f"[DIAGNOSTIC] Failed to fetch {params}: HTTP {response.status_code} - {response.text}")
+            return None
+        data = response.json()
+        # limit=0 returns {"total": N} at top level
+        count = data.get('total', 0)
+        # Fallback: check meta.total (older API versions)
+        if count == 0:
+            count = data.get('meta', {}).get('total', 0)
+        logger.info(f"[DIAGNOSTIC] {params}: {count} subscribers")
+        return count
+    except Exception as e:
+        logger.error(f"[DIAGNOSTIC] Exception fetching {params}: {e}")
+        return None
+
+
+def _counts_cache_key(api_key):
+    return _COUNTS_CACHE_KEY.format(key=hashlib.sha256(api_key.encode()).hexdigest()[:32])
+
+
 def get_subscriber_counts_by_status(api_key: str = None) -> dict:
     """
     Fetches subscriber counts by status from MailerLite API.
     Returns a dict with counts for: active, unsubscribed, unconfirmed, bounced, junk
     
     MailerLite statuses: active, unsubscribed, unconfirmed, bounced, junk
+
+    Results are cached per API key for STATUS_COUNTS_CACHE_TTL seconds.
     """
     if not api_key:
         api_key = getattr(settings, 'MAILERLITE_API_KEY', None)
@@ -51,8 +76,27 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
         logger.warning("No API key provided for get_subscriber_counts_by_status")
         return {}
 
-    # New tokens start with "mlsn." OR are JWT tokens (eyJ)
-    is_new_api = api_key.startswith("mlsn.") or api_key.startswith("eyJ")
+    key = _counts_cache_key(api_key)
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"MailerLite counts cache unavailable: {e}")
+        cached = key = None
+    if cached is not None:
+        return cached
+
+    counts = _fetch_subscriber_counts(api_key)
+    if counts and key:
+        try:
+            cache.set(key, counts, STATUS_COUNTS_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"MailerLite counts cache unavailable: {e}")
+    return counts
+
+
+def _fetch_subscriber_counts(api_key):
+    client = MailerLiteClient(api_key)
+    is_new_api = client.is_new_api
     logger.info(f"[DIAGNOSTIC] API key format check: is_new_api={is_new_api}, key prefix: {api_key[:15]}...")
     
     # Status mapping: internal name -> MailerLite status name
@@ -62,54 +106,31 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
     try:
         if is_new_api:
             url = f"{API_URL}/subscribers"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
             
             # New MailerLite API: limit=0 returns {"total": N} at the top level
             # This is the reliable way to get counts (meta.total does NOT exist in cursor pagination)
-            for status in statuses:
-                try:
-                    response = requests.get(
-                        url, 
-                        headers=headers, 
-                        params={"limit": 0, "filter[status]": status}, 
-                        timeout=10
-                    )
-                    if response.status_code == 200:
-                        data = response.json()
-                        logger.info(f"[DIAGNOSTIC] Raw response for {status}: {data}")
-                        # limit=0 returns {"total": N} at top level
-                        count = data.get('total', 0)
-                        
-                        # Fallback: check meta.total (older API versions)
-                        if count == 0:
-                            count = data.get('meta', {}).get('total', 0)
-                            
-                        counts[status] = count
-                        logger.info(f"[DIAGNOSTIC] Status '{status}': {count} subscribers")
-                    else:
-                        logger.error(f"[DIAGNOSTIC] Failed to fetch {status}: HTTP {response.status_code} - {response.text}")
-                        counts[status] = 0
-                except Exception as inner_e:
-                    logger.error(f"[DIAGNOSTIC] Exception fetching {status}: {inner_e}")
-                    counts[status] = 0
-            
-            # Fetch overall total (all statuses combined)
-            try:
-                base_resp = requests.get(url, headers=headers, params={"limit": 0}, timeout=10)
-                if base_resp.status_code == 200:
-                    base_data = base_resp.json()
-                    base_total = base_data.get('total', 0)
-                    # Fallback to meta.total for older API versions
-                    if base_total == 0:
-                        base_total = base_data.get('meta', {}).get('total', 0)
-                    counts['dashboard_total'] = base_total
-                    logger.info(f"[DIAGNOSTIC] Base subscribers total (limit=0): {base_total}")
-            except Exception as e:
-                logger.error(f"[DIAGNOSTIC] Base total fetch failed: {e}")
+            # The five status counts and the overall total are requested at
+            # once and share one deadline, so a slow API costs one round trip.
+            queries = {status: {"limit": 0, "filter[status]": status} for status in statuses}
+            queries['dashboard_total'] = {"limit": 0}
+            deadline = time.monotonic() + STATUS_COUNTS_DEADLINE
+            futures = {
+                name: _count_pool.submit(_fetch_total, client, url, params, deadline)
+                for name, params in queries.items()
+            }
+            done, _ = wait(futures.values(), timeout=STATUS_COUNTS_DEADLINE)
+            for name, future in futures.items():
+                if future not in done:
+                    future.cancel()
+                    logger.error(f"[DIAGNOSTIC] Timed out fetching {name} after {STATUS_COUNTS_DEADLINE}s")
+                count = future.result() if future in done else None
+                if count is not None:
+                    counts[name] = count
+                elif name in statuses:
+                    counts[name] = 0
+            if not any(future in done and future.result() is not None for future in futures.values()):
+                # Nothing came back; let the caller keep its existing values
+                return {}
             
             # If dashboard_total is still 0, sum up individual status counts
             if counts.get('dashboard_total', 0) == 0:
@@ -122,15 +143,11 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
             logger.warning(f"[DIAGNOSTIC] Classic API detected (key doesn't start with 'mlsn.'). Using V2 subscribers endpoint. Key prefix: {api_key[:10]}...")
             try:
                 # Classic API uses different base URL and header
-                url = "https://api.mailerlite.com/api/v2/subscribers"
-                headers = {
-                    "Content-Type": "application/json",
-                    "X-MailerLite-ApiKey": api_key
-                }
+                url = f"{CLASSIC_API_URL}/subscribers"
                 
                 # For Classic API, we need to fetch with a high limit to get total
                 # Try with limit=0 first to see if we get meta data, otherwise use high limit
-                response = requests.get(url, headers=headers, params={"limit": 0}, timeout=10)
+                response = client.get(url, params={"limit": 0}, timeout=10)
                 if response.status_code == 200:
                     data = response.json()
                     # Check if response has meta/total
@@ -146,7 +163,7 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
                     logger.warning(f"[DIAGNOSTIC] Classic API limit=0 failed: {response.status_code}")
                 
                 # Use stats endpoint for all main counts
-                stats_resp = requests.get("https://api.mailerlite.com/api/v2/stats", headers=headers, timeout=10)
+                stats_resp = client.get(f"{CLASSIC_API_URL}/stats", timeout=10)
                 if stats_resp.status_code == 200:
                     stats_data = stats_resp.json()
                     logger.info(f"[DIAGNOSTIC] Classic API raw stats FULL: {stats_data}")
@@ -204,7 +221,7 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
                 # Fetch Groups for Classic to find the "Big Number" (e.g. 7,240)
                 try:
                     # In V2, groups often contain the most accurate 'active + unconfirmed' count as seen on dashboard
-                    groups_resp = requests.get("https://api.mailerlite.com/api/v2/groups", headers=headers, timeout=10)
+                    groups_resp = client.get(f"{CLASSIC_API_URL}/groups", timeout=10)
                     if groups_resp.status_code == 200:
                         groups_data = groups_resp.json()
                         logger.info(f"[DIAGNOSTIC] Classic API Groups count: {len(groups_data) if isinstance(groups_data, list) else 'N/A'}")
@@ -232,7 +249,7 @@ def get_subscriber_counts_by_status(api_key: str = None) -> dict:
                 if counts['active'] == 0:
                     logger.info(f"[DIAGNOSTIC] Trying high limit fetch for Classic API...")
                     # Try with type=active filter
-                    high_limit_resp = requests.get(url, headers=headers, params={"limit": 5000, "type": "active"}, timeout=15)
+                    high_limit_resp = client.get(url, params={"limit": 5000, "type": "active"}, timeout=15)
                     if high_limit_resp.status_code == 200:
                         data = high_limit_resp.json()
                         # X-Total-Count header is usually the best source for Classic API
@@ -277,21 +294,15 @@ def get_audience_size(email: str = None, api_key: str = None) -> int:
     if not api_key:
         return 0
 
-    # New tokens start with "mlsn." OR are JWT tokens (eyJ)
-    is_new_api = api_key.startswith("mlsn.") or api_key.startswith("eyJ")
+    client = MailerLiteClient(api_key)
     
     try:
-        if is_new_api:
+        if client.is_new_api:
             # --- New MailerLite API ---
             url = f"{API_URL}/subscribers"
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
             # New MailerLite API: limit=0 returns {"total": N} at the top level
             # meta.total does NOT exist in their cursor-based pagination
-            response = requests.get(url, headers=headers, params={"limit": 0}, timeout=10)
+            response = client.get(url, params={"limit": 0}, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 total = data.get('total', 0)
@@ -303,12 +314,8 @@ def get_audience_size(email: str = None, api_key: str = None) -> int:
             logger.warning(f"New MailerLite API failed ({response.status_code}): {response.text}")
         else:
             # --- Classic MailerLite API ---
-            url = "https://api.mailerlite.com/api/v2/stats"
-            headers = {
-                "Content-Type": "application/json",
-                "X-MailerLite-ApiKey": api_key
-            }
-            response = requests.get(url, headers=headers, timeout=10)
+            url = f"{CLASSIC_API_URL}/stats"
+            response = client.get(url, timeout=10)
             if response.status_code == 200:
                 data = response.json()
                 # Classic stats returns 'subscribed' count
@@ -359,7 +366,7 @@ def sync_subscriber_analytics(user):
     """
     Fetches real-time analytics from MailerLite for a specific user.
     """
-    from core.models import SubscriberVerification, CampaignAnalytic
+    from core.models import SubscriberVerification, CampaignAnalytic, Profile
     from django.utils import timezone
     from django.conf import settings
     import random
@@ -374,16 +381,16 @@ def sync_subscriber_analytics(user):
     else:
         logger.info(f"[DIAGNOSTIC] Using API key from user verification for user {user.username}")
     
-    headers, is_new_api = _get_headers(api_key)
+    client = MailerLiteClient(api_key) if api_key else None
     
-    # If we have headers but the flag is False, it means the user added the key manually in Admin.
+    # If we have a key but the flag is False, it means the user added the key manually in Admin.
     # We should trust the key and set the connected flag to True.
-    if headers and not verification.is_connected_mailerlite:
+    if client and not verification.is_connected_mailerlite:
         verification.is_connected_mailerlite = True
         verification.save(update_fields=['is_connected_mailerlite'])
         logger.info(f"[DIAGNOSTIC] Auto-activated MailerLite connection for user {user.username} (key found)")
 
-    if not headers:
+    if client is None:
         # Simulation if no API key is available at all
         verification.avg_open_rate = round(max(30, min(60, verification.avg_open_rate + random.uniform(-0.5, 0.5))), 1)
         verification.avg_click_rate = round(max(5, min(15, verification.avg_click_rate + random.uniform(-0.1, 0.1))), 1)
@@ -391,7 +398,7 @@ def sync_subscriber_analytics(user):
         verification.save()
         
         # Sync to Profile for Discovery
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if profile:
             profile.avg_open_rate = verification.avg_open_rate
             profile.avg_click_rate = verification.avg_click_rate
@@ -399,89 +406,18 @@ def sync_subscriber_analytics(user):
         
         return verification
 
+    is_new_api = client.is_new_api
     try:
         # 1. Sync Audience
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if profile:
             sync_profile_audience(profile, api_key=api_key)
         
-        # 2. Fetch Campaigns
-        campaign_url = f"{API_URL}/campaigns" if is_new_api else "https://api.mailerlite.com/api/v2/campaigns/sent"
-        params = {"limit": 5}
-        
-        campaigns_resp = requests.get(campaign_url, headers=headers, params=params, timeout=10)
-        logger.info(f"[DIAGNOSTIC] Campaigns fetch: HTTP {campaigns_resp.status_code} for {campaign_url}")
-        if campaigns_resp.status_code == 200:
-            data = campaigns_resp.json()
-            campaigns_list = data.get('data', []) if is_new_api else data
-            logger.info(f"[DIAGNOSTIC] Found {len(campaigns_list)} campaigns")
-            
-            for camp in campaigns_list:
-                try:
-                    logger.info(f"[DIAGNOSTIC] Processing campaign: {camp}")
-                    
-                    if is_new_api:
-                        name = camp.get('subject') or camp.get('name')
-                        date_str = camp.get('sent_at') or camp.get('created_at') or camp.get('send_time')
-                        subs = camp.get('total_recipients', 0) or camp.get('recipients_count', 0) or camp.get('emails_sent', 0)
-                        open_r = camp.get('open_rate_percent', 0.0) or camp.get('open_rate', 0.0) or camp.get('opens_count', 0)
-                        click_r = camp.get('click_rate_percent', 0.0) or camp.get('click_rate', 0.0) or camp.get('clicks_count', 0)
-                    else:
-                        # Classic sent campaigns mapping
-                        name = camp.get('subject') or camp.get('name') or "Untitled Campaign"
-                        date_str = camp.get('date_sent') or camp.get('created_at')
-                        
-                        # In classic, stats often nested in 'stats' dict or top level
-                        stats = camp.get('stats', {})
-                        if stats:
-                            subs = stats.get('sent', 0)
-                            open_r = stats.get('opened_rate', 0.0)
-                            click_r = stats.get('clicked_rate', 0.0)
-                        else:
-                            subs = camp.get('total_recipients', 0)
-                            # Fallback to direct rate fields
-                            open_r = camp.get('opened_rate', 0.0) or camp.get('open_rate', 0.0)
-                            click_r = camp.get('clicked_rate', 0.0) or camp.get('click_rate', 0.0)
-                    
-                    logger.info(f"[DIAGNOSTIC] Parsed: name={name}, subs={subs}, open_r={open_r}, click_r={click_r}")
-                    
-                    # Parse date string properly
-                    date_val = timezone.now().date()
-                    if date_str:
-                        try:
-                            if isinstance(date_str, str):
-                                from datetime import datetime
-                                # Try multiple date formats
-                                for fmt in ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%d %H:%M:%S"]:
-                                    try:
-                                        date_val = datetime.strptime(date_str[:10], "%Y-%m-%d").date()
-                                        break
-                                    except:
-                                        continue
-                            else:
-                                date_val = date_str
-                        except Exception as date_e:
-                            logger.error(f"[DIAGNOSTIC] Date parsing error: {date_e}")
-                    
-                    # Ensure we have valid data
-                    if name and subs > 0:
-                        CampaignAnalytic.objects.update_or_create(
-                            user=user,
-                            name=name,
-                            defaults={
-                                'date': date_val,
-                                'subscribers': subs,
-                                'open_rate': open_r,
-                                'click_rate': click_r,
-                                'type': 'Recent'
-                            }
-                        )
-                        logger.info(f"[DIAGNOSTIC] ✅ Saved campaign: {name} ({subs} subscribers, {open_r}% open)")
-                    else:
-                        logger.warning(f"[DIAGNOSTIC] ❌ Skipped campaign: name={name}, subs={subs}")
-                    
-                except Exception as camp_e:
-                    logger.error(f"[DIAGNOSTIC] Error processing campaign {camp.get('id')}: {camp_e}")
+        # 2. Import new and recently sent campaigns
+        try:
+            import_campaigns(user, client, verification)
+        except Exception as e:
+            logger.error(f"MailerLite campaign import failed for user {user.username}: {e}")
 
         # 3. Fetch Subscriber Status Breakdown
         logger.info(f"Fetching status counts for user {user.username}, is_new={is_new_api}")
@@ -538,7 +474,7 @@ def sync_subscriber_analytics(user):
                 verification.list_health_score = health_score
                 
                 # Sync to Profile for Discovery
-                profile = user.profiles.first()
+                profile = Profile.objects.primary_for(user)
                 if profile:
                     profile.avg_open_rate = verification.avg_open_rate
                     profile.avg_click_rate = verification.avg_click_rate
@@ -576,76 +512,3 @@ def sync_subscriber_analytics(user):
     
     return verification
 
-
-# ---------------------------------------------------------------------------
-# B.  Group Management  (Pending / Approved / Rejected)
-# ---------------------------------------------------------------------------
-
-def _group_id(name: str) -> str:
-    key = f"MAILERLITE_{name.upper()}_GROUP_ID"
-    return getattr(settings, key, '')
-
-
-def send_swap_request_notification(author_email: str):
-    """
-    Adds the author to the "Pending Swaps" group in the MASTER account.
-    """
-    headers = _get_headers() # Uses master key
-    group_id = _group_id('PENDING')
-    if not headers.get("Authorization") or not group_id:
-        return
-        
-    try:
-        # New MailerLite API: POST /groups/{group_id}/subscribers
-        requests.post(
-            f"{API_URL}/groups/{group_id}/subscribers",
-            headers=headers,
-            json={"email": author_email},
-            timeout=10
-        )
-    except Exception as e:
-        logger.error(f"MailerLite send_swap_request_notification failed: {e}")
-
-
-def approve_swap_notification(author_email: str):
-    """
-    Moves subscriber from Pending -> Approved group in MASTER account.
-    """
-    headers = _get_headers()
-    pending_id = _group_id('PENDING')
-    approved_id = _group_id('APPROVED')
-    
-    if not headers.get("Authorization"):
-        return
-        
-    try:
-        # Add to approved
-        if approved_id:
-            requests.post(f"{API_URL}/groups/{approved_id}/subscribers", headers=headers, json={"email": author_email}, timeout=10)
-        # Remove from pending
-        if pending_id:
-            # New MailerLite API: DELETE /groups/{group_id}/subscribers/{subscriber_id}
-            # Note: We need the subscriber_id or email. Some endpoints support email.
-            requests.delete(f"{API_URL}/groups/{pending_id}/subscribers/{author_email}", headers=headers, timeout=10)
-    except Exception as e:
-        logger.error(f"MailerLite approve_swap_notification failed: {e}")
-
-
-def reject_swap_notification(author_email: str):
-    """
-    Moves subscriber to Rejected group in MASTER account.
-    """
-    headers = _get_headers()
-    pending_id = _group_id('PENDING')
-    rejected_id = _group_id('REJECTED')
-    
-    if not headers.get("Authorization"):
-        return
-        
-    try:
-        if rejected_id:
-            requests.post(f"{API_URL}/groups/{rejected_id}/subscribers", headers=headers, json={"email": author_email}, timeout=10)
-        if pending_id:
-            requests.delete(f"{API_URL}/groups/{pending_id}/subscribers/{author_email}", headers=headers, timeout=10)
-    except Exception as e:
-        logger.error(f"MailerLite reject_swap_notification failed: {e}")
@@ -0,0 +1,121 @@
+"""
+Background MailerLite analytics sync.
+
+SubscriberAnalyticsView used to call sync_subscriber_analytics() inside the
+request by default: seven or more serial MailerLite calls with 10-15 s
+timeouts. The view now always answers from the stored SubscriberVerification
+and calls request_sync(), which hands the refresh to a small worker pool when
+the snapshot is older than MAILERLITE_SYNC_INTERVAL_SECONDS (or the client asks
+for it). The `sync_mailerlite` management command refreshes every connected
+account on a schedule through the same pool.
+
+- A cache.add claim per user keeps at most one sync per user queued or
+  running, whether it came from the page or the schedule.
+- Every MailerLite call takes a token from its API key's bucket
+  (mailerlite_client.TokenBucket, MAILERLITE_RATE_LIMIT_PER_MINUTE), so the
+  workers share an account's rate limit instead of tripping it.
+
+Set MAILERLITE_SYNC_ASYNC = False to sync inline instead, e.g. in tests.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import SubscriberVerification
+from core.services.mailerlite_service import sync_subscriber_analytics
+
+logger = logging.getLogger(__name__)
+
+# A claim outlives any realistic sync; it only matters if a worker dies mid-run
+CLAIM_TTL = 10 * 60
+_CLAIM_KEY = 'mailerlite_sync:v1:{user_id}'
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'MAILERLITE_SYNC_WORKERS', 4),
+    thread_name_prefix='mailerlite-sync',
+)
+
+
+def _claim_key(user_id):
+    return _CLAIM_KEY.format(user_id=user_id)
+
+
+def _sync_interval():
+    return timedelta(seconds=getattr(settings, 'MAILERLITE_SYNC_INTERVAL_SECONDS', 15 * 60))
+
+
+def needs_sync(verification, now=None):
+    """True when the stored analytics are older than the sync interval."""
+    if verification.last_verified_at is None:
+        return True
+    return verification.last_verified_at < (now or timezone.now()) - _sync_interval()
+
+
+def _sync(user_id):
+    try:
+        sync_subscriber_analytics(get_user_model().objects.get(pk=user_id))
+    except Exception as e:
+        logger.warning(f"MailerLite sync for user {user_id} failed: {e}")
+    finally:
+        try:
+            cache.delete(_claim_key(user_id))
+        except Exception:
+            pass
+
+
+def _sync_in_background(user_id):
+    try:
+        _sync(user_id)
+    finally:
+        connections.close_all()
+
+
+def request_sync(user):
+    """
+    Queue a MailerLite sync for `user` unless one is already queued or
+    running. Returns the Future, or None when nothing was queued (or the sync
+    ran inline because MAILERLITE_SYNC_ASYNC is off).
+    """
+    user_id = getattr(user, 'pk', user)
+    try:
+        if not cache.add(_claim_key(user_id), True, CLAIM_TTL):
+            return None
+    except Exception as e:
+        logger.warning(f"MailerLite sync claim unavailable: {e}")
+
+    if not getattr(settings, 'MAILERLITE_SYNC_ASYNC', True):
+        _sync(user_id)
+        return None
+    return _executor.submit(_sync_in_background, user_id)
+
+
+def sync_all(force=False):
+    """
+    Sync every account with a MailerLite key, or only those whose analytics
+    are stale unless `force`. Waits for the queued syncs to finish and returns
+    how many were queued.
+    """
+    verifications = SubscriberVerification.objects.filter(
+        Q(is_connected_mailerlite=True) | Q(mailerlite_api_key__gt='')
+    )
+    if not force:
+        verifications = verifications.filter(
+            Q(last_verified_at__isnull=True) | Q(last_verified_at__lt=timezone.now() - _sync_interval())
+        )
+
+    queued = 0
+    futures = []
+    for user_id in verifications.values_list('user_id', flat=True).iterator():
+        future = request_sync(user_id)
+        if future is not None:
+            futures.append(future)
+        queued += 1
+    wait(futures)
+    return queued
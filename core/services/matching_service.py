@@ -0,0 +1,316 @@
+"""
+Best-match ranking for swap partner discovery.
+
+Implements the matching priority advertised by GenreChoicesAPIView:
+Primary Genre > Subgenre overlap > Audience / Tone tags, with the slot owner's
+reputation and open rate as a final quality signal.
+
+Subgenres and audience tags are encoded as integer bitsets, so overlap is an AND
+plus a popcount instead of a set intersection. Per-slot and per-owner feature
+vectors are precomputed into a process-level FeatureIndex. Ranking N candidates
+then costs one indexed id query plus a tight integer loop over the candidates.
+
+Only the first ranking in a process builds the index inline. After that, an
+index older than FEATURE_INDEX_TTL keeps being served while one rebuild runs on
+a worker thread (MATCHING_INDEX_ASYNC) and swaps the new index in. Writes don't
+wait for the rebuild: core.signals drops the entries of changed slots and
+owners after commit, and ensure() reloads them, like slots or owners created
+since the last build, when they next show up as candidates.
+`manage.py benchmark_matching` times the build and the ranking.
+"""
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from authentication.constants import ALL_SUBGENRES
+from authentication.models import UserProfile
+
+from core.models import NewsletterSlot, Profile
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each signal; they sum to 1 so scores fall in [0, 1]
+GENRE_WEIGHT = 0.45
+SUBGENRE_WEIGHT = 0.30
+TAG_WEIGHT = 0.15
+QUALITY_WEIGHT = 0.10
+
+FEATURE_INDEX_TTL = 300
+MAX_RANKED_RESULTS = 500
+
+
+class _Vocabulary:
+    """Stable key -> bit position mapping used to build bitsets."""
+
+    def __init__(self, keys=()):
+        self._bits = {}
+        self._lock = threading.Lock()
+        for key in keys:
+            self.bit(key)
+
+    def bit(self, key):
+        key = key.strip().lower()
+        position = self._bits.get(key)
+        if position is None:
+            with self._lock:
+                position = self._bits.setdefault(key, len(self._bits))
+        return position
+
+    def encode(self, keys):
+        mask = 0
+        for key in keys:
+            if key and key.strip():
+                mask |= 1 << self.bit(key)
+        return mask
+
+
+_subgenre_vocab = _Vocabulary(key for key, _ in ALL_SUBGENRES)
+_tag_vocab = _Vocabulary()
+
+
+def _split_subgenres(value):
+    return value.split(',') if value else []
+
+
+def _quality(profile_row):
+    """Blend reputation (0-100) and open rate (percent) into a 0-1 quality signal."""
+    if profile_row is None:
+        return 0.0
+    reputation, open_rate = profile_row
+    score = 0.7 * (reputation or 0) / 100.0 + 0.3 * (open_rate or 0) / 100.0
+    return max(0.0, min(1.0, score))
+
+
+def _load_owner_features(user_ids=None):
+    """
+    Return {user_id: (subgenre_bits, tag_bits, quality)} for the given users, or
+    for every user with a UserProfile/Profile when user_ids is None. Three queries.
+    """
+    subgenre_links = UserProfile.subgenres.through.objects.values_list('userprofile__user_id', 'subgenre__slug')
+    tag_links = UserProfile.audience_tags.through.objects.values_list('userprofile__user_id', 'audiencetag__name')
+    profiles = Profile.objects.order_by('id').values_list('user_id', 'reputation_score', 'avg_open_rate')
+    if user_ids is not None:
+        subgenre_links = subgenre_links.filter(userprofile__user_id__in=user_ids)
+        tag_links = tag_links.filter(userprofile__user_id__in=user_ids)
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    sub_bits, tag_bits, quality_rows = {}, {}, {}
+    for user_id, slug in subgenre_links:
+        sub_bits[user_id] = sub_bits.get(user_id, 0) | (1 << _subgenre_vocab.bit(slug))
+    for user_id, name in tag_links:
+        tag_bits[user_id] = tag_bits.get(user_id, 0) | (1 << _tag_vocab.bit(name))
+    for user_id, reputation, open_rate in profiles:
+        # Lowest pk wins, matching Profile.objects.primary_for()
+        quality_rows.setdefault(user_id, (reputation, open_rate))
+
+    owner_ids = set(sub_bits) | set(tag_bits) | set(quality_rows)
+    if user_ids is not None:
+        owner_ids |= set(user_ids)
+    return {
+        user_id: (sub_bits.get(user_id, 0), tag_bits.get(user_id, 0), _quality(quality_rows.get(user_id)))
+        for user_id in owner_ids
+    }
+
+
+def _load_slot_features(slot_ids=None):
+    """Return {slot_id: (owner_id, genre, subgenre_bits)} for open slots (or the given ids)."""
+    slots = NewsletterSlot.objects.values_list('id', 'user_id', 'preferred_genre', 'subgenres')
+    if slot_ids is None:
+        slots = slots.filter(status='available', is_full=False)
+    else:
+        slots = slots.filter(id__in=slot_ids)
+    return {
+        slot_id: (owner_id, genre, _subgenre_vocab.encode(_split_subgenres(subgenres)))
+        for slot_id, owner_id, genre, subgenres in slots
+    }
+
+
+class FeatureIndex:
+    """Precomputed feature vectors for open slots and their owners."""
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.slots = _load_slot_features()
+        self.owners = _load_owner_features()
+
+    def is_stale(self):
+        return time.monotonic() - self.built_at > FEATURE_INDEX_TTL
+
+    def ensure(self, slot_ids):
+        """Load features for any candidate slots (and owners) missing from the index."""
+        slots = self.slots
+        missing = [slot_id for slot_id in slot_ids if slot_id not in slots]
+        if missing:
+            slots.update(_load_slot_features(missing))
+        owner_ids = {feature[0] for feature in map(slots.get, slot_ids) if feature is not None}
+        missing_owners = owner_ids - self.owners.keys()
+        if missing_owners:
+            self.owners.update(_load_owner_features(missing_owners))
+
+    def forget(self, slot_ids=(), owner_ids=()):
+        for slot_id in slot_ids:
+            self.slots.pop(slot_id, None)
+        for owner_id in owner_ids:
+            self.owners.pop(owner_id, None)
+
+
+_index = None
+# Guards _index and _forgotten; held only for reference swaps, never for a build
+_index_lock = threading.Lock()
+# One build at a time
+_build_lock = threading.Lock()
+# (slot_ids, owner_ids) invalidated while a build runs, replayed on the new index
+_forgotten = None
+_refresh_queued = False
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feature-index')
+
+
+def _build(only_if_missing=False):
+    global _index, _forgotten
+    with _build_lock:
+        if only_if_missing and _index is not None:
+            return
+        with _index_lock:
+            _forgotten = (set(), set())
+        try:
+            index = FeatureIndex()
+        except Exception:
+            with _index_lock:
+                _forgotten = None
+            raise
+        with _index_lock:
+            # Rows written while the build read them may have been loaded stale
+            index.forget(*_forgotten)
+            _forgotten = None
+            _index = index
+
+
+def _refresh():
+    global _refresh_queued
+    try:
+        _build()
+    finally:
+        with _index_lock:
+            _refresh_queued = False
+
+
+def _refresh_in_background():
+    try:
+        _refresh()
+    except Exception as e:
+        logger.warning(f"Feature index rebuild failed: {e}")
+    finally:
+        connections.close_all()
+
+
+def get_feature_index():
+    """
+    The current index. Built inline only when the process has none yet; a
+    stale one is returned as is while a rebuild is scheduled.
+    """
+    global _refresh_queued
+    index = _index
+    if index is None:
+        _build(only_if_missing=True)
+        return _index
+    if index.is_stale():
+        with _index_lock:
+            queued, _refresh_queued = _refresh_queued, True
+        if not queued:
+            if getattr(settings, 'MATCHING_INDEX_ASYNC', True):
+                _executor.submit(_refresh_in_background)
+            else:
+                _refresh()
+    return index
+
+
+def invalidate_feature_index():
+    """Drop the whole index; the next ranking rebuilds it inline."""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def _forget_features(slot_ids, owner_ids):
+    with _index_lock:
+        if _index is not None:
+            _index.forget(slot_ids, owner_ids)
+        if _forgotten is not None:
+            _forgotten[0].update(slot_ids)
+            _forgotten[1].update(owner_ids)
+
+
+def invalidate_features(slot_ids=(), owner_ids=()):
+    """
+    Drop the given slots' and owners' entries once the current transaction
+    commits; the next ranking that needs them reloads them.
+    """
+    slot_ids, owner_ids = set(slot_ids), set(owner_ids)
+    if slot_ids or owner_ids:
+        transaction.on_commit(lambda: _forget_features(slot_ids, owner_ids))
+
+
+def viewer_features(user):
+    """Return (primary_genre, subgenre_bits, tag_bits) for the viewing user."""
+    user_profile = UserProfile.objects.filter(user=user).first()
+    if not user_profile:
+        return None, 0, 0
+    sub_bits = _subgenre_vocab.encode(user_profile.subgenres.values_list('slug', flat=True))
+    tag_bits = _tag_vocab.encode(user_profile.audience_tags.values_list('name', flat=True))
+    return user_profile.primary_genre, sub_bits, tag_bits
+
+
+def _overlap(a, b):
+    union = a | b
+    if not union:
+        return 0.0
+    return (a & b).bit_count() / union.bit_count()
+
+
+def rank_slots(user, slot_ids, limit=MAX_RANKED_RESULTS):
+    """
+    Score `slot_ids` for `user` and return up to `limit` (slot_id, score) pairs,
+    best match first. Ties go to the newer slot.
+    """
+    slot_ids = list(slot_ids)
+    index = get_feature_index()
+    index.ensure(slot_ids)
+    genre, user_subs, user_tags = viewer_features(user)
+
+    slots_get = index.slots.get
+    owners_get = index.owners.get
+    no_owner = (0, 0, 0.0)
+    # An owner's tag and quality terms are shared by all their slots, so they
+    # are computed once per owner. Most slots share no subgenre with the
+    # viewer, so the union popcount is only taken when the AND is non-zero.
+    owner_terms = {}
+
+    scored = []
+    append = scored.append
+    for slot_id in slot_ids:
+        feature = slots_get(slot_id)
+        if feature is None:
+            continue
+        owner_id, slot_genre, slot_subs = feature
+        owner = owner_terms.get(owner_id)
+        if owner is None:
+            owner_subs, owner_tags, quality = owners_get(owner_id, no_owner)
+            owner = owner_terms[owner_id] = (
+                owner_subs, TAG_WEIGHT * _overlap(user_tags, owner_tags) + QUALITY_WEIGHT * quality,
+            )
+        score = owner[1]
+        if genre and slot_genre == genre:
+            score += GENRE_WEIGHT
+        mask = slot_subs | owner[0]
+        shared = user_subs & mask
+        if shared:
+            score += SUBGENRE_WEIGHT * shared.bit_count() / (user_subs | mask).bit_count()
+        append((score, slot_id))
+
+    return [(slot_id, round(score, 4)) for score, slot_id in heapq.nlargest(limit, scored)]
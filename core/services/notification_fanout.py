@@ -0,0 +1,167 @@
+"""
+Fan-out of real-time events to users' `user_<id>_notifications` groups.
+
+Notification post_save used to serialize the row and call group_send in the
+request thread, usually inside the payment or swap transaction, so a slow or
+unavailable Redis added latency to those endpoints or broke them. Now:
+
+- Nothing is queued before the transaction commits: publish_notifications()
+  registers an on_commit hook, and the unread counter service publishes from
+  its own. Rolled-back rows are never announced, and Redis is never called
+  while row locks are held.
+- On commit the events go onto an in-process queue. A daemon worker drains
+  it in batches and sends one group_send per recipient and event type. All of
+  a user's new notifications travel together; for unread counts only the
+  latest value is sent.
+- When the queue is full (Redis down for a long time) events are dropped
+  with a warning. Clients still catch up through the REST endpoints.
+
+Set NOTIFICATION_FANOUT_ASYNC = False to deliver inline on commit instead,
+e.g. in tests.
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+EXIT_FLUSH_TIMEOUT = 5
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def group_name(user_id):
+    return f'user_{user_id}_notifications'
+
+
+def _group_messages(events):
+    """Collapse (user_id, kind, payload) events into one channel message per user and kind."""
+    notifications = {}
+    counts = {}
+    for user_id, kind, payload in events:
+        if kind == 'notification':
+            notifications.setdefault(user_id, []).append(payload)
+        else:
+            counts[user_id] = payload
+
+    messages = [
+        (group_name(user_id), {'type': 'send_notifications', 'notifications': payloads})
+        for user_id, payloads in notifications.items()
+    ]
+    messages += [
+        (group_name(user_id), {'type': 'send_unread_counts', 'counts': payload})
+        for user_id, payload in counts.items()
+    ]
+    return messages
+
+
+async def _send_all(channel_layer, messages):
+    results = await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in messages),
+        return_exceptions=True,
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        logger.warning(f"Notification fan-out: {len(failures)} of {len(messages)} group sends failed: {failures[0]}")
+
+
+def _deliver(events):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(_send_all)(channel_layer, _group_messages(events))
+
+
+def _run():
+    while True:
+        batch = [_queue.get()]
+        while len(batch) < BATCH_SIZE:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _deliver(batch)
+        except Exception as e:
+            logger.warning(f"Notification fan-out batch of {len(batch)} events failed: {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='notification-fanout', daemon=True)
+            _worker.start()
+
+
+def _enqueue(events):
+    if not getattr(settings, 'NOTIFICATION_FANOUT_ASYNC', True):
+        try:
+            _deliver(events)
+        except Exception as e:
+            logger.warning(f"Notification fan-out failed: {e}")
+        return
+
+    for event in events:
+        try:
+            _queue.put_nowait(event)
+        except queue.Full:
+            logger.warning(f"Notification fan-out queue full; dropping {event[1]} for user {event[0]}")
+    _ensure_worker()
+
+
+def publish_notifications(notifications):
+    """
+    Deliver already-saved notifications to their recipients once the current
+    transaction commits. Works for single saves and bulk_create results alike.
+    """
+    from core.serializers import NotificationSerializer
+
+    notifications = list(notifications)
+    if not notifications:
+        return
+
+    def enqueue():
+        _enqueue([
+            (notification.recipient_id, 'notification', dict(NotificationSerializer(notification).data))
+            for notification in notifications
+        ])
+
+    transaction.on_commit(enqueue)
+
+
+def publish_unread_counts(counts_by_user):
+    """Queue {user_id: counts} unread-counter updates. Call after commit."""
+    _enqueue([(user_id, 'unread_counts', counts) for user_id, counts in counts_by_user.items()])
+
+
+def flush(timeout=EXIT_FLUSH_TIMEOUT):
+    """Wait up to `timeout` seconds for queued events to be sent. Returns True when drained."""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+# Short-lived processes (management commands, cron sweeps) exit right after
+# committing; give the worker a moment to send what they queued.
+atexit.register(flush)
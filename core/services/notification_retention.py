@@ -0,0 +1,106 @@
+"""
+Notification retention.
+
+NotificationListView only shows the last 48 hours and the dashboard only the
+newest few, but nothing ever deleted Notification rows. purge_notifications()
+deletes rows older than NOTIFICATION_RETENTION_DAYS. It works in primary-key
+batches with one short transaction per batch, driven by the
+`purge_notifications` management command. With archiving enabled, each batch
+is first rolled up into NotificationArchive: one row per user per month, with
+every notification stored as a compact list in ARCHIVE_FIELDS order.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Notification, NotificationArchive
+from core.services.recent_activity_service import invalidate_recent
+from core.services.unread_counter_service import adjust_unread_many
+
+DEFAULT_BATCH_SIZE = 1000
+
+ARCHIVE_FIELDS = ('id', 'created_at', 'badge', 'title', 'message', 'action_url', 'is_read')
+
+# Set while a batch is deleted; core.signals then skips the per-row unread
+# counter update, which the purge applies once per batch instead
+purging = ContextVar('notification_purging', default=False)
+
+
+def _archive_row(notification):
+    return [
+        notification.id,
+        notification.created_at.isoformat(),
+        notification.badge,
+        notification.title,
+        notification.message,
+        notification.action_url,
+        notification.is_read,
+    ]
+
+
+def _archive(notifications):
+    """Append `notifications` to their users' monthly NotificationArchive rows."""
+    by_month = {}
+    for notification in notifications:
+        month = notification.created_at.date().replace(day=1)
+        by_month.setdefault((notification.recipient_id, month), []).append(_archive_row(notification))
+
+    existing = {
+        (archive.user_id, archive.month): archive
+        for archive in NotificationArchive.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in by_month},
+            month__in={month for _, month in by_month},
+        )
+    }
+    to_update, to_create = [], []
+    for (user_id, month), rows in by_month.items():
+        archive = existing.get((user_id, month))
+        if archive is None:
+            to_create.append(NotificationArchive(user_id=user_id, month=month, notifications=rows, count=len(rows)))
+        else:
+            archive.notifications = archive.notifications + rows
+            archive.count += len(rows)
+            to_update.append(archive)
+
+    NotificationArchive.objects.bulk_create(to_create)
+    NotificationArchive.objects.bulk_update(to_update, ['notifications', 'count', 'updated_at'])
+
+
+def purge_notifications(retention_days=None, archive=None, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """
+    Delete notifications older than `retention_days` (default
+    NOTIFICATION_RETENTION_DAYS), archiving them first when `archive` (default
+    NOTIFICATION_ARCHIVE_ENABLED) is set. Returns the number of rows deleted.
+    """
+    if retention_days is None:
+        retention_days = settings.NOTIFICATION_RETENTION_DAYS
+    if archive is None:
+        archive = settings.NOTIFICATION_ARCHIVE_ENABLED
+    now = now or timezone.now()
+    stale = Notification.objects.filter(created_at__lt=now - timedelta(days=retention_days))
+
+    purged = 0
+    while True:
+        with transaction.atomic():
+            notifications = list(stale.order_by('pk')[:batch_size])
+            if not notifications:
+                return purged
+            if archive:
+                _archive(notifications)
+            # The per-row post_delete counter update is skipped; the unread
+            # counters and recent-activity buffers are fixed up below, once per batch.
+            token = purging.set(True)
+            try:
+                Notification.objects.filter(pk__in=[n.pk for n in notifications]).delete()
+            finally:
+                purging.reset(token)
+            adjust_unread_many('notifications', {
+                user_id: -count
+                for user_id, count in Counter(n.recipient_id for n in notifications if not n.is_read).items()
+            })
+            invalidate_recent(*{n.recipient_id for n in notifications})
+        purged += len(notifications)
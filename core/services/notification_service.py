@@ -0,0 +1,64 @@
+"""
+Bulk notification creation.
+
+Code paths that announce one event to several people (payment completion, the
+expiry sweeper, segment broadcasts) used to call Notification.objects.create()
+once per recipient. Each call was a separate INSERT, post_save and delivery.
+notify_many() writes them with one bulk_create and hands the whole batch to
+core.services.notification_fanout. bulk_create skips post_save, so it also
+bumps the recipients' unread counters and recent-activity buffers itself.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from core.models import Notification
+from core.services.notification_fanout import flush, publish_notifications
+from core.services.recent_activity_service import record_notifications
+from core.services.unread_counter_service import adjust_unread_many
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def notify_many(notifications, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Save notifications in bulk and queue their WebSocket delivery for after
+    commit. Accepts unsaved Notification instances or dicts of their fields.
+    Returns the created rows.
+    """
+    notifications = [
+        notification if isinstance(notification, Notification) else Notification(**notification)
+        for notification in notifications
+    ]
+    if not notifications:
+        return []
+
+    created = Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    adjust_unread_many('notifications', Counter(n.recipient_id for n in created if not n.is_read))
+    publish_notifications(created)
+    record_notifications(created)
+    return created
+
+
+def notify_segment(users, title, message, badge='NEW', action_url=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send the same notification to every user in the `users` queryset. Walks it
+    in primary-key batches, one transaction per batch, and waits for each
+    batch's deliveries to drain before the next so large segments don't
+    overflow the fan-out queue. Returns the number of notifications sent.
+    """
+    user_ids = users.order_by('pk').values_list('pk', flat=True).distinct()
+    sent = 0
+    last_id = 0
+    while True:
+        batch = list(user_ids.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return sent
+        with transaction.atomic():
+            notify_many([
+                Notification(recipient_id=user_id, title=title, message=message, badge=badge, action_url=action_url)
+                for user_id in batch
+            ], batch_size=batch_size)
+        flush()
+        sent += len(batch)
+        last_id = batch[-1]
@@ -0,0 +1,89 @@
+"""
+Per-user swap partner graph, cached.
+
+Several views need "who has this user swapped with?": the explorer and discovery
+views show friend_only slots to confirmed partners, and the chat views list
+everyone with a non-rejected swap. Each user's partner set is computed once with
+a single values_list() query, cached as a frozenset and invalidated from
+core.signals whenever a SwapRequest is created, changes status or is deleted.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from core.models import SwapRequest
+
+logger = logging.getLogger(__name__)
+
+# Swaps that make two authors "friends" for friend_only visibility
+CONFIRMED_STATUSES = ['confirmed', 'scheduled', 'sending', 'completed', 'verified']
+
+CACHE_TTL = 60 * 60
+_CACHE_KEY = 'partner_graph:v1:{user_id}:{kind}'
+_KINDS = ('confirmed', 'active')
+
+
+def _cache_key(user_id, kind):
+    return _CACHE_KEY.format(user_id=user_id, kind=kind)
+
+
+def _load_partner_ids(user_id, kind):
+    swaps = SwapRequest.objects.filter(Q(requester_id=user_id) | Q(slot__user_id=user_id))
+    if kind == 'confirmed':
+        swaps = swaps.filter(status__in=CONFIRMED_STATUSES)
+    else:
+        swaps = swaps.exclude(status='rejected')
+
+    partner_ids = set()
+    for requester_id, owner_id in swaps.values_list('requester_id', 'slot__user_id'):
+        partner_ids.add(requester_id)
+        partner_ids.add(owner_id)
+    partner_ids.discard(user_id)
+    return frozenset(partner_ids)
+
+
+def partners_of(user, include_pending=False):
+    """
+    Return a frozenset of user ids `user` has swapped with.
+
+    By default only confirmed/scheduled/completed swaps count. With
+    include_pending=True every swap that wasn't rejected counts, which is what
+    the chat partner lists use.
+    """
+    user_id = getattr(user, 'pk', user)
+    kind = 'active' if include_pending else 'confirmed'
+    key = _cache_key(user_id, kind)
+
+    try:
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Partner graph cache unavailable: {e}")
+        return _load_partner_ids(user_id, kind)
+
+    if cached is not None:
+        return cached
+
+    partner_ids = _load_partner_ids(user_id, kind)
+    try:
+        cache.set(key, partner_ids, CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Partner graph cache unavailable: {e}")
+    return partner_ids
+
+
+def is_partner(user_a, user_b, include_pending=False):
+    """True if the two users have a (confirmed, by default) swap between them."""
+    user_b_id = getattr(user_b, 'pk', user_b)
+    return user_b_id in partners_of(user_a, include_pending=include_pending)
+
+
+def invalidate_partners(*user_ids):
+    """Drop cached partner sets for the given users."""
+    keys = [_cache_key(user_id, kind) for user_id in user_ids if user_id for kind in _KINDS]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"Partner graph cache invalidation failed: {e}")
@@ -0,0 +1,117 @@
+"""
+Capped per-user ring buffer of recent notifications for the dashboard feed.
+
+AuthorDashboardView's "recent activity" used to query the user's newest
+notifications on every load. The newest RING_SIZE entries now live in one
+cache key per user:
+
+- New notifications are pushed to the front after commit, from core.signals
+  for single saves and from notify_many() for bulk inserts.
+- Re-saved notifications and purges drop the buffer.
+- A missing buffer is rebuilt with one query on the
+  (recipient, -created_at) index.
+
+Writers read, prepend and write back the list. Two concurrent writers for the
+same user can lose an entry; the buffer expires after RING_TTL, which bounds
+that.
+"""
+import logging
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.models import Notification
+
+logger = logging.getLogger(__name__)
+
+RING_SIZE = 10
+RING_TTL = 60 * 60
+_CACHE_KEY = 'recent_activity:v1:{user_id}'
+
+
+def _cache_key(user_id):
+    return _CACHE_KEY.format(user_id=user_id)
+
+
+def _entry(notification):
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'badge': notification.badge,
+        'action_url': notification.action_url,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat(),
+    }
+
+
+def _load(user_id):
+    return [_entry(n) for n in Notification.objects.filter(recipient_id=user_id).order_by('-created_at')[:RING_SIZE]]
+
+
+def recent_notifications(user):
+    """
+    The user's newest notifications, newest first, as dicts with the
+    Notification fields plus `created_at` as a datetime.
+    """
+    user_id = getattr(user, 'pk', user)
+    key = _cache_key(user_id)
+    try:
+        entries = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Recent activity cache unavailable: {e}")
+        entries = None
+        key = None
+
+    if entries is None:
+        entries = _load(user_id)
+        if key:
+            try:
+                cache.set(key, entries, RING_TTL)
+            except Exception as e:
+                logger.warning(f"Recent activity cache unavailable: {e}")
+
+    return [dict(entry, created_at=datetime.fromisoformat(entry['created_at'])) for entry in entries]
+
+
+def _push(notifications):
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification.recipient_id, []).append(_entry(notification))
+
+    try:
+        current = cache.get_many([_cache_key(user_id) for user_id in by_user])
+        updated = {}
+        for user_id, entries in by_user.items():
+            key = _cache_key(user_id)
+            if key not in current:
+                continue  # Rebuilt from the database on the next read
+            entries.sort(key=lambda entry: entry['created_at'], reverse=True)
+            updated[key] = (entries + current[key])[:RING_SIZE]
+        if updated:
+            cache.set_many(updated, RING_TTL)
+    except Exception as e:
+        logger.warning(f"Recent activity cache update failed: {e}")
+
+
+def record_notifications(notifications):
+    """Prepend newly created notifications to their recipients' buffers after commit."""
+    notifications = list(notifications)
+    if notifications:
+        transaction.on_commit(lambda: _push(notifications))
+
+
+def invalidate_recent(*user_ids):
+    """Drop the given users' buffers after commit."""
+    keys = [_cache_key(user_id) for user_id in set(user_ids) if user_id]
+    if not keys:
+        return
+
+    def drop():
+        try:
+            cache.delete_many(keys)
+        except Exception as e:
+            logger.warning(f"Recent activity cache invalidation failed: {e}")
+
+    transaction.on_commit(drop)
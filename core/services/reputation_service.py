@@ -9,7 +9,7 @@ class ReputationService:
         Awards points based on the number of completed/verified swaps.
         Max Points: 50 (10 swaps x 5 points each).
         """
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if not profile:
             return
         
@@ -39,7 +39,7 @@ class ReputationService:
         Awards points for sending promotions on the scheduled date.
         Max Points: 30.
         """
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if not profile:
             return
         
@@ -60,7 +60,7 @@ class ReputationService:
         Updates communication score based on response time.
         Target: < 2 hours response for 30 points.
         """
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if not profile:
             return
         
@@ -92,7 +92,7 @@ class ReputationService:
         Deducts points for missed or flaked swaps.
         Starts with a 30 point maintenance score.
         """
-        profile = user.profiles.first()
+        profile = Profile.objects.primary_for(user)
         if not profile:
             return
         
@@ -0,0 +1,61 @@
+"""
+Denormalized slot capacity (NewsletterSlot.active_partners_count / is_full).
+
+Discovery used to annotate Count('swap_requests') over every slot on every request.
+The count is now stored on the slot and recomputed from SwapRequest whenever a swap
+on that slot is created, changes status or is deleted (see core.signals), so the
+explorer only has to filter on indexed columns. `rebuild_slot_capacity` repairs
+drift after raw SQL or bulk updates.
+"""
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, F, OuterRef, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from core.models import NewsletterSlot, SwapRequest
+
+# Statuses that occupy one of a slot's `max_partners` places
+ACTIVE_PARTNER_STATUSES = ['confirmed', 'verified', 'completed', 'sending', 'scheduled']
+
+
+def _active_count_subquery():
+    return Subquery(
+        SwapRequest.objects.filter(slot=OuterRef('pk'), status__in=ACTIVE_PARTNER_STATUSES)
+        .order_by()
+        .values('slot')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+
+
+def refresh_slot_capacity(slots):
+    """
+    Recompute active_partners_count and is_full for the given slots (a queryset
+    or an iterable of slot ids) in two UPDATE statements.
+    """
+    if not isinstance(slots, QuerySet):
+        slots = NewsletterSlot.objects.filter(pk__in=list(slots))
+
+    with transaction.atomic():
+        slots.update(active_partners_count=Coalesce(_active_count_subquery(), Value(0)))
+        slots.update(
+            is_full=Case(
+                When(active_partners_count__gte=F('max_partners'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+
+def rebuild_slot_capacity(batch_size=1000):
+    """Recompute capacity for every slot in primary-key batches. Returns slots processed."""
+    processed = 0
+    last_id = 0
+    while True:
+        ids = list(
+            NewsletterSlot.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return processed
+        refresh_slot_capacity(ids)
+        processed += len(ids)
+        last_id = ids[-1]
@@ -0,0 +1,80 @@
+"""
+Bulk preload layer for swap list endpoints.
+
+SwapManagementSerializer needs the partner's Profile, their audience size,
+the SwapPayment and any completed PaymentTransaction for every row. Fetching those
+per row costs ~7 queries per swap, so list views call
+`build_swap_management_context()` once for the whole page and pass the result in
+through serializer context. The serializer falls back to per-row lookups when a
+key is missing, so single-swap responses keep working unchanged.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from core.models import Profile, SwapPayment, PaymentTransaction
+from core.services.audience_service import get_audience_sizes
+
+
+def _is_paid_slot(slot):
+    if not slot:
+        return False
+    prom_type = str(slot.promotion_type).lower() if slot.promotion_type else ''
+    price_val = slot.price or 0
+    return not (prom_type == 'free' or price_val == 0)
+
+
+def build_swap_management_context(swaps, request=None):
+    """
+    Fetch everything SwapManagementSerializer reads for `swaps` in a fixed number
+    of queries and return it as a serializer context dict.
+
+    `swaps` should be loaded with select_related('requester', 'slot__user', 'book').
+    """
+    swaps = list(swaps)
+
+    user_ids = set()
+    for swap in swaps:
+        user_ids.add(swap.requester_id)
+        if swap.slot:
+            user_ids.add(swap.slot.user_id)
+
+    profiles_by_user = Profile.objects.primary_for_users(user_ids)
+
+    # Primes the request's audience identity map that the serializer reads
+    audience_sizes = get_audience_sizes(user_ids, request=request)
+
+    paid_swap_ids = [s.id for s in swaps if _is_paid_slot(s.slot)]
+    payments_by_swap = {}
+    completed_tx_swap_ids = set()
+    recent_direct_payments = []
+
+    if paid_swap_ids:
+        payments_by_swap = {
+            p.swap_request_id: p for p in SwapPayment.objects.filter(swap_request_id__in=paid_swap_ids)
+        }
+        completed_tx_swap_ids = set(
+            PaymentTransaction.objects.filter(
+                swap_request_id__in=paid_swap_ids,
+                status='completed',
+            ).order_by().values_list('swap_request_id', flat=True)
+        )
+        # Candidates for the "unlinked direct payment" fallback, newest first
+        recent_direct_payments = list(
+            PaymentTransaction.objects.filter(
+                sender_id__in=user_ids,
+                receiver_id__in=user_ids,
+                transaction_type='direct_payment',
+                status='completed',
+                created_at__gte=timezone.now() - timedelta(hours=24),
+            ).order_by('-created_at', '-pk')
+        )
+
+    return {
+        'request': request,
+        'profiles_by_user': profiles_by_user,
+        'audience_sizes': audience_sizes,
+        'payments_by_swap': payments_by_swap,
+        'completed_tx_swap_ids': completed_tx_swap_ids,
+        'recent_direct_payments': recent_direct_payments,
+    }
@@ -0,0 +1,109 @@
+"""
+Database-side "effective status" for swap management.
+
+The status shown on a swap card is not `SwapRequest.status` verbatim: it depends on
+who is looking (a pending request you sent shows as 'sending'), whether the slot is
+paid and paid for, and whether `scheduled_date` has passed. This module expresses
+the same rules as SwapManagementSerializer.get_status with Case/When and Exists so
+tab counts are a single GROUP BY and only the requested page has to be serialized.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from django.utils import timezone
+
+from core.models import PaymentTransaction, SwapPayment
+
+ACCEPTED_STATUSES = ['confirmed', 'completed', 'scheduled', 'verified']
+PAID_ACCEPTED_STATUSES = ['confirmed', 'scheduled', 'verified']
+
+# tab -> effective statuses it shows
+TAB_EFFECTIVE_STATUSES = {
+    'pending': ['pending'],
+    'sending': ['sending'],
+    'rejected': ['rejected'],
+    'scheduled': ['scheduled'],
+    'completed': ['completed', 'verified'],
+}
+
+
+def _paid_slot_q():
+    # Mirrors SwapManagementSerializer.get_eligible_for_pay: free if promotion_type
+    # is 'free' or the price is 0/null.
+    return Q(slot__price__gt=0) & ~Q(slot__promotion_type__iexact='free')
+
+
+def _payment_done_expression():
+    now = timezone.now()
+    tolerance = Decimal('0.01')
+
+    swap_payment_done = Exists(
+        SwapPayment.objects.filter(swap_request=OuterRef('pk'), status='completed')
+    )
+    linked_tx_done = Exists(
+        PaymentTransaction.objects.filter(swap_request=OuterRef('pk'), status='completed')
+    )
+    # Direct payments between the two parties that were never linked to the
+    # swap: like the serializer, only the newest one counts, and only when its
+    # amount matches the price
+    newest_direct_amount = Subquery(
+        PaymentTransaction.objects.filter(
+            Q(sender=OuterRef('requester'), receiver=OuterRef('slot__user'))
+            | Q(sender=OuterRef('slot__user'), receiver=OuterRef('requester')),
+            transaction_type='direct_payment',
+            status='completed',
+            created_at__gte=now - timedelta(hours=24),
+        ).order_by('-created_at', '-pk').values('amount')[:1]
+    )
+    direct_tx_done = (
+        GreaterThanOrEqual(newest_direct_amount, F('slot__price') - tolerance)
+        & LessThanOrEqual(newest_direct_amount, F('slot__price') + tolerance)
+    )
+    return swap_payment_done | linked_tx_done | direct_tx_done
+
+
+def annotate_effective_status(queryset, user):
+    """Annotate `effective_status` on a SwapRequest queryset as seen by `user`."""
+    today = timezone.now().date()
+    paid = _paid_slot_q()
+
+    return queryset.annotate(
+        payment_is_done=_payment_done_expression(),
+    ).annotate(
+        effective_status=Case(
+            When(requester=user, status='pending', then=Value('sending')),
+            When(status='completed', then=Value('completed')),
+            When(paid & Q(status__in=PAID_ACCEPTED_STATUSES, payment_is_done=True), then=Value('completed')),
+            When(paid & Q(status__in=PAID_ACCEPTED_STATUSES), then=Value('scheduled')),
+            When(status='verified', scheduled_date__lte=today, then=Value('verified')),
+            When(status__in=ACCEPTED_STATUSES, scheduled_date__lte=today, then=Value('completed')),
+            When(status__in=ACCEPTED_STATUSES, then=Value('scheduled')),
+            default=F('status'),
+            output_field=CharField(),
+        )
+    )
+
+
+def effective_status_counts(queryset):
+    """
+    Return {effective_status: count} for a queryset already passed through
+    annotate_effective_status, using one GROUP BY query.
+    """
+    rows = (
+        queryset.order_by()
+        .values('effective_status')
+        .annotate(total=Count('id', distinct=True))
+    )
+    return {row['effective_status']: row['total'] for row in rows}
+
+
+def filter_by_tab(queryset, tab):
+    """Restrict an annotated queryset to the swaps shown on `tab` ('all' is a no-op)."""
+    statuses = TAB_EFFECTIVE_STATUSES.get(tab)
+    if statuses is None:
+        if tab == 'all':
+            return queryset
+        statuses = [tab]
+    return queryset.filter(effective_status__in=statuses)
@@ -0,0 +1,168 @@
+"""
+Per-user unread counters (notifications, chat messages, inbox emails), cached.
+
+/api/notifications/unread-count/ is polled by every open tab and used to run
+three COUNT queries. The three counters now live in the cache (Redis in
+production), one key per user and kind:
+
+- Creating an unread row or reading one adjusts the counter with incr/decr
+  (core.signals for saves and deletes, the views for bulk .update() calls).
+- Changes that can't be expressed as a delta, such as email folder moves and
+  bulk actions, drop the user's keys. The next read recomputes all three
+  counts in a single query.
+- Keys expire after COUNTER_TTL, so any drift is reconciled against the
+  database at least that often.
+
+Every change to a cached counter is pushed to the user's NotificationConsumer
+group as an "unread_counts" event, so connected clients don't need to poll.
+NotificationConsumer reads the counts on connect, which caches them; writes
+for users with nothing cached don't touch the database again.
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import ChatMessage, Email, Notification
+from core.services.notification_fanout import publish_unread_counts
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+KINDS = ('notifications', 'chat', 'email')
+
+COUNTER_TTL = 10 * 60
+_CACHE_KEY = 'unread_counts:v1:{user_id}:{kind}'
+
+
+def _cache_key(user_id, kind):
+    return _CACHE_KEY.format(user_id=user_id, kind=kind)
+
+
+def _unread_subquery(queryset):
+    counts = queryset.filter(recipient=OuterRef('pk')).order_by().values('recipient').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counts), 0)
+
+
+def _load_counts(user_id):
+    """All three counts in one query, straight from the database."""
+    # Prefixed names: "notifications" is also the reverse accessor on User
+    row = User.objects.filter(pk=user_id).annotate(
+        unread_notifications=_unread_subquery(Notification.objects.filter(is_read=False)),
+        unread_chat=_unread_subquery(ChatMessage.objects.filter(is_read=False)),
+        unread_email=_unread_subquery(Email.objects.filter(is_read=False, folder='inbox')),
+    ).values(*(f'unread_{kind}' for kind in KINDS)).first() or {}
+    return {kind: row.get(f'unread_{kind}', 0) for kind in KINDS}
+
+
+def _with_total(counts):
+    counts = {kind: max(counts[kind], 0) for kind in KINDS}
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def _cached_counts(user_ids):
+    """{user_id: counts} for the users whose three counters are all cached, in one round-trip."""
+    keys = {(user_id, kind): _cache_key(user_id, kind) for user_id in user_ids for kind in KINDS}
+    cached = cache.get_many(list(keys.values()))
+    return {
+        user_id: _with_total({kind: cached[keys[user_id, kind]] for kind in KINDS})
+        for user_id in user_ids
+        if all(keys[user_id, kind] in cached for kind in KINDS)
+    }
+
+
+def get_unread_counts(user):
+    """
+    Return {'notifications', 'chat', 'email', 'total'} unread counts for `user`
+    (a User or a user id). Falls back to the database when the cache is down.
+    """
+    user_id = getattr(user, 'pk', user)
+    try:
+        cached = _cached_counts([user_id])
+    except Exception as e:
+        logger.warning(f"Unread counter cache unavailable: {e}")
+        return _with_total(_load_counts(user_id))
+    if user_id in cached:
+        return cached[user_id]
+
+    counts = _load_counts(user_id)
+    try:
+        cache.set_many({_cache_key(user_id, kind): counts[kind] for kind in KINDS}, COUNTER_TTL)
+    except Exception as e:
+        logger.warning(f"Unread counter cache unavailable: {e}")
+    return _with_total(counts)
+
+
+def push_unread_counts(*user_ids, load_missing=True):
+    """
+    Send each user's current counts to their NotificationConsumer group. Users
+    without cached counters are loaded from the database, or skipped when
+    load_missing is False.
+    """
+    try:
+        counts_by_user = _cached_counts(user_ids)
+    except Exception as e:
+        logger.warning(f"Unread counter cache unavailable: {e}")
+        counts_by_user = {}
+    if load_missing:
+        # Not cached on purpose: the load already includes rows whose on_commit
+        # deltas from the same transaction haven't run yet
+        for user_id in user_ids:
+            if user_id not in counts_by_user:
+                counts_by_user[user_id] = _with_total(_load_counts(user_id))
+    if counts_by_user:
+        publish_unread_counts(counts_by_user)
+
+
+def _apply_deltas(kind, deltas):
+    for user_id, delta in deltas.items():
+        try:
+            cache.incr(_cache_key(user_id, kind), delta)
+        except ValueError:
+            pass  # Not cached; the next read loads it from the database
+        except Exception as e:
+            logger.warning(f"Unread counter cache unavailable: {e}")
+            break
+    # Cached counters only: loading the rest here would cost a query per write
+    # for every user who isn't looking. Their next read (or socket connect) loads them
+    push_unread_counts(*deltas, load_missing=False)
+
+
+def adjust_unread(user_id, kind, delta):
+    """
+    Add `delta` to one of the user's counters once the current transaction
+    commits, then push the new counts if they are cached. Use a negative delta
+    when rows are read.
+    """
+    if not user_id or not delta:
+        return
+    transaction.on_commit(lambda: _apply_deltas(kind, {user_id: delta}))
+
+
+def adjust_unread_many(kind, deltas):
+    """
+    adjust_unread() for many users at once, e.g. after a bulk insert.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if user_id and delta}
+    if deltas:
+        transaction.on_commit(lambda: _apply_deltas(kind, deltas))
+
+
+def _drop_counts(user_ids):
+    try:
+        cache.delete_many([_cache_key(user_id, kind) for user_id in user_ids for kind in KINDS])
+    except Exception as e:
+        logger.warning(f"Unread counter invalidation failed: {e}")
+    push_unread_counts(*user_ids)
+
+
+def invalidate_unread(*user_ids):
+    """Drop the given users' counters after commit, so the next read recomputes them."""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        transaction.on_commit(lambda: _drop_counts(user_ids))
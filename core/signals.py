@@ -1,11 +1,8 @@
 import json
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import SwapRequest, Notification, Profile
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from .serializers import NotificationSerializer
+from .models import Book, CampaignAnalytic, SwapRequest, Notification, Profile, NewsletterSlot, ChatMessage, Email, SubscriberVerification, forget_primary_profile
 
 User = get_user_model()
 
@@ -69,7 +66,7 @@ from authentication.models import UserProfile
 @receiver(post_save, sender=UserProfile)
 def sync_user_profile_to_core_profile(sender, instance, **kwargs):
     """Whenever UserProfile is updated (e.g. via admin), sync to core.Profile."""
-    core_profile = Profile.objects.filter(user=instance.user).first()
+    core_profile = Profile.objects.primary_for(instance.user)
     if core_profile:
         _sync_userprofile_to_core(instance, core_profile)
 
@@ -84,23 +81,256 @@ def notify_new_swap(sender, instance, created, **kwargs):
             action_url=f"/dashboard/swaps/{instance.id}/"
         )
 
+@receiver(post_save, sender=SwapRequest)
+def refresh_capacity_on_swap_save(sender, instance, created, update_fields=None, **kwargs):
+    """Keep NewsletterSlot.active_partners_count in step with swap status changes."""
+    if not created and update_fields is not None and 'status' not in update_fields and 'slot' not in update_fields:
+        return
+    from core.services.slot_capacity_service import refresh_slot_capacity
+    refresh_slot_capacity([instance.slot_id])
+
+
+@receiver(post_delete, sender=SwapRequest)
+def refresh_capacity_on_swap_delete(sender, instance, **kwargs):
+    from core.services.slot_capacity_service import refresh_slot_capacity
+    refresh_slot_capacity([instance.slot_id])
+
+
+def _swap_parties(swap):
+    try:
+        owner_id = swap.slot.user_id
+    except NewsletterSlot.DoesNotExist:
+        owner_id = None
+    return swap.requester_id, owner_id
+
+
+def _invalidate_swap_partners(swap):
+    from django.db import transaction
+    from core.services.partner_graph_service import invalidate_partners
+
+    user_ids = _swap_parties(swap)
+    invalidate_partners(*user_ids)
+    # Again after commit, in case a concurrent reader re-cached the old set
+    transaction.on_commit(lambda: invalidate_partners(*user_ids))
+
+
+@receiver(post_save, sender=SwapRequest)
+def invalidate_partner_graph_on_swap_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+    _invalidate_swap_partners(instance)
+
+
+@receiver(post_delete, sender=SwapRequest)
+def invalidate_partner_graph_on_swap_delete(sender, instance, **kwargs):
+    _invalidate_swap_partners(instance)
+
+
+@receiver(post_save, sender=NewsletterSlot)
+def refresh_capacity_on_slot_save(sender, instance, created, update_fields=None, **kwargs):
+    """A full save may write back a stale count, and max_partners changes affect is_full."""
+    if created or (update_fields is not None and 'max_partners' not in update_fields):
+        return
+    from core.services.slot_capacity_service import refresh_slot_capacity
+    refresh_slot_capacity([instance.pk])
+
+
 @receiver(post_save, sender=Notification)
 def broadcast_notification(sender, instance, created, **kwargs):
+    """Queue the WebSocket push for after commit; see core.services.notification_fanout."""
+    if created:
+        from core.services.notification_fanout import publish_notifications
+        publish_notifications([instance])
+
+
+@receiver(post_save, sender=Notification)
+def update_recent_activity(sender, instance, created, **kwargs):
+    from core.services.recent_activity_service import invalidate_recent, record_notifications
     if created:
-        channel_layer = get_channel_layer()
-        if channel_layer is None:
-            return
-        
-        group_name = f'user_{instance.recipient.id}_notifications'
-        
-        try:
-            data = NotificationSerializer(instance).data
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'send_notification',
-                    'notification': data
-                }
-            )
-        except Exception:
-            pass
\ No newline at end of file
+        record_notifications([instance])
+    else:
+        invalidate_recent(instance.recipient_id)
+
+
+# Unread counters (core.services.unread_counter_service). Creates and deletes are
+# exact deltas; other saves may have changed is_read or folder, so they recompute.
+
+def _is_unread_inbox_email(email):
+    return email.recipient_id is not None and email.folder == 'inbox' and not email.is_read
+
+
+@receiver(post_save, sender=Notification)
+def count_unread_notification_on_save(sender, instance, created, **kwargs):
+    from core.services.unread_counter_service import adjust_unread, invalidate_unread
+    if not created:
+        invalidate_unread(instance.recipient_id)
+    elif not instance.is_read:
+        adjust_unread(instance.recipient_id, 'notifications', 1)
+
+
+@receiver(post_delete, sender=Notification)
+def count_unread_notification_on_delete(sender, instance, **kwargs):
+    from core.services.notification_retention import purging
+    from core.services.unread_counter_service import adjust_unread
+    if purging.get():
+        return
+    if not instance.is_read:
+        adjust_unread(instance.recipient_id, 'notifications', -1)
+
+
+@receiver(post_save, sender=ChatMessage)
+def count_unread_chat_on_save(sender, instance, created, update_fields=None, **kwargs):
+    from core.services.unread_counter_service import adjust_unread, invalidate_unread
+    if created:
+        if not instance.is_read:
+            adjust_unread(instance.recipient_id, 'chat', 1)
+    elif update_fields is None or 'is_read' in update_fields:
+        invalidate_unread(instance.recipient_id)
+
+
+@receiver(post_delete, sender=ChatMessage)
+def count_unread_chat_on_delete(sender, instance, **kwargs):
+    from core.services.unread_counter_service import adjust_unread
+    if not instance.is_read:
+        adjust_unread(instance.recipient_id, 'chat', -1)
+
+
+@receiver(post_save, sender=Email)
+def count_unread_email_on_save(sender, instance, created, update_fields=None, **kwargs):
+    from core.services.unread_counter_service import adjust_unread, invalidate_unread
+    if created:
+        if _is_unread_inbox_email(instance):
+            adjust_unread(instance.recipient_id, 'email', 1)
+    elif update_fields is None or {'is_read', 'folder', 'recipient'} & set(update_fields):
+        invalidate_unread(instance.recipient_id)
+
+
+@receiver(post_delete, sender=Email)
+def count_unread_email_on_delete(sender, instance, **kwargs):
+    from core.services.unread_counter_service import adjust_unread
+    if _is_unread_inbox_email(instance):
+        adjust_unread(instance.recipient_id, 'email', -1)
+
+
+# Author Dashboard snapshot (core.services.dashboard_snapshot_service)
+
+@receiver(post_save, sender=SwapRequest)
+@receiver(post_delete, sender=SwapRequest)
+def mark_dashboard_stale_on_swap(sender, instance, **kwargs):
+    from core.services.dashboard_snapshot_service import mark_dashboard_stale
+    mark_dashboard_stale(*_swap_parties(instance), sections=('stats', 'swap_events'))
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=NewsletterSlot)
+@receiver(post_delete, sender=NewsletterSlot)
+def mark_dashboard_stats_stale(sender, instance, **kwargs):
+    from core.services.dashboard_snapshot_service import mark_dashboard_stale
+    mark_dashboard_stale(instance.user_id, sections=('stats',))
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_memoized_primary_profile(sender, instance, **kwargs):
+    forget_primary_profile(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=UserProfile)
+def mark_dashboard_profile_stale(sender, instance, **kwargs):
+    from core.services.dashboard_snapshot_service import mark_dashboard_stale
+    mark_dashboard_stale(instance.user_id, sections=('profile',))
+
+
+@receiver(post_save, sender=CampaignAnalytic)
+@receiver(post_delete, sender=CampaignAnalytic)
+def mark_dashboard_campaigns_stale(sender, instance, **kwargs):
+    from core.services.dashboard_snapshot_service import mark_dashboard_stale
+    mark_dashboard_stale(instance.user_id, sections=('campaigns',))
+
+
+# Calendar rollup (core.services.calendar_service)
+
+@receiver(pre_save, sender=NewsletterSlot)
+def remember_slot_calendar_day(sender, instance, update_fields=None, **kwargs):
+    """Note the day a slot is moving away from, so post_save can refresh both."""
+    instance._previous_calendar_day = None
+    if instance.pk and (update_fields is None or {'user', 'send_date'} & set(update_fields)):
+        instance._previous_calendar_day = (
+            NewsletterSlot.objects.filter(pk=instance.pk).values_list('user_id', 'send_date').first()
+        )
+
+
+@receiver(post_save, sender=NewsletterSlot)
+def refresh_calendar_on_slot_save(sender, instance, **kwargs):
+    from core.services.calendar_service import refresh_calendar_days
+    days = [(instance.user_id, instance.send_date)]
+    if getattr(instance, '_previous_calendar_day', None):
+        days.append(instance._previous_calendar_day)
+    refresh_calendar_days(days)
+
+
+@receiver(post_delete, sender=NewsletterSlot)
+def refresh_calendar_on_slot_delete(sender, instance, **kwargs):
+    from core.services.calendar_service import refresh_calendar_days
+    refresh_calendar_days([(instance.user_id, instance.send_date)])
+
+
+@receiver(post_save, sender=SwapRequest)
+def refresh_calendar_on_swap_save(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields is not None and 'status' not in update_fields and 'slot' not in update_fields:
+        return
+    from core.services.calendar_service import refresh_slot_calendar
+    refresh_slot_calendar([instance.slot_id])
+
+
+@receiver(post_delete, sender=SwapRequest)
+def refresh_calendar_on_swap_delete(sender, instance, **kwargs):
+    from core.services.calendar_service import refresh_slot_calendar
+    refresh_slot_calendar([instance.slot_id])
+
+
+# Audience sizes (core.services.audience_service)
+
+@receiver(post_save, sender=SubscriberVerification)
+@receiver(post_delete, sender=SubscriberVerification)
+def invalidate_audience_on_verification_change(sender, instance, **kwargs):
+    from django.db import transaction
+    from core.services.audience_service import invalidate_audience_size
+    # Again after commit, in case a concurrent read cached the old row meanwhile
+    invalidate_audience_size(instance.user_id)
+    transaction.on_commit(lambda: invalidate_audience_size(instance.user_id))
+
+
+# Best-match feature index (core.services.matching_service)
+
+@receiver(post_save, sender=NewsletterSlot)
+@receiver(post_delete, sender=NewsletterSlot)
+def invalidate_slot_features(sender, instance, **kwargs):
+    from core.services.matching_service import invalidate_features
+    invalidate_features(slot_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender=UserProfile)
+def invalidate_owner_features(sender, instance, **kwargs):
+    from core.services.matching_service import invalidate_features
+    invalidate_features(owner_ids=[instance.user_id])
+
+
+@receiver(m2m_changed, sender=UserProfile.subgenres.through)
+@receiver(m2m_changed, sender=UserProfile.audience_tags.through)
+def invalidate_owner_features_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    # clear() reports no pk_set, so take the tag's profiles before they're unlinked
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    from core.services.matching_service import invalidate_features
+    if not reverse:
+        owner_ids = [instance.user_id]
+    elif action == 'pre_clear':
+        owner_ids = instance.userprofile_set.values_list('user_id', flat=True)
+    else:
+        owner_ids = UserProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)
+    invalidate_features(owner_ids=owner_ids)
@@ -1,3 +1,1097 @@
-from django.test import TestCase
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from decimal import Decimal
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from authentication.models import Subgenre
+
+from .models import Book, CalendarDay, CampaignAnalytic, ChatMessage, Email, MailerLiteGroupChange, NewsletterSlot, Notification, NotificationArchive, Profile, PaymentTransaction, SwapRequest, SwapPayment, SubscriberGrowth, SubscriberVerification, primary_profile_memo
+from .serializers import NewsletterSlotSerializer, SubscriberGrowthSerializer, SwapManagementSerializer
+from .ui_serializers import SlotExploreSerializer
+from .views import EmailActionView
+from .services.audience_service import clear_audience_cache
+from .services.calendar_service import month_calendar, rebuild_calendar
+from .services.campaign_import_service import import_campaigns
+from .services.campaign_metrics_service import campaign_metrics
+from .services.expiry_service import expire_pending_swaps
+from .services import mailerlite_client
+from .services.mailerlite_client import CircuitOpenError, MailerLiteClient, TokenBucket
+from .services.mailerlite_outbox_service import drain_outbox, enqueue_group_move
+from .services.mailerlite_service import get_subscriber_counts_by_status
+from .services import matching_service
+from .services.matching_service import invalidate_feature_index, rank_slots
+from .services.notification_fanout import group_name, publish_notifications
+from .services.notification_retention import purge_notifications
+from .services.notification_service import notify_many
+from .services.partner_graph_service import is_partner, partners_of
+from .services.recent_activity_service import RING_SIZE, recent_notifications
+from .services.swap_status_service import annotate_effective_status
+from .services.unread_counter_service import get_unread_counts
+
+User = get_user_model()
+
+# Keep tests off Redis: in-memory channel layer, local-memory cache, inline fan-out
+local_backends = override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    NOTIFICATION_FANOUT_ASYNC=False,
+    DASHBOARD_SNAPSHOT_ASYNC=False,
+    MAILERLITE_SYNC_ASYNC=False,
+    MAILERLITE_OUTBOX_ASYNC=False,
+    MATCHING_INDEX_ASYNC=False,
+    AUDIENCE_CACHE_TTL=0,
+)
+
+
+@local_backends
+class SwapManagementQueryCountTests(TestCase):
+    # tab counts, swaps, profiles, verifications, payments,
+    # completed transactions, direct payments
+    EXPECTED_QUERIES = 7
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        self._counter = 0
+
+    def _add_swaps(self, count):
+        for _ in range(count):
+            self._counter += 1
+            requester = User.objects.create_user(
+                username=f'requester{self._counter}', email=f'r{self._counter}@example.com', password='x'
+            )
+            SubscriberVerification.objects.create(user=requester, active_subscribers=100)
+            paid = self._counter % 2 == 0
+            slot = NewsletterSlot.objects.create(
+                user=self.owner,
+                send_date=date.today() + timedelta(days=self._counter),
+                preferred_genre='fantasy',
+                promotion_type='paid' if paid else 'free',
+                price=Decimal('10.00') if paid else Decimal('0.00'),
+            )
+            swap = SwapRequest.objects.create(
+                slot=slot, requester=requester,
+                status='confirmed' if paid else 'pending',
+            )
+            if paid:
+                SwapPayment.objects.create(swap_request=swap, payer=requester, amount=Decimal('10.00'))
+
+    def test_swap_list_uses_fixed_number_of_queries(self):
+        self._add_swaps(2)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get('/authorswap/api/swaps/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        self._add_swaps(10)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get('/authorswap/api/swaps/')
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_tab_counts_and_pagination(self):
+        self._add_swaps(5)
+        response = self.client.get('/authorswap/api/swaps/', {'tab': 'pending', 'page': 1, 'page_size': 2})
+        self.assertEqual(response.data['tab_counts']['all'], 5)
+        self.assertEqual(response.data['tab_counts']['pending'], 3)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertTrue(all(item['status'] == 'pending' for item in response.data['results']))
+
+
+@local_backends
+class EffectiveStatusTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.partner = User.objects.create_user(username='partner', email='partner@example.com', password='x')
+
+    def _swap(self, status, price='0.00', requester=None, scheduled_date=None, paid=False):
+        slot = NewsletterSlot.objects.create(
+            user=self.owner, send_date=date.today(), preferred_genre='fantasy',
+            promotion_type='paid' if Decimal(price) > 0 else 'free', price=Decimal(price),
+        )
+        swap = SwapRequest.objects.create(
+            slot=slot, requester=requester or self.partner, status=status, scheduled_date=scheduled_date,
+        )
+        if paid:
+            SwapPayment.objects.create(
+                swap_request=swap, payer=swap.requester, amount=Decimal(price), status='completed',
+            )
+        return swap
+
+    def test_annotation_matches_serializer(self):
+        yesterday = date.today() - timedelta(days=1)
+        tomorrow = date.today() + timedelta(days=1)
+        self._swap('pending')
+        self._swap('pending', requester=self.owner)
+        self._swap('rejected')
+        self._swap('completed')
+        self._swap('confirmed', scheduled_date=tomorrow)
+        self._swap('confirmed', scheduled_date=yesterday)
+        self._swap('verified', scheduled_date=yesterday)
+        self._swap('confirmed', price='15.00')
+        self._swap('scheduled', price='15.00', paid=True)
+        # Unlinked direct payments: only the newest one between the pair counts
+        for name, amounts in (('stale_match', ['15.00', '9.00']), ('newest_match', ['9.00', '15.00'])):
+            payer = User.objects.create_user(username=name, email=f'{name}@example.com', password='x')
+            self._swap('confirmed', price='15.00', requester=payer)
+            for hours_ago, amount in zip((2, 1), amounts):
+                tx = PaymentTransaction.objects.create(
+                    sender=payer, receiver=self.owner, amount=Decimal(amount),
+                    transaction_type='direct_payment', status='completed',
+                )
+                PaymentTransaction.objects.filter(pk=tx.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+
+        request = type('Request', (), {'user': self.owner})()
+        for swap in annotate_effective_status(SwapRequest.objects.all(), self.owner):
+            plain = SwapRequest.objects.get(pk=swap.pk)
+            expected = SwapManagementSerializer(plain, context={'request': request}).data['status']
+            self.assertEqual(swap.effective_status, expected, f'swap {swap.pk} ({swap.status})')
+
+
+@local_backends
+class ExpirySweepTests(TestCase):
+    def test_expire_pending_swaps_rejects_and_notifies_in_bulk(self):
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        requester = User.objects.create_user(username='requester', email='requester@example.com', password='x')
+        slot = NewsletterSlot.objects.create(user=owner, send_date=date.today(), preferred_genre='fantasy')
+        stale = SwapRequest.objects.create(slot=slot, requester=requester)
+        fresh = SwapRequest.objects.create(slot=slot, requester=requester)
+        SwapRequest.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=8))
+        Notification.objects.all().delete()
+
+        with mock.patch('core.services.expiry_service.mark_dashboard_stale') as mark_stale:
+            self.assertEqual(expire_pending_swaps(batch_size=1), 1)
+        mark_stale.assert_called_once_with(owner.id, requester.id, sections=('stats', 'swap_events'))
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, 'rejected')
+        self.assertEqual(fresh.status, 'pending')
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient_id', flat=True)),
+            {owner.id, requester.id},
+        )
+
+    def test_swap_list_does_not_write(self):
+        user = User.objects.create_user(username='reader', email='reader@example.com', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/authorswap/api/swaps/')
+        self.assertFalse(any(q['sql'].lstrip().upper().startswith('UPDATE') for q in queries.captured_queries))
+
+
+@local_backends
+class SlotCapacityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        self.slot = NewsletterSlot.objects.create(
+            user=self.owner, send_date=date.today(), preferred_genre='fantasy', max_partners=1,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def _explore_ids(self):
+        response = self.client.get('/authorswap/api/slots/explore/')
+        return [item['id'] for item in response.data['results']]
+
+    def test_capacity_follows_swap_status(self):
+        swap = SwapRequest.objects.create(slot=self.slot, requester=self.viewer)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_partners_count, 0)
+        self.assertIn(self.slot.id, self._explore_ids())
+
+        swap.status = 'confirmed'
+        swap.save()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_partners_count, 1)
+        self.assertTrue(self.slot.is_full)
+        self.assertNotIn(self.slot.id, self._explore_ids())
+
+        self.slot.max_partners = 2
+        self.slot.save()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_partners_count, 1)
+        self.assertFalse(self.slot.is_full)
+
+        swap.delete()
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.active_partners_count, 0)
+
+    def test_sending_swaps_count_as_partners(self):
+        SwapRequest.objects.create(slot=self.slot, requester=self.viewer, status='sending')
+        self.slot.refresh_from_db()
+
+        self.assertEqual(NewsletterSlotSerializer(self.slot).data['current_partners_count'], 1)
+        self.assertEqual(SlotExploreSerializer(self.slot).data['current_partners_count'], 1)
+        self.assertNotIn(self.slot.id, self._explore_ids())
+
+
+@local_backends
+class PartnerGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.partner = User.objects.create_user(username='partner', email='partner@example.com', password='x')
+        self.slot = NewsletterSlot.objects.create(user=self.owner, send_date=date.today(), preferred_genre='fantasy')
+
+    def test_partner_sets_follow_swap_status(self):
+        swap = SwapRequest.objects.create(slot=self.slot, requester=self.partner)
+        self.assertFalse(is_partner(self.owner, self.partner))
+        self.assertTrue(is_partner(self.owner, self.partner, include_pending=True))
+
+        # Served from cache once computed
+        with self.assertNumQueries(0):
+            self.assertEqual(partners_of(self.owner), frozenset())
+
+        swap.status = 'confirmed'
+        swap.save()
+        self.assertTrue(is_partner(self.owner, self.partner))
+        self.assertTrue(is_partner(self.partner, self.owner))
+
+        swap.status = 'rejected'
+        swap.save()
+        self.assertFalse(is_partner(self.partner, self.owner, include_pending=True))
+
+
+@local_backends
+class BestMatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_feature_index()
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        self.viewer.profile.primary_genre = 'fantasy'
+        self.viewer.profile.save()
+        subgenre = Subgenre.objects.create(parent_genre='fantasy', name='Epic / High Fantasy', slug='epic')
+        self.viewer.profile.subgenres.add(subgenre)
+
+        self.subgenre = subgenre
+        owner = self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.romance = NewsletterSlot.objects.create(user=owner, send_date=date.today(), preferred_genre='romance')
+        self.fantasy = NewsletterSlot.objects.create(user=owner, send_date=date.today(), preferred_genre='fantasy')
+        self.epic = NewsletterSlot.objects.create(
+            user=owner, send_date=date.today(), preferred_genre='fantasy', subgenres='epic'
+        )
+
+    def test_rank_orders_by_compatibility(self):
+        ranked = rank_slots(self.viewer, [self.romance.id, self.fantasy.id, self.epic.id])
+        self.assertEqual([slot_id for slot_id, _ in ranked], [self.epic.id, self.fantasy.id, self.romance.id])
+
+    def test_writes_update_a_warm_index(self):
+        slot_ids = [self.romance.id, self.fantasy.id, self.epic.id]
+        rank_slots(self.viewer, slot_ids)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.epic.preferred_genre = 'romance'
+            self.epic.save()
+        self.assertEqual([slot_id for slot_id, _ in rank_slots(self.viewer, slot_ids)][0], self.fantasy.id)
+
+        # The owner's subgenres count for all of their slots
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owner.profile.subgenres.add(self.subgenre)
+        self.assertEqual(dict(rank_slots(self.viewer, slot_ids))[self.romance.id], dict(rank_slots(self.viewer, slot_ids))[self.epic.id])
+
+    def test_stale_index_is_served_while_rebuilt(self):
+        slot_ids = [self.romance.id, self.fantasy.id, self.epic.id]
+        rank_slots(self.viewer, slot_ids)
+        stale = matching_service.get_feature_index()
+        stale.built_at -= matching_service.FEATURE_INDEX_TTL + 1
+
+        with override_settings(MATCHING_INDEX_ASYNC=True), \
+                mock.patch.object(matching_service._executor, 'submit') as submit:
+            self.assertIs(matching_service.get_feature_index(), stale)
+            self.assertIs(matching_service.get_feature_index(), stale)
+        # One rebuild is scheduled, however many requests see the stale index
+        submit.assert_called_once_with(matching_service._refresh_in_background)
+
+        submit.call_args.args[0]()
+        self.assertIsNot(matching_service.get_feature_index(), stale)
+
+    def test_explore_best_match_sort(self):
+        client = APIClient()
+        client.force_authenticate(self.viewer)
+        response = client.get('/authorswap/api/slots/explore/', {'sort': 'best_match'})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(results[0]['id'], self.epic.id)
+        self.assertGreater(results[0]['match_score'], results[-1]['match_score'])
+
+
+@local_backends
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.viewer = User.objects.create_user(username='viewer', email='viewer@example.com', password='x')
+        slots = [
+            NewsletterSlot.objects.create(user=owner, send_date=date.today(), preferred_genre='fantasy')
+            for _ in range(5)
+        ]
+        # Ties on created_at must still page deterministically by id
+        NewsletterSlot.objects.filter(pk__in=[s.pk for s in slots[:3]]).update(created_at=timezone.now())
+        self.slot_ids = {s.pk for s in slots}
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+
+    def test_walks_every_slot_once_without_count(self):
+        seen = []
+        url = '/authorswap/api/slots/explore/?pagination=cursor&page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertFalse(any(
+                q['sql'].startswith('SELECT COUNT(*) AS "__count" FROM "core_newsletterslot"')
+                for q in queries.captured_queries
+            ))
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), len(self.slot_ids))
+        self.assertEqual(set(seen), self.slot_ids)
+
+    def test_optional_count_and_bad_cursor(self):
+        response = self.client.get('/authorswap/api/slots/explore/', {'pagination': 'cursor', 'include_count': 'true'})
+        self.assertEqual(response.data['count'], 5)
+        response = self.client.get('/authorswap/api/slots/explore/', {'pagination': 'cursor', 'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+
+@local_backends
+class ConversationSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='me', email='me@example.com', password='x')
+        self.partners = [
+            User.objects.create_user(username=f'p{i}', email=f'p{i}@example.com', password='x') for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def _send(self, sender, recipient, content):
+        self.client.force_authenticate(sender)
+        response = self.client.post(f'/authorswap/api/chat/{recipient.id}/send/', {'content': content})
+        self.assertEqual(response.status_code, 201)
+
+    def _inbox(self):
+        self.client.force_authenticate(self.user)
+        return {row['user_id']: row for row in self.client.get('/authorswap/api/chat/conversations/').data}
+
+    def test_send_and_read_update_summary(self):
+        self._send(self.partners[0], self.user, 'hello')
+        self._send(self.partners[0], self.user, 'are you there?')
+        self._send(self.user, self.partners[1], 'hi')
+
+        inbox = self._inbox()
+        self.assertEqual(inbox[self.partners[0].id]['last_message'], 'are you there?')
+        self.assertEqual(inbox[self.partners[0].id]['unread_count'], 2)
+        self.assertEqual(inbox[self.partners[1].id]['unread_count'], 0)
+
+        self.client.get(f'/authorswap/api/chat/history/{self.partners[0].id}/')
+        self.assertEqual(self._inbox()[self.partners[0].id]['unread_count'], 0)
+
+    def test_inbox_returns_the_whole_last_message(self):
+        long_message = 'x' * 300
+        self._send(self.partners[0], self.user, long_message)
+
+        row = self._inbox()[self.partners[0].id]
+        self.assertEqual(row['lastMessage'], long_message)
+        self.assertEqual(row['last_message'], long_message[:80])
+
+        NewsletterSlot.objects.create(user=self.partners[0], send_date=date.today(), preferred_genre='fantasy')
+        self.client.force_authenticate(self.user)
+        partners = {row['id']: row for row in self.client.get('/authorswap/api/chat/my-partners/').data}
+        self.assertEqual(partners[self.partners[0].id]['last_message'], long_message)
+
+    def test_inbox_query_count_is_flat(self):
+        # Conversations, latest swap statuses and profiles, however many partners there are
+        expected_queries = 3
+        self._send(self.partners[0], self.user, 'one')
+        self.client.force_authenticate(self.user)
+        self.client.get('/authorswap/api/chat/conversations/')  # warm the partner graph cache
+        with self.assertNumQueries(expected_queries):
+            self.client.get('/authorswap/api/chat/conversations/')
+
+        for partner in self.partners[1:]:
+            self._send(partner, self.user, 'more')
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(expected_queries):
+            self.client.get('/authorswap/api/chat/conversations/')
+
+    def test_windowed_history(self):
+        for i in range(5):
+            self._send(self.partners[0], self.user, f'm{i}')
+        self.client.force_authenticate(self.user)
+        url = f'/authorswap/api/chat/history/{self.partners[0].id}/'
+
+        # Participants' profiles are loaded once, not per message
+        with self.assertNumQueries(5):  # other user, window, mark read (2), profiles
+            latest = self.client.get(url, {'limit': 2}).data
+        self.assertEqual([m['content'] for m in latest['results']], ['m3', 'm4'])
+        self.assertTrue(latest['has_more'])
+
+        older = self.client.get(url, {'limit': 10, 'before_id': latest['oldest_id']}).data
+        self.assertEqual([m['content'] for m in older['results']], ['m0', 'm1', 'm2'])
+        self.assertFalse(older['has_more'])
+
+        newer = self.client.get(url, {'after_id': older['newest_id']}).data
+        self.assertEqual([m['content'] for m in newer['results']], ['m3', 'm4'])
+
+        self.assertEqual(len(self.client.get(url).data), 5)
+
+
+@local_backends
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='x')
+        self.other = User.objects.create_user(username='writer', email='writer@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _counts(self):
+        return self.client.get('/authorswap/api/notifications/unread-count/').data
+
+    def test_counters_follow_creates_and_reads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(recipient=self.user, title='t', message='m')
+            ChatMessage.objects.create(sender=self.other, recipient=self.user, content='hi')
+            ChatMessage.objects.create(sender=self.other, recipient=self.user, content='again')
+            email = Email.objects.create(sender=self.other, recipient=self.user, folder='inbox')
+        self.assertEqual(self._counts(), {'notifications': 1, 'chat': 2, 'email': 1, 'total': 4})
+
+        # Served from the cache until something changes
+        with self.assertNumQueries(0):
+            get_unread_counts(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(f'/authorswap/api/chat/history/{self.other.id}/')
+            self.client.get(f'/authorswap/api/emails/{email.id}/')
+        self.assertEqual(self._counts(), {'notifications': 1, 'chat': 0, 'email': 0, 'total': 1})
+
+    def test_writes_for_uncached_users_skip_the_database(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Notification.objects.create(recipient=self.user, title='t', message='m')
+        with mock.patch('core.services.unread_counter_service.publish_unread_counts') as publish, \
+                self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+        publish.assert_not_called()
+
+        # Once read (and so cached), later writes are pushed from the cache
+        self.assertEqual(self._counts()['notifications'], 1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Notification.objects.create(recipient=self.user, title='t', message='m')
+        with mock.patch('core.services.unread_counter_service.publish_unread_counts') as publish, \
+                self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+        self.assertEqual(publish.call_args.args[0][self.user.id]['notifications'], 2)
+
+    def test_folder_moves_recompute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            emails = [Email.objects.create(sender=self.other, recipient=self.user, folder='inbox') for _ in range(3)]
+        self.assertEqual(self._counts()['email'], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/authorswap/api/emails/{emails[0].id}/', {'folder': 'spam'}, format='json')
+            self.client.delete(f'/authorswap/api/emails/{emails[1].id}/')
+        self.assertEqual(self._counts()['email'], 1)
+
+    def test_bulk_actions_recompute(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            emails = [Email.objects.create(sender=self.other, recipient=self.user, folder='inbox') for _ in range(3)]
+        self.assertEqual(self._counts()['email'], 3)
+
+        def bulk(action, ids):
+            request = APIRequestFactory().post('/authorswap/api/emails/action/', {'email_ids': ids, 'action': action}, format='json')
+            force_authenticate(request, self.user)
+            # The view runs in autocommit, where on_commit callbacks fire at once
+            with mock.patch('core.services.unread_counter_service.transaction.on_commit', side_effect=lambda fn: fn()), \
+                    mock.patch('core.services.unread_counter_service.publish_unread_counts') as publish:
+                self.assertEqual(EmailActionView.as_view()(request).status_code, 200)
+            return publish.call_args.args[0][self.user.id]['email']
+
+        # The pushed counts already reflect the update, and so does the next read
+        self.assertEqual(bulk('mark_read', [emails[0].id]), 2)
+        self.assertEqual(self._counts()['email'], 2)
+        self.assertEqual(bulk('move_to_trash', [emails[1].id]), 1)
+        self.assertEqual(self._counts()['email'], 1)
+
+
+@local_backends
+class NotificationFanoutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='listener', email='listener@example.com', password='x')
+        self.layer = get_channel_layer()
+        self.channel = async_to_sync(self.layer.new_channel)()
+        async_to_sync(self.layer.group_add)(group_name(self.user.id), self.channel)
+
+    def _received(self):
+        messages = []
+        while self.layer.channels.get(self.channel):
+            messages.append(async_to_sync(self.layer.receive)(self.channel))
+        return messages
+
+    def test_delivered_after_commit_in_one_message_per_recipient(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            with transaction.atomic():
+                created = Notification.objects.bulk_create([
+                    Notification(recipient=self.user, title=f't{i}', message='m') for i in range(3)
+                ])
+                publish_notifications(created)
+        self.assertEqual(self._received(), [])
+
+        for callback in callbacks:
+            callback()
+        messages = self._received()
+        self.assertEqual([m['type'] for m in messages], ['send_notifications'])
+        self.assertEqual([n['title'] for n in messages[0]['notifications']], ['t0', 't1', 't2'])
+
+
+@local_backends
+class NotifyManyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            User.objects.create_user(username=f'n{i}', email=f'n{i}@example.com', password='x') for i in range(3)
+        ]
+
+    def test_one_insert_and_counters(self):
+        for user in self.users:
+            get_unread_counts(user)  # prime the cached counters
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                notify_many([
+                    {'recipient': self.users[0], 'title': 'a', 'message': 'm'},
+                    {'recipient': self.users[0], 'title': 'b', 'message': 'm'},
+                    {'recipient': self.users[1], 'title': 'c', 'message': 'm'},
+                ])
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual([get_unread_counts(u)['notifications'] for u in self.users], [2, 1, 0])
+
+    def test_segment_broadcast_by_genre(self):
+        for user, genre in zip(self.users, ['fantasy', 'Fantasy', 'romance']):
+            user.profiles.update(primary_genre=genre)
+
+        call_command('send_notification', 'segment', 'New feature!', genre='fantasy', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            sorted(Notification.objects.values_list('recipient__username', flat=True)),
+            ['n0', 'n1'],
+        )
+
+
+@local_backends
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='keeper', email='keeper@example.com', password='x')
+
+    def _create(self, title, days_old):
+        notification = Notification.objects.create(recipient=self.user, title=title, message='m')
+        Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+        return notification
+
+    def test_purge_archives_by_month(self):
+        old = [self._create(f'old{i}', 200 + i) for i in range(3)]
+        self._create('fresh', 1)
+
+        purged = purge_notifications(retention_days=90, archive=True, batch_size=2)
+
+        self.assertEqual(purged, 3)
+        self.assertEqual(list(Notification.objects.values_list('title', flat=True)), ['fresh'])
+        archives = NotificationArchive.objects.filter(user=self.user)
+        self.assertEqual(sum(a.count for a in archives), 3)
+        archived_ids = sorted(row[0] for a in archives for row in a.notifications)
+        self.assertEqual(archived_ids, sorted(n.id for n in old))
+        self.assertEqual(get_unread_counts(self.user)['notifications'], 1)
+
+    def test_recent_activity_ring_buffer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(RING_SIZE + 2):
+                Notification.objects.create(recipient=self.user, title=f't{i}', message='m')
+        self.assertEqual(len(recent_notifications(self.user)), RING_SIZE)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(recipient=self.user, title='newest', message='m')
+        with self.assertNumQueries(0):
+            entries = recent_notifications(self.user)
+        self.assertEqual([e['title'] for e in entries[:2]], ['newest', f't{RING_SIZE + 1}'])
+        self.assertEqual(len(entries), RING_SIZE)
+
+
+@local_backends
+class DashboardSnapshotTests(TestCase):
+    URL = '/authorswap/api/author-dashboard/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _add_book(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(user=self.user, title=title, primary_genre='fantasy', subgenres='')
+
+    def test_warm_load_skips_snapshot_queries(self):
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(self.URL)
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(warm), len(cold) - 5)
+
+    def test_write_is_served_stale_then_refreshed(self):
+        self._add_book('First')
+        self.assertEqual(self.client.get(self.URL).data['stats_cards']['book'], 1)
+
+        self._add_book('Second')
+        # Stale-while-revalidate: this read still sees the old count and triggers the rebuild
+        self.assertEqual(self.client.get(self.URL).data['stats_cards']['book'], 1)
+        self.assertEqual(self.client.get(self.URL).data['stats_cards']['book'], 2)
+
+
+@local_backends
+class CampaignMetricsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.today = date(2026, 3, 15)
+
+    def _campaign(self, days_ago, open_rate, click_rate):
+        CampaignAnalytic.objects.create(
+            user=self.user, name=f'c{days_ago}', date=self.today - timedelta(days=days_ago),
+            subscribers=100, open_rate=open_rate, click_rate=click_rate,
+        )
+
+    def test_windows_in_one_query(self):
+        self._campaign(0, 90, 9)    # today: not sent yet
+        self._campaign(5, 40, 4)
+        self._campaign(10, 20, 2)
+        self._campaign(45, 10, 1)
+
+        with self.assertNumQueries(1):
+            metrics = campaign_metrics(self.user, today=self.today)
+
+        self.assertEqual(metrics['sent'], {'open_rate': 70 / 3, 'click_rate': 7 / 3, 'count': 3})
+        self.assertEqual(metrics['current_period']['open_rate'], 30)
+        self.assertEqual(metrics['previous_period']['click_rate'], 1)
+        self.assertEqual(sorted(metrics['monthly']), [1, 3])
+        self.assertEqual(metrics['monthly'][3]['count'], 3)
+        self.assertEqual(metrics['monthly'][1]['open_rate'], 10)
+
+
+@local_backends
+class CalendarRollupTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.partner = User.objects.create_user(username='partner', email='partner@example.com', password='x')
+        self.day = date(2026, 5, 10)
+        self.slot = NewsletterSlot.objects.create(user=self.owner, send_date=self.day, preferred_genre='fantasy')
+
+    def _day(self, day, **filters):
+        return month_calendar(self.owner, day.year, day.month, **filters)[day.day - 1]
+
+    def test_rollup_follows_slot_and_swap_writes(self):
+        NewsletterSlot.objects.create(user=self.owner, send_date=self.day, preferred_genre='romance', visibility='hidden')
+        swap = SwapRequest.objects.create(slot=self.slot, requester=self.partner)
+        SwapRequest.objects.create(slot=self.slot, requester=self.partner, status='scheduled')
+
+        day = self._day(self.day)
+        self.assertEqual((day['slot_count'], day['public_slots']), (2, 1))
+        self.assertEqual((day['pending_swaps'], day['scheduled_swaps']), (1, 1))
+        self.assertEqual(self._day(self.day, genre='romance')['pending_swaps'], 0)
+
+        swap.status = 'verified'
+        swap.save()
+        self.assertEqual((self._day(self.day)['pending_swaps'], self._day(self.day)['verified_swaps']), (0, 1))
+
+        moved_to = self.day + timedelta(days=1)
+        self.slot.send_date = moved_to
+        self.slot.save()
+        self.assertEqual(self._day(self.day)['slot_count'], 1)
+        self.assertEqual(self._day(moved_to)['verified_swaps'], 1)
+
+        self.slot.delete()
+        self.assertEqual(self._day(moved_to)['slot_count'], 0)
+
+    def test_month_read_is_one_query_and_rebuild_matches(self):
+        SwapRequest.objects.create(slot=self.slot, requester=self.partner, status='confirmed')
+        with self.assertNumQueries(1):
+            days = month_calendar(self.owner, 2026, 5)
+        self.assertEqual(len(days), 31)
+
+        expected = list(CalendarDay.objects.values_list('date', 'slot_count', 'confirmed_swaps'))
+        CalendarDay.objects.all().delete()
+        rebuild_calendar()
+        self.assertEqual(list(CalendarDay.objects.values_list('date', 'slot_count', 'confirmed_swaps')), expected)
+
+
+@local_backends
+class BookStatsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.partner = User.objects.create_user(username='partner', email='partner@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        slot = NewsletterSlot.objects.create(user=self.partner, send_date=date.today(), preferred_genre='fantasy')
+        for i in range(4):
+            book = Book.objects.create(
+                user=self.user, title=f'b{i}', primary_genre='fantasy', subgenres='',
+                is_active=i < 3, is_primary_promo=i == 0,
+            )
+            for _ in range(i):
+                SwapRequest.objects.create(slot=slot, requester=self.user, book=book)
+
+    def test_book_list_counts_swaps_without_per_book_queries(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/authorswap/api/add-book/')
+        self.assertEqual(sorted(book['swap_count'] for book in response.data), [0, 1, 2, 3])
+
+    def test_stats_cards_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/authorswap/api/book-management-stats/')
+        self.assertEqual(
+            (response.data['total_books'], response.data['active_promotions'], response.data['primary_promo']),
+            (4, 3, 1),
+        )
+
+
+@local_backends
+class MailerLiteSyncTests(TestCase):
+    URL = '/authorswap/api/subscriber-analytics/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_analytics_only_syncs_stale_snapshots(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        synced_at = SubscriberVerification.objects.get(user=self.user).last_verified_at
+        self.assertIsNotNone(synced_at)
+
+        self.client.get(self.URL)
+        self.assertEqual(SubscriberVerification.objects.get(user=self.user).last_verified_at, synced_at)
+
+        SubscriberVerification.objects.filter(user=self.user).update(last_verified_at=timezone.now() - timedelta(days=1))
+        self.client.get(self.URL)
+        self.assertGreater(SubscriberVerification.objects.get(user=self.user).last_verified_at, synced_at)
+
+    def test_token_bucket_waits_for_refill(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        started = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_status_counts_fetched_concurrently_and_cached(self):
+        totals = {'active': 7, 'unsubscribed': 2, 'unconfirmed': 1, 'bounced': 0, 'junk': 0}
+
+        def fake_request(method, url, params=None, **kwargs):
+            time.sleep(0.2)
+            response = mock.Mock(status_code=200)
+            response.json.return_value = {'total': totals.get(params.get('filter[status]'), 10)}
+            return response
+
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=fake_request) as request:
+            started = time.monotonic()
+            counts = get_subscriber_counts_by_status('mlsn.concurrent-test')
+            elapsed = time.monotonic() - started
+            self.assertEqual(request.call_count, 6)
+            self.assertLess(elapsed, 0.6)
+            self.assertEqual(counts['active'], 7)
+            self.assertEqual(counts['dashboard_total'], 10)
+
+            self.assertEqual(get_subscriber_counts_by_status('mlsn.concurrent-test'), counts)
+            self.assertEqual(request.call_count, 6)
+
+    def test_status_counts_stay_within_deadline(self):
+        def fake_request(method, url, params=None, timeout=None, **kwargs):
+            if params.get('filter[status]') == 'bounced':
+                return mock.Mock(status_code=503, headers={'Retry-After': '0'}, text='')
+            response = mock.Mock(status_code=200, headers={})
+            response.json.return_value = {'total': 5}
+            return response
+
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=fake_request) as request:
+            counts = get_subscriber_counts_by_status('mlsn.deadline-test')
+        # One attempt per query, each given no more than the shared deadline
+        self.assertEqual(request.call_count, 6)
+        self.assertTrue(all(0 < call.kwargs['timeout'] <= 10 for call in request.call_args_list))
+        self.assertEqual(counts['bounced'], 0)
+        self.assertEqual(counts['active'], 5)
+
+    def test_client_retries_server_errors(self):
+        client = MailerLiteClient('mlsn.retry-test')
+        responses = [mock.Mock(status_code=503, headers={'Retry-After': '0'}), mock.Mock(status_code=200, headers={})]
+
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=responses) as request:
+            response = client.get('https://connect.mailerlite.com/api/subscribers')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(request.call_args.kwargs['headers']['Authorization'], 'Bearer mlsn.retry-test')
+
+    def test_circuit_opens_after_repeated_failures(self):
+        client = MailerLiteClient('mlsn.breaker-test')
+        failing = mock.Mock(status_code=500, headers={'Retry-After': '0'})
+
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=failing) as request:
+            for _ in range(mailerlite_client.BREAKER_THRESHOLD):
+                client.get('https://connect.mailerlite.com/api/subscribers')
+            sent = request.call_count
+            with self.assertRaises(CircuitOpenError):
+                MailerLiteClient('mlsn.breaker-test').get('https://connect.mailerlite.com/api/subscribers')
+            self.assertEqual(request.call_count, sent)
+            # Other accounts are unaffected
+            MailerLiteClient('mlsn.other-key').get('https://connect.mailerlite.com/api/subscribers')
+            self.assertEqual(request.call_count, sent + 1 + mailerlite_client.MAX_RETRIES)
+
+    def test_half_open_trial_error_does_not_wedge_breaker(self):
+        client = MailerLiteClient('mlsn.trial-test')
+        client._breaker.reset_after = 0
+        failing = mock.Mock(status_code=500, headers={'Retry-After': '0'})
+        ok = mock.Mock(status_code=200, headers={})
+
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=failing):
+            for _ in range(mailerlite_client.BREAKER_THRESHOLD):
+                client.get('https://connect.mailerlite.com/api/subscribers')
+        # The half-open trial dies with an error that isn't retried
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=requests.exceptions.ChunkedEncodingError):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                client.get('https://connect.mailerlite.com/api/subscribers')
+        # The next trial is still allowed through and closes the breaker
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=ok):
+            self.assertEqual(client.get('https://connect.mailerlite.com/api/subscribers').status_code, 200)
+
+
+@local_backends
+@override_settings(
+    MAILERLITE_API_KEY='mlsn.outbox-test',
+    MAILERLITE_PENDING_GROUP_ID='10',
+    MAILERLITE_APPROVED_GROUP_ID='20',
+    MAILERLITE_REJECTED_GROUP_ID='30',
+)
+class MailerLiteOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='x')
+        self.requester = User.objects.create_user(username='requester', email='requester@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+        slot = NewsletterSlot.objects.create(user=self.owner, send_date=date.today(), preferred_genre='fantasy')
+        self.swap = SwapRequest.objects.create(slot=slot, requester=self.requester)
+
+    def _batch_response(self, codes):
+        response = mock.Mock(status_code=200, headers={})
+        response.json.return_value = {'responses': [{'code': code} for code in codes]}
+        return response
+
+    def test_drain_replays_moves_between_groups_in_order(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            enqueue_group_move('a@example.com', 'approved')
+            enqueue_group_move('a@example.com', 'pending')
+
+        # Groups aren't exclusive: a ends up in both Approved and Pending
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=self._batch_response([201, 200, 201])) as request:
+            self.assertEqual(drain_outbox(), (2, 0))
+        self.assertEqual(request.call_args.kwargs['json']['requests'], [
+            {'method': 'POST', 'path': 'api/groups/20/subscribers', 'body': {'email': 'a@example.com'}},
+            {'method': 'DELETE', 'path': 'api/groups/10/subscribers/a@example.com'},
+            {'method': 'POST', 'path': 'api/groups/10/subscribers', 'body': {'email': 'a@example.com'}},
+        ])
+
+    def test_command_reports_and_purges_dead_letters(self):
+        old = MailerLiteGroupChange.objects.create(email='old@example.com', target='approved', attempts=8)
+        MailerLiteGroupChange.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=8))
+        MailerLiteGroupChange.objects.create(email='new@example.com', target='approved', attempts=8)
+
+        out = StringIO()
+        call_command('drain_mailerlite_outbox', stdout=out)
+        self.assertIn('dead=2 purged=1', out.getvalue())
+        self.assertEqual(list(MailerLiteGroupChange.objects.values_list('email', flat=True)), ['new@example.com'])
+
+    def test_accept_writes_outbox_and_drains_after_commit(self):
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=self._batch_response([201, 404])) as request:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/authorswap/api/accept-swap/{self.swap.pk}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(request.call_count, 0)
+
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(request.call_args.args[1], 'https://connect.mailerlite.com/api/batch')
+        self.assertEqual(request.call_args.kwargs['json']['requests'], [
+            {'method': 'POST', 'path': 'api/groups/20/subscribers', 'body': {'email': 'requester@example.com'}},
+            {'method': 'DELETE', 'path': 'api/groups/10/subscribers/requester@example.com'},
+        ])
+        change = MailerLiteGroupChange.objects.get()
+        self.assertIsNotNone(change.processed_at)
+
+    def test_drain_collapses_repeats_and_retries_failures(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            enqueue_group_move('a@example.com', 'rejected')
+            enqueue_group_move('a@example.com', 'rejected')
+            enqueue_group_move('b@example.com', 'approved')
+
+        # a: add to Rejected, leave Pending (once); b: add to Approved fails
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=self._batch_response([201, 200, 500, 200])) as request:
+            self.assertEqual(drain_outbox(), (2, 1))
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(len(request.call_args.kwargs['json']['requests']), 4)
+
+        failed = MailerLiteGroupChange.objects.get(processed_at__isnull=True)
+        self.assertEqual((failed.email, failed.attempts), ('b@example.com', 1))
+
+        with mock.patch.object(mailerlite_client._session, 'request', return_value=self._batch_response([201, 200])):
+            self.assertEqual(drain_outbox(), (1, 0))
+        self.assertFalse(MailerLiteGroupChange.objects.filter(processed_at__isnull=True).exists())
+
+
+@local_backends
+class CampaignImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author', email='author@example.com', password='x')
+        self.verification = SubscriberVerification.objects.create(user=self.user)
+        self.client_ = MailerLiteClient('mlsn.import-test')
+        now = timezone.now()
+        # 250 sent campaigns, newest first, as MailerLite lists them
+        self.campaigns = [
+            {
+                'id': str(1000 - i), 'subject': f'Issue {1000 - i}',
+                'sent_at': (now - timedelta(days=i + 1)).strftime('%Y-%m-%d %H:%M:%S'),
+                'total_recipients': 500, 'open_rate': 40.0, 'click_rate': 4.0,
+            }
+            for i in range(250)
+        ]
+
+    def _serve(self, method, url, params=None, **kwargs):
+        page = params['page']
+        chunk = self.campaigns[(page - 1) * 100:page * 100]
+        response = mock.Mock(status_code=200, headers={})
+        response.json.return_value = {
+            'data': chunk,
+            'links': {'next': 'more' if page * 100 < len(self.campaigns) else None},
+        }
+        return response
+
+    def test_backfills_history_then_imports_incrementally(self):
+        CampaignAnalytic.objects.create(
+            user=self.user, name='Issue 1000', date=date.today(), subscribers=1, open_rate=0, click_rate=0,
+        )
+
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=self._serve) as request:
+            self.assertEqual(import_campaigns(self.user, self.client_, self.verification), 250)
+            self.assertEqual(request.call_count, 3)
+        # The campaign previously matched by name was adopted, not duplicated
+        self.assertEqual(CampaignAnalytic.objects.filter(user=self.user).count(), 250)
+        self.assertEqual(CampaignAnalytic.objects.get(provider_campaign_id='1000').subscribers, 500)
+
+        self.verification.refresh_from_db()
+        high_water = self.verification.campaigns_synced_through
+        self.assertIsNotNone(high_water)
+
+        self.campaigns.insert(0, {
+            'id': '1001', 'subject': 'Issue 1001', 'sent_at': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_recipients': 600, 'open_rate': 50.0, 'click_rate': 5.0,
+        })
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=self._serve) as request:
+            import_campaigns(self.user, self.client_, self.verification)
+            # Only the first page is newer than the high-water mark minus the refresh window
+            self.assertEqual(request.call_count, 1)
+        self.assertEqual(CampaignAnalytic.objects.filter(user=self.user).count(), 251)
+        self.assertGreater(self.verification.campaigns_synced_through, high_water)
+
+    def test_undated_campaigns_stop_at_first_known_page(self):
+        for campaign in self.campaigns:
+            del campaign['sent_at']
+
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=self._serve) as request, \
+                self.assertLogs('core.services.campaign_import_service', 'WARNING') as logs:
+            self.assertEqual(import_campaigns(self.user, self.client_, self.verification), 250)
+            self.assertEqual(request.call_count, 3)
+        self.assertIsNone(self.verification.campaigns_synced_through)
+        self.assertIn('did not advance', logs.output[-1])
+
+        self.campaigns.insert(0, {'id': '1001', 'subject': 'Issue 1001', 'total_recipients': 600})
+        with mock.patch.object(mailerlite_client._session, 'request', side_effect=self._serve) as request:
+            import_campaigns(self.user, self.client_, self.verification)
+            # The second page holds only campaigns imported last time
+            self.assertEqual(request.call_count, 2)
+        self.assertEqual(CampaignAnalytic.objects.filter(user=self.user).count(), 251)
+
+
+@local_backends
+class AudienceSizeTests(TestCase):
+    def setUp(self):
+        clear_audience_cache()
+        self.users = [User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='x') for i in range(3)]
+        for i, user in enumerate(self.users[:2]):
+            SubscriberVerification.objects.create(user=user, active_subscribers=100 * (i + 1))
+            for month in ('Jan', 'Feb'):
+                SubscriberGrowth.objects.create(user=user, month=month, count=1)
+        SubscriberGrowth.objects.create(user=self.users[2], month='Jan', count=7)
+        self.growth = list(SubscriberGrowth.objects.all())
+
+    def test_page_resolves_audience_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = SubscriberGrowthSerializer(self.growth, many=True).data
+        self.assertEqual([row['count'] for row in data], [100, 100, 200, 200, 7])
+
+    @override_settings(AUDIENCE_CACHE_TTL=60)
+    def test_process_cache_is_invalidated_on_save(self):
+        SubscriberGrowthSerializer(self.growth, many=True).data
+        with self.assertNumQueries(0):
+            SubscriberGrowthSerializer(self.growth, many=True).data
+
+        verification = SubscriberVerification.objects.get(user=self.users[0])
+        verification.active_subscribers = 150
+        verification.save()
+        with self.assertNumQueries(1):
+            data = SubscriberGrowthSerializer(self.growth, many=True).data
+        self.assertEqual(data[0]['count'], 150)
+
+
+@local_backends
+class PrimaryProfileTests(TestCase):
+    def setUp(self):
+        # The post_save signal gives each user their first Profile; add a duplicate
+        self.users = [User.objects.create_user(username=f'u{i}', email=f'u{i}@example.com', password='x') for i in range(3)]
+        for user in self.users:
+            Profile.objects.create(user=user, name=f'{user.username} duplicate')
+
+    def test_lowest_pk_wins_and_prefetch_needs_no_queries(self):
+        users = list(User.objects.filter(pk__in=[u.pk for u in self.users]).prefetch_related(Profile.objects.prefetch_primary()))
+        with self.assertNumQueries(0):
+            names = [Profile.objects.primary_for(user).name for user in users]
+        self.assertEqual(names, [user.username for user in self.users])
+        self.assertEqual(Profile.objects.primary_for(self.users[0]).name, 'u0')
+
+    def test_request_memo_is_shared_and_forgotten_on_save(self):
+        user = self.users[0]
+        with primary_profile_memo():
+            profile = Profile.objects.primary_for(user)
+            with self.assertNumQueries(0):
+                self.assertIs(Profile.objects.primary_for(User(pk=user.pk)), profile)
+
+            profile.name = 'renamed'
+            profile.save()
+            with self.assertNumQueries(1):
+                self.assertEqual(Profile.objects.primary_for(user).name, 'renamed')
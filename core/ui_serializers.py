@@ -1,6 +1,13 @@
 from rest_framework import serializers
 from django.utils import timezone
 from .models import NewsletterSlot, SwapRequest, Book, Profile
+from .services.audience_service import serializer_audience_size
+
+
+def _primary_profile_data(parent, serializer_class, user):
+    """Nested representation of `user`'s primary Profile, or None."""
+    profile = Profile.objects.primary_for(user)
+    return serializer_class(profile, context=parent.context).data if profile else None
 
 class AuthorProfileSerializer(serializers.ModelSerializer):
     """Used for nested author representations"""
@@ -20,7 +27,7 @@ class AuthorProfileSerializer(serializers.ModelSerializer):
 
 class SlotExploreSerializer(serializers.ModelSerializer):
     """Serializer for Figma Screen 3 - Swap Partner Explorer"""
-    author = AuthorProfileSerializer(source='user.profiles.first', read_only=True)
+    author = serializers.SerializerMethodField()
     current_partners_count = serializers.SerializerMethodField()
     audience_size = serializers.SerializerMethodField()  # Override to use active subscribers
 
@@ -35,17 +42,18 @@ class SlotExploreSerializer(serializers.ModelSerializer):
             'current_partners_count', 'max_partners', 'author'
         ]
 
+    def get_author(self, obj):
+        return _primary_profile_data(self, AuthorProfileSerializer, obj.user)
+
     def get_audience_size(self, obj):
         """Return active subscribers count instead of total audience size"""
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=obj.user)
-            return verification.active_subscribers
-        except SubscriberVerification.DoesNotExist:
-            return 0
+        # Free when the explorer loaded user__verification with select_related
+        return serializer_audience_size(self, obj.user, user_of=lambda slot: slot.user_id) or 0
 
     def get_current_partners_count(self, obj):
-        return obj.swap_requests.filter(status__in=['confirmed', 'verified', 'scheduled', 'completed']).count()
+        # Same count as SlotDetailsSerializer and the explorer's is_full filter,
+        # so 'sending' swaps occupy a place here too
+        return obj.active_partners_count
 
     def get_formatted_send_date_time(self, obj):
         """Returns formatted date and time like 'Wednesday, May 15 at 10:00 AM EST'"""
@@ -66,10 +74,15 @@ class SlotExploreSerializer(serializers.ModelSerializer):
     def get_share_url(self, obj):
         return f"http://72.61.251.114/authorswap-frontend/slot-detail/{obj.id}/"
 
+def _partner_user_id(swap):
+    """The user whose slot SlotPartnerSerializer shows as the partner's."""
+    return swap.offered_slot.user_id if swap.offered_slot else swap.requester_id
+
+
 class SlotPartnerSerializer(serializers.ModelSerializer):
     """Used to serialize SwapRequest instances as partners inside a Slot"""
-    author = AuthorProfileSerializer(source='requester.profiles.first', read_only=True)
-    rating = serializers.FloatField(source='requester.profiles.first.reputation_score', read_only=True)
+    author = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
     status = serializers.SerializerMethodField()
     
     # "You" is the owner of the slot. You are sending the partner's book in your slot.
@@ -89,6 +102,13 @@ class SlotPartnerSerializer(serializers.ModelSerializer):
     # Partner's audience size from offered slot
     partner_audience_size = serializers.SerializerMethodField()
 
+    def get_author(self, obj):
+        return _primary_profile_data(self, AuthorProfileSerializer, obj.requester)
+
+    def get_rating(self, obj):
+        profile = Profile.objects.primary_for(obj.requester)
+        return profile.reputation_score if profile else None
+
     def get_status(self, obj):
         # For free slots with completed status, show as completed
         if obj.status == 'completed':
@@ -148,14 +168,9 @@ class SlotPartnerSerializer(serializers.ModelSerializer):
 
     def get_partner_audience_size(self, obj):
         """Return active subscribers count from partner's slot"""
-        from core.models import SubscriberVerification
         partner_slot = self._get_partner_slot(obj)
         if partner_slot:
-            try:
-                verification = SubscriberVerification.objects.get(user=partner_slot.user)
-                return verification.active_subscribers
-            except SubscriberVerification.DoesNotExist:
-                return 0
+            return serializer_audience_size(self, partner_slot.user_id, user_of=_partner_user_id) or 0
         return 0
 
     def get_you_send_date_formatted(self, obj):
@@ -244,7 +259,7 @@ class AuthorDetailedProfileSerializer(serializers.ModelSerializer):
 
 class SlotDetailsSerializer(serializers.ModelSerializer):
     """Serializer for Figma Screen 1 - Slot Details Modal"""
-    author = AuthorDetailedProfileSerializer(source='user.profiles.first', read_only=True)
+    author = serializers.SerializerMethodField()
     current_partners_count = serializers.SerializerMethodField()
     swap_partners = serializers.SerializerMethodField()
     audience_size = serializers.SerializerMethodField()  # Override to use active subscribers
@@ -259,17 +274,15 @@ class SlotDetailsSerializer(serializers.ModelSerializer):
             'status', 'preferred_genre', 'placement_style', 'current_partners_count', 'max_partners', 'swap_partners'
         ]
 
+    def get_author(self, obj):
+        return _primary_profile_data(self, AuthorDetailedProfileSerializer, obj.user)
+
     def get_audience_size(self, obj):
         """Return active subscribers count instead of total audience size"""
-        from core.models import SubscriberVerification
-        try:
-            verification = SubscriberVerification.objects.get(user=obj.user)
-            return verification.active_subscribers
-        except SubscriberVerification.DoesNotExist:
-            return 0
+        return serializer_audience_size(self, obj.user_id) or 0
 
     def get_current_partners_count(self, obj):
-        return obj.swap_requests.filter(status__in=['confirmed', 'verified', 'completed', 'sending', 'scheduled']).count()
+        return obj.active_partners_count
 
     def get_swap_partners(self, obj):
         requests = obj.swap_requests.filter(status__in=['confirmed', 'verified', 'completed', 'sending', 'scheduled'])
@@ -296,7 +309,7 @@ class SlotDetailsSerializer(serializers.ModelSerializer):
 
 class SwapArrangementSerializer(serializers.ModelSerializer):
     """Serializer for Figma Screen 2 - Swap Arrangement Modal"""
-    partner = AuthorProfileSerializer(source='slot.user.profiles.first', read_only=True)
+    partner = serializers.SerializerMethodField()
     
     you_send_date = serializers.DateField(source='offered_slot.send_date', read_only=True)
     you_send_time = serializers.TimeField(source='offered_slot.send_time', read_only=True)
@@ -307,6 +320,9 @@ class SwapArrangementSerializer(serializers.ModelSerializer):
     partner_sends_book = serializers.CharField(source='book.title', read_only=True)
     status = serializers.SerializerMethodField()
 
+    def get_partner(self, obj):
+        return _primary_profile_data(self, AuthorProfileSerializer, obj.slot.user)
+
     def get_status(self, obj):
         if obj.status in ['confirmed', 'completed']:
             return 'scheduled'
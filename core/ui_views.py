@@ -25,16 +25,23 @@ class StandardResultsSetPagination(PageNumberPagination):
             
         })
 
-from .models import NewsletterSlot, SwapRequest
+from .models import NewsletterSlot, Profile, SwapRequest
 from .ui_serializers import SlotExploreSerializer, SlotDetailsSerializer, SwapArrangementSerializer
 from .views import NewsletterSlotFilter
+from .services.book_stats_service import annotate_book_stats
+from .services.partner_graph_service import partners_of
+from .services.matching_service import rank_slots
+from .pagination import KeysetPaginationMixin
 
-class SlotExploreView(ListAPIView):
+class SlotExploreView(KeysetPaginationMixin, ListAPIView):
     """
     Figma Screen 3: Swap Partner Explorer Page
     Endpoint: /api/slots/explore/
     Returns paginated list of available newsletter slots for swapping.
     Pagination: 9 items per page
+    ?sort=best_match ranks slots by genre, subgenre and audience-tag compatibility
+    (see core.services.matching_service) and adds a match_score to each card.
+    ?pagination=cursor switches to keyset pagination (see core.pagination).
     """
     serializer_class = SlotExploreSerializer
     pagination_class = StandardResultsSetPagination
@@ -46,42 +53,40 @@ class SlotExploreView(ListAPIView):
     def get_queryset(self):
         user = self.request.user
         
-        # Identify "Friends" as authors with whom a swap has been confirmed, scheduled, or completed
-        past_partners = SwapRequest.objects.filter(
-            Q(requester=user) | Q(slot__user=user),
-            status__in=['confirmed', 'scheduled', 'sending', 'completed', 'verified']
-        ).values_list('requester', 'slot__user')
-        
-        # Flatten and unique the user ID list
-        partner_ids = set()
-        for p1, p2 in past_partners:
-            partner_ids.add(p1)
-            partner_ids.add(p2)
-        
-        if user.id in partner_ids:
-            partner_ids.remove(user.id)
+        # "Friends" are authors with whom a swap has been confirmed, scheduled, or completed
+        partner_ids = partners_of(user)
 
-        from django.db.models import Count, F
-        
-        # Show public slots OR friend_only slots from past partners
-        # ALSO: Filter out slots that have already reached their max_partners limit
-        return NewsletterSlot.objects.annotate(
-            active_partners_count=Count(
-                'swap_requests',
-                filter=Q(swap_requests__status__in=['confirmed', 'verified', 'completed', 'sending', 'scheduled'])
-            )
-        ).filter(
+        # Show public slots OR friend_only slots from past partners.
+        # Full slots are excluded via the denormalized is_full flag, so this is a
+        # plain scan of the (status, is_full, created_at) index.
+        return NewsletterSlot.objects.filter(
             Q(visibility='public') | 
-            Q(visibility='friend_only', user_id__in=list(partner_ids))
-        ).filter(
-            active_partners_count__lt=F('max_partners'),
-            status='available'
-        ).exclude(user=user).order_by('-created_at')
+            Q(visibility='friend_only', user_id__in=list(partner_ids)),
+            status='available',
+            is_full=False,
+        ).exclude(user=user).select_related('user__verification').prefetch_related(
+            Profile.objects.prefetch_primary('user__profiles')
+        ).order_by('-created_at')
     
     def list(self, request, *args, **kwargs):
         # Get the paginated response first
         queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
+
+        if request.query_params.get('sort') == 'best_match':
+            # Rank candidate ids in memory, then load only the requested page.
+            # The ranked list is capped, so it is always page-number paginated.
+            ranked = rank_slots(request.user, queryset.values_list('id', flat=True))
+            scores = dict(ranked)
+            self._paginator = StandardResultsSetPagination()
+            page_ids = self.paginate_queryset([slot_id for slot_id, _ in ranked])
+            slots = queryset.in_bulk(page_ids)
+            page = [slots[slot_id] for slot_id in page_ids if slot_id in slots]
+            data = self.get_serializer(page, many=True).data
+            for item in data:
+                item['match_score'] = scores.get(item['id'])
+        else:
+            page = self.paginate_queryset(queryset)
+            data = self.get_serializer(page, many=True).data
         
         # Get campaign analytics for the logged-in user
         from core.models import CampaignAnalytic
@@ -91,7 +96,7 @@ class SlotExploreView(ListAPIView):
         campaign_data = CampaignAnalyticSerializer(campaigns, many=True).data
         
         # Return paginated response with campaign analytics
-        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response = self.get_paginated_response(data)
         
         # Add campaign_analytics to the response data
         response.data['campaign_analytics'] = campaign_data
@@ -160,7 +165,7 @@ class SharedSlotView(RetrieveAPIView):
         # Add user's books so they can pick one to send a request
         from core.models import Book
         from core.serializers import BookSerializer
-        user_books = Book.objects.filter(user=request.user)
+        user_books = annotate_book_stats(Book.objects.filter(user=request.user))
         response_data['my_books'] = list(BookSerializer(user_books, many=True, context={'request': request}).data)
 
         # Check if user already sent a request for this slot
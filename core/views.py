@@ -28,8 +28,8 @@ from .models import (
 import calendar
 from datetime import datetime, date, timedelta
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Count, Q, Avg
-from django.db.models.functions import ExtractMonth
 import pytz
 from rest_framework.generics import ListAPIView, RetrieveAPIView, ListCreateAPIView, RetrieveUpdateDestroyAPIView
 
@@ -37,6 +37,15 @@ from urllib.parse import urlencode
 from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter, CharFilter, DateFilter
 import requests
+from core.services.book_stats_service import annotate_book_stats, book_stats
+from core.services.calendar_service import month_calendar
+from core.services.campaign_metrics_service import campaign_metrics
+from core.services.dashboard_snapshot_service import get_dashboard_snapshot
+from core.services.mailerlite_outbox_service import enqueue_group_move
+from core.services.partner_graph_service import partners_of
+from core.services.recent_activity_service import recent_notifications
+from core.services.unread_counter_service import adjust_unread, get_unread_counts, invalidate_unread
+from core.pagination import KeysetPagination, KeysetPaginationMixin, get_paginator
 
 
 
@@ -171,7 +180,7 @@ class BookDetailView(RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Book.objects.filter(user=self.request.user)
+        return annotate_book_stats(Book.objects.filter(user=self.request.user))
     
     def perform_update(self, serializer):
         # If this book is being set as primary, demote others
@@ -190,7 +199,7 @@ class AddBookView(ListCreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Book.objects.filter(user=self.request.user)
+        return annotate_book_stats(Book.objects.filter(user=self.request.user))
 
     def perform_create(self, serializer):
         # If this is set as the primary book, demote others
@@ -340,21 +349,15 @@ class PublicProfileDetailView(RetrieveAPIView):
 class BookManagementStatsView(APIView):
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        user_books = Book.objects.filter(user=request.user)
-        
-        # Calculate stats
-        total_books = user_books.count()
-        # Assuming you have an 'is_active' or 'is_promoted' flag
-        active_promos = user_books.filter(is_active=True).count() 
-        primary_promo = user_books.filter(is_primary_promo=True).count()
+        stats = book_stats(request.user)
         
         # Example static data for logic, replace with actual calculation
         avg_open_rate = 0
 
         return Response({
-            "total_books": total_books,
-            "active_promotions": active_promos,
-            "primary_promo": primary_promo,
+            "total_books": stats['total_books'],
+            "active_promotions": stats['active_promotions'],
+            "primary_promo": stats['primary_promo'],
             "avg_open_rate": f"{avg_open_rate}%"
         })
 
@@ -399,60 +402,30 @@ class NewsletterStatsView(APIView):
 
         # --- 2. CALENDAR DATA (filtered) ---
         calendar_data = []
-        num_days = calendar.monthrange(year, month)[1]
-        
-        # Status definitions for swap lifecycle
-        confirmed_statuses = ['confirmed', 'scheduled', 'accepted', 'active']
-        verified_statuses = ['verified', 'completed', 'sent']
-
-        slots_in_month = all_slots.filter(
-            send_date__year=year, 
-            send_date__month=month
-        ).values('send_date', 'visibility', 'status').annotate(
-            total=Count('id'),
-            pending=Count('swap_requests', filter=Q(swap_requests__status='pending')),
-            confirmed=Count('swap_requests', filter=Q(swap_requests__status__in=confirmed_statuses)),
-            verified=Count('swap_requests', filter=Q(swap_requests__status__in=verified_statuses))
+        month_days = month_calendar(
+            user, year, month,
+            genre=genre_filter if genre_filter and genre_filter.lower() != 'all' else None,
+            visibility=(
+                visibility_filter.lower().replace(' ', '_')
+                if visibility_filter and visibility_filter.lower() not in ('all', 'all visibility') else None
+            ),
+            slot_status=status_filter.lower() if status_filter and status_filter.lower() not in ('all', 'all status') else None,
         )
 
-        # Build lookup: one date can have multiple slots, so aggregate
-        date_map = {}
-        for s in slots_in_month:
-            d = s['send_date']
-            if d not in date_map:
-                date_map[d] = {
-                    'total': 0, 'pending': 0, 'confirmed': 0, 'verified': 0,
-                    'has_public': False, 'has_available': False, 'has_booked': False, 'has_pending_slot': False,
-                    'slots': []
-                }
-            date_map[d]['total'] += s['total']
-            date_map[d]['pending'] += s['pending']
-            date_map[d]['confirmed'] += s['confirmed']
-            date_map[d]['verified'] += s['verified']
-            if s.get('visibility') == 'public':
-                date_map[d]['has_public'] = True
-            if s.get('status') == 'available':
-                date_map[d]['has_available'] = True
-            elif s.get('status') == 'booked':
-                date_map[d]['has_booked'] = True
-            elif s.get('status') == 'pending':
-                date_map[d]['has_pending_slot'] = True
-
-        for day in range(1, num_days + 1):
-            current_date = date(year, month, day)
-            day_stats = date_map.get(current_date, {})
-            
+        for day_stats in month_days:
             calendar_data.append({
-                "date": current_date.isoformat(),
-                "day": day,
-                "slot_count": day_stats.get('total', 0),
-                "has_slots": day_stats.get('total', 0) > 0,
-                "has_published": day_stats.get('has_public', False),
-                "has_available": day_stats.get('has_available', False),
-                "has_booked": day_stats.get('has_booked', False),
-                "has_confirmed": day_stats.get('confirmed', 0) > 0,
-                "has_pending": day_stats.get('pending', 0) > 0 or day_stats.get('has_pending_slot', False),
-                "has_verified": day_stats.get('verified', 0) > 0,
+                "date": day_stats['date'].isoformat(),
+                "day": day_stats['date'].day,
+                "slot_count": day_stats['slot_count'],
+                "has_slots": day_stats['slot_count'] > 0,
+                "has_published": day_stats['public_slots'] > 0,
+                "has_available": day_stats['available_slots'] > 0,
+                "has_booked": day_stats['booked_slots'] > 0,
+                # Confirmed = agreed & scheduled (but not yet sent)
+                "has_confirmed": day_stats['confirmed_swaps'] + day_stats['scheduled_swaps'] > 0,
+                "has_pending": day_stats['pending_swaps'] > 0 or day_stats['pending_slots'] > 0,
+                # Verified = sent & proven via ESP
+                "has_verified": day_stats['verified_swaps'] + day_stats['completed_swaps'] > 0,
             })
 
         # --- 3. Active filters echo (for frontend state) ---
@@ -486,6 +459,12 @@ class NotificationListView(APIView):
             recipient=request.user,
             created_at__gte=cutoff_time
         )
+
+        # Opt-in keyset pagination for infinite scroll (?pagination=cursor)
+        paginator = None
+        if KeysetPagination.requested(request):
+            paginator = KeysetPagination()
+            notifications = paginator.paginate_queryset(notifications, request, view=self)
         serializer = NotificationSerializer(notifications, many=True)
         
         # Grouping logic for the frontend "Today/Yesterday" view
@@ -495,7 +474,9 @@ class NotificationListView(APIView):
             if group not in grouped_data:
                 grouped_data[group] = []
             grouped_data[group].append(item)
-            
+
+        if paginator is not None:
+            return paginator.get_paginated_response(grouped_data)
         return Response(grouped_data)
 
 class TestWebSocketNotificationView(APIView):
@@ -515,23 +496,15 @@ class TestWebSocketNotificationView(APIView):
         return Response({"detail": "Notification sent."})
 
 class NotificationUnreadCountView(APIView):
+    """
+    GET /api/notifications/unread-count/
+    Cached counters; connected clients also receive them as "unread_counts"
+    events on the notifications WebSocket.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        notification_unread = Notification.objects.filter(recipient=user, is_read=False).count()
-        chat_unread = ChatMessage.objects.filter(recipient=user, is_read=False).count()
-        from core.models import Email
-        email_unread = Email.objects.filter(recipient=user, is_read=False, folder='inbox').count()
-        
-        return Response({
-            "notifications": notification_unread,
-            "chat": chat_unread,
-            "email": email_unread,
-            "total": notification_unread + chat_unread + email_unread
-        })
-        
-        return Response({"message": "WebSocket notification triggered!"})
+        return Response(get_unread_counts(request.user))
 
 class NewsletterSlotExportView(APIView):
     permission_classes = [IsAuthenticated]
@@ -641,35 +614,17 @@ class SwapPartnerDiscoveryView(ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         
-        # Identify "Friends" as authors with whom a swap has been confirmed, scheduled, or completed
-        past_partners = SwapRequest.objects.filter(
-            Q(requester=user) | Q(slot__user=user),
-            status__in=['confirmed', 'scheduled', 'sending', 'completed', 'verified']
-        ).values_list('requester', 'slot__user')
-        
-        partner_ids = set()
-        for p1, p2 in past_partners:
-            partner_ids.add(p1)
-            partner_ids.add(p2)
-        from django.db.models import Count, F
-        
-        if user.id in partner_ids:
-            partner_ids.remove(user.id)
+        # "Friends" are authors with whom a swap has been confirmed, scheduled, or completed
+        partner_ids = partners_of(user)
 
         # Filter for Public OR Friend Only (if user is a past partner)
         # AND Filter for slots that aren't already full
-        return NewsletterSlot.objects.annotate(
-            active_partners_count=Count(
-                'swap_requests',
-                filter=Q(swap_requests__status__in=['confirmed', 'verified', 'completed', 'sending', 'scheduled'])
-            )
-        ).filter(
+        return NewsletterSlot.objects.filter(
             Q(visibility='public') | 
-            Q(visibility='friend_only', user_id__in=list(partner_ids))
-        ).filter(
-            active_partners_count__lt=F('max_partners'),
-            status='available'
-        ).exclude(user=user).order_by('-created_at')
+            Q(visibility='friend_only', user_id__in=list(partner_ids)),
+            status='available',
+            is_full=False,
+        ).exclude(user=user).select_related('user').order_by('-created_at')
 
 
 class SwapRequestListView(APIView):
@@ -761,8 +716,8 @@ class SwapRequestListView(APIView):
                             pass # For now, we skip blocking on connectivity issues to avoid UX friction
 
             initial_status = 'pending'
-            target_profile = slot.user.profiles.first()
-            requester_profile = request.user.profiles.first()
+            target_profile = Profile.objects.primary_for(slot.user)
+            requester_profile = Profile.objects.primary_for(request.user)
 
             if target_profile and requester_profile:
                 is_friend = target_profile.friends.filter(id=requester_profile.id).exists()
@@ -772,22 +727,18 @@ class SwapRequestListView(APIView):
                 if (target_profile.auto_approve_friends and is_friend) or meets_rep:
                     initial_status = 'confirmed'
 
-            swap_req = serializer.save(
-                requester=request.user, 
-                status=initial_status, 
-                book=book,
-                offered_slot=offered_slot,
-                requested_book=requested_book
-            )
-            
-            # MailerLite Notification
-            if initial_status == 'pending':
-                from core.services.mailerlite_service import send_swap_request_notification
-                try:
-                    # Notify the receiving author (slot owner)
-                    send_swap_request_notification(slot.user.email)
-                except Exception:
-                    pass
+            with transaction.atomic():
+                swap_req = serializer.save(
+                    requester=request.user, 
+                    status=initial_status, 
+                    book=book,
+                    offered_slot=offered_slot,
+                    requested_book=requested_book
+                )
+                
+                # MailerLite: the receiving author (slot owner) joins the Pending group
+                if initial_status == 'pending':
+                    enqueue_group_move(slot.user.email, 'pending')
                     
 
             response_data = SwapRequestSerializer(swap_req).data
@@ -806,7 +757,7 @@ class SwapRequestListView(APIView):
                 # Fetch the current user's active books to allow them to pick one to promote
                 from core.models import Book
                 from core.serializers import BookSerializer
-                user_books = Book.objects.filter(user=request.user)
+                user_books = annotate_book_stats(Book.objects.filter(user=request.user))
                 
                 # Use the exact same serializer as the AddBookView to reuse the structure
                 books_data = list(BookSerializer(user_books, many=True, context={'request': request}).data)
@@ -823,8 +774,8 @@ class SwapRequestListView(APIView):
                     "reliability_match": False
                 }
                 
-                owner_profile = slot.user.profiles.first()
-                requester_profile = request.user.profiles.first()
+                owner_profile = Profile.objects.primary_for(slot.user)
+                requester_profile = Profile.objects.primary_for(request.user)
                 
                 if owner_profile and requester_profile:
                     # Audience Comparable: Simplified logic
@@ -867,7 +818,9 @@ class SwapRequestListView(APIView):
         slots = NewsletterSlot.objects.filter(
             visibility='public',
             status='available'
-        ).exclude(user=request.user).order_by('-created_at')
+        ).exclude(user=request.user).select_related('user__verification').prefetch_related(
+            Profile.objects.prefetch_primary('user__profiles')
+        ).order_by('-created_at')
         serializer = SlotExploreSerializer(slots, many=True)
         return Response(serializer.data)
 
@@ -954,8 +907,8 @@ class RequestSwapPlacementView(APIView):
         message = request.data.get('message', '')
 
         initial_status = 'pending'
-        target_profile = slot.user.profiles.first()
-        requester_profile = request.user.profiles.first()
+        target_profile = Profile.objects.primary_for(slot.user)
+        requester_profile = Profile.objects.primary_for(request.user)
 
         if target_profile and requester_profile:
             is_friend = target_profile.friends.filter(id=requester_profile.id).exists()
@@ -965,15 +918,20 @@ class RequestSwapPlacementView(APIView):
             if (target_profile.auto_approve_friends and is_friend) or meets_rep:
                 initial_status = 'confirmed'
 
-        swap_req = SwapRequest.objects.create(
-            slot=slot,
-            requester=request.user,
-            book=book,
-            status=initial_status,
-            preferred_placement=preferred_placement,
-            max_partners_acknowledged=max_partners_acknowledged,
-            message=message
-        )
+        with transaction.atomic():
+            swap_req = SwapRequest.objects.create(
+                slot=slot,
+                requester=request.user,
+                book=book,
+                status=initial_status,
+                preferred_placement=preferred_placement,
+                max_partners_acknowledged=max_partners_acknowledged,
+                message=message
+            )
+
+            # MailerLite: the receiving author (slot owner) joins the Pending group
+            if initial_status == 'pending':
+                enqueue_group_move(slot.user.email, 'pending')
         
         # If auto-approved, check if slot should be marked as booked
         # Check if slot should be booked based on current accepted swaps
@@ -991,15 +949,6 @@ class RequestSwapPlacementView(APIView):
             slot.status = 'booked'
             slot.save(update_fields=['status'])
             logger.warning(f"[SLOT_STATUS DirectPayment] Slot {slot.id} set to BOOKED")
-        
-        # MailerLite Notification
-        if initial_status == 'pending':
-            from core.services.mailerlite_service import send_swap_request_notification
-            try:
-                # Notify the receiving author (slot owner)
-                send_swap_request_notification(slot.user.email)
-            except Exception:
-                pass
 
         
         response_data = SwapRequestSerializer(swap_req).data
@@ -1068,7 +1017,7 @@ class MyPotentialBooksView(ListAPIView):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Book.objects.filter(user=self.request.user)
+        return annotate_book_stats(Book.objects.filter(user=self.request.user))
 
 class SwapPartnerDetailView(RetrieveAPIView):
     """
@@ -1097,11 +1046,12 @@ class RecentSwapHistoryView(ListAPIView):
 # SWAP MANAGEMENT PAGE (Figma: "Swap Management")
 # =====================================================================
 from django.utils import timezone as tz
-from core.services.mailerlite_service import (
-    send_swap_request_notification,
-    approve_swap_notification,
-    reject_swap_notification,
-    sync_profile_audience,
+from core.services.mailerlite_service import sync_profile_audience
+from core.services.swap_preload_service import build_swap_management_context
+from core.services.swap_status_service import (
+    annotate_effective_status,
+    effective_status_counts,
+    filter_by_tab,
 )
 
 
@@ -1110,7 +1060,8 @@ class SwapManagementListView(APIView):
     GET /api/swaps/
     Returns swap requests grouped/filtered by tab.
     Tabs: all, pending, sending, rejected, scheduled, completed
-    Also supports ?search=<query> for searching by author, book, or date.
+    Also supports ?search=<query> for searching by author, book, or date,
+    and ?page=<n>&page_size=<n> to paginate the selected tab.
     """
     permission_classes = [IsAuthenticated]
 
@@ -1129,26 +1080,14 @@ class SwapManagementListView(APIView):
         status_filter = request.query_params.get('status', '').lower()
         search = request.query_params.get('search', '').strip()
 
-        # Auto-expire pending swaps older than 7 days
-        from datetime import timedelta
-        expired_cutoff = tz.now() - timedelta(days=7)
-        expired_swaps = SwapRequest.objects.filter(
-            Q(slot__user=user) | Q(requester=user),
-            status='pending',
-            created_at__lt=expired_cutoff
-        )
-        if expired_swaps.exists():
-            expired_swaps.update(
-                status='rejected',
-                rejection_reason='Auto-rejected: 7-day acceptance window expired.',
-                rejected_at=tz.now()
-            )
+        # Pending swaps older than 7 days are auto-rejected by the
+        # `expire_stale_records` management command, not on read.
 
         # Base queryset: swaps where the current user is either the requester (sent) or owns the slot (received)
         qs = SwapRequest.objects.filter(
             Q(slot__user=user) | Q(requester=user)
         ).select_related(
-            'requester', 'slot', 'book'
+            'requester', 'slot__user', 'book'
         ).order_by('-created_at')
 
         # Search by author name, book title, or date
@@ -1160,62 +1099,58 @@ class SwapManagementListView(APIView):
                 Q(slot__send_date__icontains=search)
             ).distinct()
 
-        # We must serialize all results to determine their "effective status"
-        # as the serializer has complex logic (dates, payments) that can't be easily
-        # matched in a single DB query for tab counts and results categorization.
-        serializer = SwapManagementSerializer(qs, many=True, context={'request': request})
-        all_serialized_data = serializer.data
-
-        # Initialize tab counts
-        tab_counts = {
-            'all': len(all_serialized_data),
-            'pending': 0,
-            'sending': 0,
-            'rejected': 0,
-            'scheduled': 0,
-            'completed': 0,
-        }
+        # Effective status (sending/scheduled/completed...) is computed in the database
+        # so tab counts are one GROUP BY and only the visible page is serialized.
+        qs = annotate_effective_status(qs, user)
+        status_counts = effective_status_counts(qs)
+        total = sum(status_counts.values())
 
-        # Categorize results and calculate counts
-        final_results = []
-        for item in all_serialized_data:
-            item_status = item.get('status')
-            
-            # Increment counts based on effective status
-            if item_status == 'pending':
-                tab_counts['pending'] += 1
-            elif item_status == 'sending':
-                tab_counts['sending'] += 1
-            elif item_status == 'rejected':
-                tab_counts['rejected'] += 1
-            elif item_status == 'scheduled':
-                tab_counts['scheduled'] += 1
-            elif item_status in ['completed', 'verified']:
-                tab_counts['completed'] += 1
-
-            # Filter results for the current tab
-            # 'sending' result matches 'sending' tab, 'pending' result matches 'pending' tab
-            if tab == 'all':
-                final_results.append(item)
-            elif tab == item_status:
-                final_results.append(item)
-            elif tab == 'completed' and item_status == 'verified':
-                final_results.append(item)
-
-        # Apply explicit status_filter if provided
         if status_filter:
-            final_results = [r for r in all_serialized_data if r.get('status') == status_filter]
+            results_qs = qs.filter(effective_status=status_filter)
+            tab_counts = {
+                'all': total,
+                'filtered': status_counts.get(status_filter, 0),
+            }
+        else:
+            results_qs = filter_by_tab(qs, tab)
             tab_counts = {
-                'all': len(all_serialized_data),
-                'filtered': len(final_results)
+                'all': total,
+                'pending': status_counts.get('pending', 0),
+                'sending': status_counts.get('sending', 0),
+                'rejected': status_counts.get('rejected', 0),
+                'scheduled': status_counts.get('scheduled', 0),
+                'completed': status_counts.get('completed', 0) + status_counts.get('verified', 0),
             }
 
-        return Response({
+        response_data = {
             'tab': tab,
             'status_filter': status_filter if status_filter else None,
             'tab_counts': tab_counts,
-            'results': final_results,
-        })
+        }
+
+        # Paginate only when the client asks for it so existing callers still get the full tab
+        paginator = None
+        if 'page' in request.query_params or 'page_size' in request.query_params:
+            from .ui_views import StandardResultsSetPagination
+            paginator = StandardResultsSetPagination()
+            swaps = paginator.paginate_queryset(results_qs, request)
+        else:
+            swaps = list(results_qs)
+
+        context = build_swap_management_context(swaps, request)
+        response_data['results'] = SwapManagementSerializer(swaps, many=True, context=context).data
+
+        if paginator is not None:
+            response_data.update({
+                'next': paginator.get_next_link(),
+                'previous': paginator.get_previous_link(),
+                'count': paginator.page.paginator.count,
+                'current_page': paginator.page.number,
+                'total_pages': paginator.page.paginator.num_pages,
+                'page_size': paginator.get_page_size(request),
+            })
+
+        return Response(response_data)
 
 
 class AcceptSwapView(APIView):
@@ -1268,7 +1203,10 @@ class AcceptSwapView(APIView):
             # Paid slot - always scheduled after acceptance
             # Payment completion doesn't change this to completed in DB
             swap.status = 'scheduled'
-        swap.save()
+        with transaction.atomic():
+            swap.save()
+            # MailerLite: move from Pending → Approved group (sent after commit)
+            enqueue_group_move(swap.requester.email, 'approved')
 
         # Check if slot should be booked based on current accepted swaps
         accepted_count = SwapRequest.objects.filter(
@@ -1326,13 +1264,6 @@ class AcceptSwapView(APIView):
         except Exception as e:
             print(f"[DEBUG] Error updating campaign: {e}")
 
-        # MailerLite: move from Pending → Approved group
-        requester_email = swap.requester.email
-        try:
-            approve_swap_notification(requester_email)
-        except Exception:
-            pass  # Non-critical; log internally
-
         # Notification for requester - different message for free vs paid
         if is_free_slot:
             notification_title = "Swap Request Completed! ✅"
@@ -1376,7 +1307,10 @@ class RejectSwapView(APIView):
         swap.status = 'rejected'
         swap.rejection_reason = request.data.get('rejection_reason', request.data.get('reason', ''))
         swap.rejected_at = tz.now()
-        swap.save()
+        with transaction.atomic():
+            swap.save()
+            # MailerLite: move to Rejected group (sent after commit)
+            enqueue_group_move(swap.requester.email, 'rejected')
         
         # Revert slot status to available if it was booked and now has room
         slot = swap.slot
@@ -1389,13 +1323,6 @@ class RejectSwapView(APIView):
                 slot.status = 'available'
                 slot.save(update_fields=['status'])
 
-        # MailerLite: move to Rejected group
-        requester_email = swap.requester.email
-        try:
-            reject_swap_notification(requester_email)
-        except Exception:
-            pass
-
         # Notification for requester
         Notification.objects.create(
             recipient=swap.requester,
@@ -1430,14 +1357,10 @@ class RestoreSwapView(APIView):
         swap.status = 'pending'
         swap.rejection_reason = None
         swap.rejected_at = None
-        swap.save()
-
-        # MailerLite: move back to Pending group
-        requester_email = swap.requester.email
-        try:
-            send_swap_request_notification(requester_email)
-        except Exception:
-            pass
+        with transaction.atomic():
+            swap.save()
+            # MailerLite: move back to Pending group (sent after commit)
+            enqueue_group_move(swap.requester.email, 'pending')
 
         # Notification for requester
         Notification.objects.create(
@@ -1665,7 +1588,7 @@ class AuthorReputationView(APIView):
 
     def get(self, request):
         from core.serializers import AuthorReputationSerializer
-        profile = request.user.profiles.first()
+        profile = Profile.objects.primary_for(request.user)
         if not profile:
             return Response({"detail": "Profile not found. Please create a profile first."}, status=status.HTTP_404_NOT_FOUND)
         
@@ -1772,7 +1695,7 @@ class ConnectMailerLiteView(APIView):
         from core.services.mailerlite_service import sync_profile_audience
         from django.utils import timezone
         
-        profile = request.user.profiles.first()
+        profile = Profile.objects.primary_for(request.user)
         if profile:
             # We must save the key FIRST so sync_profile_audience can use it correctly
             verification, _ = SubscriberVerification.objects.get_or_create(user=request.user)
@@ -1809,33 +1732,27 @@ class SubscriberAnalyticsView(APIView):
     """
     GET /api/subscriber-analytics/
     Returns comprehensive analytics for the Subscriber Verification & Analytics page.
-    Triggers a real-time sync with MailerLite if connected.
+    Always answers from the stored analytics; when they are stale (or ?refresh=true)
+    a MailerLite sync is queued in the background (see mailerlite_sync_service).
+    ?skip_sync=true never queues one.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        from core.services.mailerlite_service import sync_subscriber_analytics, get_subscriber_counts_by_status
-        
-        # DEBUG: Force refresh from database
         from core.models import SubscriberVerification
+        from core.services.mailerlite_sync_service import needs_sync, request_sync
+
         verification, created = SubscriberVerification.objects.get_or_create(user=request.user)
-        print(f"[DEBUG] Before sync - active_subscribers: {verification.active_subscribers}, audience_size: {verification.audience_size}")
-        
-        # Check if user wants to skip sync (for faster loading)
+
         skip_sync = request.GET.get('skip_sync', '').lower() in ['true', '1', 'yes']
-        
-        if skip_sync:
-            # Use cached data without syncing
-            from core.models import SubscriberVerification
-            verification, _ = SubscriberVerification.objects.get_or_create(user=request.user)
-            print(f"[DEBUG] Skip sync - using cached data for user {request.user.username}")
-        else:
-            # Trigger real-time sync (this calls get_subscriber_counts_by_status and updates the model)
-            verification = sync_subscriber_analytics(request.user)
-            print(f"[DEBUG] After sync - active_subscribers: {verification.active_subscribers}, audience_size: {verification.audience_size}")
-            
-            # After sync, ensure we have the latest data
-            verification.refresh_from_db()
+        force_refresh = request.GET.get('refresh', '').lower() in ['true', '1', 'yes']
+
+        sync_queued = False
+        if not skip_sync and (force_refresh or needs_sync(verification)):
+            sync_queued = request_sync(request.user) is not None
+            if not sync_queued:
+                # Synced inline, or another worker is already on it
+                verification.refresh_from_db()
         
         growth_data = SubscriberGrowth.objects.filter(user=request.user)
         
@@ -1871,21 +1788,15 @@ class SubscriberAnalyticsView(APIView):
         
         growth_records = {g.month: g.count for g in growth_data if g.year == current_year}
         # Use all campaigns for stats, not just current year
-        monthly_stats = campaigns.annotate(
-            m=ExtractMonth('date')
-        ).values('m').annotate(
-            avg_open=Avg('open_rate'),
-            avg_click=Avg('click_rate')
-        )
-        stats_map = {item['m']: item for item in monthly_stats}
+        stats_map = campaign_metrics(request.user)['monthly']
         
         historical_trends = []
         for i, m_name in enumerate(month_names, 1):
             s = stats_map.get(i, {})
             historical_trends.append({
                 "month": m_name,
-                "open_rate": round(s.get('avg_open', 0.0), 1),
-                "click_rate": round(s.get('avg_click', 0.0), 1),
+                "open_rate": round(s.get('open_rate', 0.0), 1),
+                "click_rate": round(s.get('click_rate', 0.0), 1),
                 "subscriber_growth": growth_records.get(m_name, 0)
             })
 
@@ -1901,14 +1812,14 @@ class SubscriberAnalyticsView(APIView):
         sub_delta_str = f"+{sub_delta}" if sub_delta >= 0 else str(sub_delta)
 
         # Open Rate Delta
-        curr_month_open = stats_map.get(now.month, {}).get('avg_open', verification.avg_open_rate)
-        prev_month_open = stats_map.get(now.month - 1, {}).get('avg_open', verification.avg_open_rate)
+        curr_month_open = stats_map.get(now.month, {}).get('open_rate', verification.avg_open_rate)
+        prev_month_open = stats_map.get(now.month - 1, {}).get('open_rate', verification.avg_open_rate)
         open_delta = curr_month_open - prev_month_open
         open_delta_str = f"+{open_delta:.1f}%" if open_delta >= 0 else f"{open_delta:.1f}%"
 
         # Click Rate Delta
-        curr_month_click = stats_map.get(now.month, {}).get('avg_click', verification.avg_click_rate)
-        prev_month_click = stats_map.get(now.month - 1, {}).get('avg_click', verification.avg_click_rate)
+        curr_month_click = stats_map.get(now.month, {}).get('click_rate', verification.avg_click_rate)
+        prev_month_click = stats_map.get(now.month - 1, {}).get('click_rate', verification.avg_click_rate)
         click_delta = curr_month_click - prev_month_click
         click_delta_str = f"+{click_delta:.1f}%" if click_delta >= 0 else f"{click_delta:.1f}%"
 
@@ -1971,8 +1882,8 @@ class SubscriberAnalyticsView(APIView):
                     })
                 if not swap.link_clicks.exists() and swap.book:
                     partner_name = swap.requester.username
-                    if swap.requester.profiles.first():
-                        partner_name = swap.requester.profiles.first().name
+                    if Profile.objects.primary_for(swap.requester):
+                        partner_name = Profile.objects.primary_for(swap.requester).name
                     
                     # Get book URL with proper priority: 1. swap.site_url, 2. book.site_url, 3. "#"
                     book_url = "#"
@@ -2024,7 +1935,8 @@ class SubscriberAnalyticsView(APIView):
                 "connected": verification.is_connected_mailerlite,
                 "provider": "MailerLite",
                 "verified": verification.is_connected_mailerlite,
-                "last_synced": last_synced
+                "last_synced": last_synced,
+                "sync_in_progress": sync_queued,
             },
             "summary_stats": {
                 "active_subscribers": {
@@ -2200,6 +2112,20 @@ class CampaignAnalyticCreateView(APIView):
 # AUTHOR DASHBOARD (Figma: "Author Dashboard" — main landing page)
 # =====================================================================
 
+def _time_ago(time_diff):
+    days = time_diff.days
+    seconds = time_diff.seconds
+    if days == 0:
+        if seconds < 3600:
+            mins = max(1, seconds // 60)
+            return f"{mins} min{'s' if mins != 1 else ''} ago"
+        hours = seconds // 3600
+        return f"{hours} hour{'s' if hours != 1 else ''} ago"
+    if days == 1:
+        return "1 day ago"
+    return f"{days} days ago"
+
+
 class AuthorDashboardView(APIView):
     """
     GET /api/dashboard/
@@ -2209,6 +2135,8 @@ class AuthorDashboardView(APIView):
     - Recent Activity (notifications + swap events)
     - Campaign Analytics (open rate, click rate, performance comparison)
     Supports query params: ?month=2&year=2026&genre=romance
+    Everything except the calendar and notifications is served from the
+    per-user snapshot in core.services.dashboard_snapshot_service.
     """
     permission_classes = [IsAuthenticated]
 
@@ -2219,62 +2147,28 @@ class AuthorDashboardView(APIView):
         year = int(request.query_params.get('year', now.year))
         genre_filter = request.query_params.get('genre', None)
 
-        # ─── 1. STATS CARDS ──────────────────────────────────────────
-        total_books = Book.objects.filter(user=user).count()
-        total_slots = NewsletterSlot.objects.filter(user=user).count()
-
-        completed_swaps = SwapRequest.objects.filter(
-            Q(slot__user=user) | Q(requester=user),
-            status__in=['completed', 'verified', 'confirmed', 'scheduled']
-        ).count()
+        snapshot = get_dashboard_snapshot(user)
 
-        profile = user.profiles.first()
-        reliability_score = 0
-        if profile:
-            reliability_score = int(profile.send_reliability_percent) if profile.send_reliability_percent else 0
-
-        stats_cards = {
-            "book": total_books,
-            "newsletter_slots": total_slots,
-            "completed_swaps": completed_swaps,
-            "reliability": reliability_score,
-        }
+        # ─── 1. STATS CARDS ──────────────────────────────────────────
+        stats_cards = dict(snapshot['stats'], reliability=snapshot['profile']['reliability'])
 
         # ─── 2. CALENDAR ─────────────────────────────────────────────
-        num_days = calendar.monthrange(year, month)[1]
-
-        slots_qs = NewsletterSlot.objects.filter(
-            user=user,
-            send_date__year=year,
-            send_date__month=month
-        )
-        if genre_filter:
-            slots_qs = slots_qs.filter(preferred_genre=genre_filter)
-
-        slots_in_month = slots_qs.values('send_date').annotate(
-            total_slots=Count('id'),
-            pending_swaps=Count('swap_requests', filter=Q(swap_requests__status='pending')),
-            confirmed_swaps=Count('swap_requests', filter=Q(swap_requests__status__in=['confirmed', 'verified', 'completed', 'scheduled'])),
-            scheduled_swaps=Count('swap_requests', filter=Q(swap_requests__status='scheduled')),
-        )
-
-        date_map = {s['send_date']: s for s in slots_in_month}
-
         calendar_days = []
         today = date.today()
-        for day in range(1, num_days + 1):
-            current_date = date(year, month, day)
-            day_stats = date_map.get(current_date, {})
-
+        for day_stats in month_calendar(user, year, month, genre=genre_filter):
+            confirmed = (
+                day_stats['confirmed_swaps'] + day_stats['verified_swaps']
+                + day_stats['completed_swaps'] + day_stats['scheduled_swaps']
+            )
             calendar_days.append({
-                "date": current_date.isoformat(),
-                "day": day,
-                "is_today": current_date == today,
-                "has_slots": day_stats.get('total_slots', 0) > 0,
-                "has_pending": day_stats.get('pending_swaps', 0) > 0,
-                "has_confirmed": day_stats.get('confirmed_swaps', 0) > 0,
-                "has_scheduled": day_stats.get('scheduled_swaps', 0) > 0,
-                "slot_count": day_stats.get('total_slots', 0),
+                "date": day_stats['date'].isoformat(),
+                "day": day_stats['date'].day,
+                "is_today": day_stats['date'] == today,
+                "has_slots": day_stats['slot_count'] > 0,
+                "has_pending": day_stats['pending_swaps'] > 0,
+                "has_confirmed": confirmed > 0,
+                "has_scheduled": day_stats['scheduled_swaps'] > 0,
+                "slot_count": day_stats['slot_count'],
             })
 
         calendar_data = {
@@ -2286,164 +2180,35 @@ class AuthorDashboardView(APIView):
 
         # ─── 3. RECENT ACTIVITY ──────────────────────────────────────
         # Combine notifications and swap events into a unified feed
-        recent_activities = []
-
-        # Fetch recent notifications
-        from django.utils import timezone
         now_aware = timezone.now()
-        
-        notifications = Notification.objects.filter(
-            recipient=user
-        ).order_by('-created_at')[:10]
-
-        for notif in notifications:
-            time_diff = now_aware - notif.created_at
-            days = time_diff.days
-            seconds = time_diff.seconds
-            
-            if days == 0:
-                if seconds < 3600:
-                    mins = max(1, seconds // 60)
-                    time_ago = f"{mins} min{'s' if mins != 1 else ''} ago"
-                else:
-                    hours = seconds // 3600
-                    time_ago = f"{hours} hour{'s' if hours != 1 else ''} ago"
-            elif days == 1:
-                time_ago = "1 day ago"
-            else:
-                time_ago = f"{days} days ago"
+        recent_activities = []
 
+        # Recent notifications, from the per-user ring buffer
+        for notif in recent_notifications(user):
             recent_activities.append({
-                "id": notif.id,
+                "id": notif['id'],
                 "type": "notification",
-                "title": notif.title,
-                "message": notif.message,
-                "badge": notif.badge,
-                "time_ago": time_ago,
-                "action_url": notif.action_url,
-                "is_read": notif.is_read,
-                "created_at": notif.created_at.isoformat(),
+                "title": notif['title'],
+                "message": notif['message'],
+                "badge": notif['badge'],
+                "time_ago": _time_ago(now_aware - notif['created_at']),
+                "action_url": notif['action_url'],
+                "is_read": notif['is_read'],
+                "created_at": notif['created_at'].isoformat(),
             })
 
-        # If not enough notifications, also pull recent swap events
+        # If not enough notifications, also use the snapshot's recent swap events
         if len(recent_activities) < 6:
-            recent_swaps = SwapRequest.objects.filter(
-                Q(slot__user=user) | Q(requester=user)
-            ).select_related('requester', 'slot', 'book').order_by('-created_at')[:6]
-
-            for swap in recent_swaps:
-                partner = swap.slot.user if swap.requester == user else swap.requester
-                partner_profile = partner.profiles.first()
-                partner_name = partner_profile.name if partner_profile else partner.username
-
-                status_messages = {
-                    'pending': f"Swap request pending with {partner_name}",
-                    'confirmed': f"Completed swap with {partner_name}",
-                    'sending': f"Sending swap with {partner_name}",
-                    'scheduled': f"Scheduled swap with {partner_name}",
-                    'completed': f"Completed swap with {partner_name}",
-                    'verified': f"Verified swap with {partner_name}",
-                    'rejected': f"Swap request declined by {partner_name}",
-                }
-
-                time_diff = now_aware - swap.created_at
-                days = time_diff.days
-                seconds = time_diff.seconds
-                
-                if days == 0:
-                    if seconds < 3600:
-                        mins = max(1, seconds // 60)
-                        time_ago = f"{mins} min{'s' if mins != 1 else ''} ago"
-                    else:
-                        hours = seconds // 3600
-                        time_ago = f"{hours} hour{'s' if hours != 1 else ''} ago"
-                elif days == 1:
-                    time_ago = "1 day ago"
-                else:
-                    time_ago = f"{days} days ago"
-
-                recent_activities.append({
-                    "id": f"swap_{swap.id}",
-                    "type": "swap_event",
-                    "title": status_messages.get(swap.status, f"Swap update with {partner_name}"),
-                    "message": swap.message or "",
-                    "badge": "SWAP",
-                    "time_ago": time_ago,
-                    "action_url": f"/dashboard/swaps/track/{swap.id}/",
-                    "is_read": True,
-                    "created_at": swap.created_at.isoformat(),
-                })
+            for event in snapshot['swap_events']:
+                created_at = datetime.fromisoformat(event['created_at'])
+                recent_activities.append(dict(event, time_ago=_time_ago(now_aware - created_at)))
 
         # Sort by created_at descending and limit to 6
         recent_activities.sort(key=lambda x: x['created_at'], reverse=True)
         recent_activities = recent_activities[:6]
 
         # ─── 4. CAMPAIGN ANALYTICS ───────────────────────────────────
-        all_campaigns = CampaignAnalytic.objects.filter(user=user).order_by('-date')
-        
-        # Filter only sent campaigns (date < today) for average calculations
-        sent_campaigns = all_campaigns.filter(date__lt=today)
-
-        # Calculate averages for the analytics cards
-        if sent_campaigns.exists():
-            from django.db.models import Avg
-            avg_stats = sent_campaigns.aggregate(
-                avg_open_rate=Avg('open_rate'),
-                avg_click_rate=Avg('click_rate'),
-            )
-            avg_open_rate = round(avg_stats['avg_open_rate'] or 0, 1)
-            avg_click_rate = round(avg_stats['avg_click_rate'] or 0, 1)
-        else:
-            avg_open_rate = 0.0
-            avg_click_rate = 0.0
-
-        # Previous period comparison (last 30 days vs 30 days before that)
-        thirty_days_ago = today - timedelta(days=30)
-        sixty_days_ago = today - timedelta(days=60)
-
-        current_period = all_campaigns.filter(date__gte=thirty_days_ago, date__lt=today)
-        previous_period = all_campaigns.filter(date__gte=sixty_days_ago, date__lt=thirty_days_ago)
-
-        current_avg_open = 0.0
-        current_avg_click = 0.0
-        if current_period.exists():
-            from django.db.models import Avg
-            current_stats = current_period.aggregate(
-                avg_open=Avg('open_rate'),
-                avg_click=Avg('click_rate'),
-            )
-            current_avg_open = round(current_stats['avg_open'] or 0, 1)
-            current_avg_click = round(current_stats['avg_click'] or 0, 1)
-
-        prev_avg_open = 0.0
-        prev_avg_click = 0.0
-        if previous_period.exists():
-            prev_stats = previous_period.aggregate(
-                avg_open=Avg('open_rate'),
-                avg_click=Avg('click_rate'),
-            )
-            prev_avg_open = round(prev_stats['avg_open'] or 0, 1)
-            prev_avg_click = round(prev_stats['avg_click'] or 0, 1)
-
-        open_rate_change = round(current_avg_open - prev_avg_open, 1)
-        click_rate_change = round(current_avg_click - prev_avg_click, 1)
-
-        campaign_analytics = {
-            "avg_open_rate": avg_open_rate,
-            "avg_click_rate": avg_click_rate,
-            "current_period": {
-                "open_rate": current_avg_open,
-                "click_rate": current_avg_click,
-            },
-            "previous_period": {
-                "open_rate": prev_avg_open,
-                "click_rate": prev_avg_click,
-            },
-            "open_rate_change": open_rate_change,
-            "click_rate_change": click_rate_change,
-            "improvement_label": f"+{open_rate_change}% improvement" if open_rate_change > 0 else f"{open_rate_change}% change",
-            "recent_campaigns": CampaignAnalyticSerializer(all_campaigns[:5], many=True).data,
-        }
+        campaign_analytics = snapshot['campaigns']
 
         # ─── 5. QUICK ACTIONS ────────────────────────────────────────
         quick_actions = [
@@ -2452,25 +2217,9 @@ class AuthorDashboardView(APIView):
         ]
 
         # ─── 6. USER INFO (Welcome Banner) ───────────────────────────
-        user_profile = None
-        try:
-            user_profile = user.profile  # from authentication.UserProfile
-        except Exception:
-            pass
-
-        pen_name = None
-        if profile and profile.name:
-            pen_name = profile.name
-        elif user_profile and user_profile.pen_name:
-            pen_name = user_profile.pen_name
-        else:
-            pen_name = user.username
-            
-        profile_photo = None
-        if profile and profile.profile_picture:
-            profile_photo = request.build_absolute_uri(profile.profile_picture.url)
-        elif user_profile and user_profile.profile_photo:
-            profile_photo = request.build_absolute_uri(user_profile.profile_photo.url)
+        pen_name = snapshot['profile']['name']
+        photo_url = snapshot['profile']['photo_url']
+        profile_photo = request.build_absolute_uri(photo_url) if photo_url else None
 
         welcome = {
             "name": pen_name,
@@ -2489,20 +2238,21 @@ class AuthorDashboardView(APIView):
         })
 
 
-class AllSwapRequestsView(ListAPIView):
+class AllSwapRequestsView(KeysetPaginationMixin, ListAPIView):
     """
     GET /api/all-swap-requests/
     Returns all swap requests in the platform.
     Can be filtered by status using ?status=pending,etc.
+    ?pagination=cursor returns keyset-paginated pages instead of the full list.
     """
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        qs = SwapRequest.objects.all().order_by('-created_at')
+        qs = SwapRequest.objects.select_related('requester', 'slot__user', 'book').order_by('-created_at')
         status_filter = self.request.query_params.get('status')
         if status_filter:
             qs = qs.filter(status__iexact=status_filter)
-        return qs
+        return annotate_effective_status(qs, self.request.user)
 
     def list(self, request, *args, **kwargs):
         # We can reuse the SwapManagementSerializer or create a specialized one.
@@ -2514,10 +2264,13 @@ class AllSwapRequestsView(ListAPIView):
         # For a full platform we should use pagination.
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = SwapManagementSerializer(page, many=True, context={'request': request})
+            context = build_swap_management_context(page, request)
+            serializer = SwapManagementSerializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
 
-        serializer = SwapManagementSerializer(queryset, many=True, context={'request': request})
+        swaps = list(queryset)
+        context = build_swap_management_context(swaps, request)
+        serializer = SwapManagementSerializer(swaps, many=True, context=context)
         return Response(serializer.data)
 
 
@@ -2660,7 +2413,7 @@ class ComposeEmailView(APIView):
                 import logging
                 logger = logging.getLogger(__name__)
 
-                sender_profile = request.user.profiles.first()
+                sender_profile = Profile.objects.primary_for(request.user)
                 sender_name = sender_profile.name if sender_profile else request.user.username
 
                 logger.info(f"Attempting to send email from {settings.DEFAULT_FROM_EMAIL} to {recipient.email}")
@@ -2701,7 +2454,7 @@ class ComposeEmailView(APIView):
 
             # Create a notification for the recipient
             try:
-                sender_profile = request.user.profiles.first()
+                sender_profile = Profile.objects.primary_for(request.user)
                 sender_name = sender_profile.name if sender_profile else request.user.username
                 # Use only the first word/name for cleaner notifications
                 sender_first_name = sender_name.split()[0] if sender_name else request.user.username
@@ -2753,7 +2506,8 @@ class EmailDetailView(APIView):
         # Mark as read if recipient is viewing
         if email.recipient_id == request.user.id and not email.is_read:
             email.is_read = True
-            email.save(update_fields=['is_read'])
+            if Email.objects.filter(pk=email.pk, is_read=False).update(is_read=True) and email.folder == 'inbox':
+                adjust_unread(email.recipient_id, 'email', -1)
 
         serializer = EmailDetailSerializer(email, context={'request': request})
         return Response(serializer.data)
@@ -2814,6 +2568,11 @@ class EmailActionView(APIView):
             Q(id__in=email_ids),
             Q(sender=request.user) | Q(recipient=request.user)
         )
+        # Bulk updates skip post_save, so recompute the affected unread counters
+        # once the update has run (outside a transaction on_commit fires at once)
+        recipient_ids = []
+        if action in ('mark_read', 'mark_unread', 'move_to_trash', 'move_to_inbox', 'move_to_spam'):
+            recipient_ids = list(emails.values_list('recipient_id', flat=True).distinct())
 
         if action == 'mark_read':
             emails.update(is_read=True)
@@ -2836,6 +2595,7 @@ class EmailActionView(APIView):
         else:
             return Response({"detail": f"Unknown action: '{action}'."}, status=status.HTTP_400_BAD_REQUEST)
 
+        invalidate_unread(*recipient_ids)
         return Response({"detail": f"Action '{action}' applied to {emails.count()} email(s)."})
 
 
@@ -2844,6 +2604,9 @@ class EmailActionView(APIView):
 # =====================================================================
 from core.models import ChatMessage
 from core.serializers import ChatMessageSerializer, ConversationListSerializer
+from core.services.conversation_service import (
+    conversations_for, latest_swap_statuses, mark_read, record_message, refresh_conversation,
+)
 
 
 class ChatAuthorListView(APIView):
@@ -2871,18 +2634,12 @@ class ChatAuthorListView(APIView):
                 Q(user__username__icontains=search)
             )
 
-        # For each author, include unread message count
+        # Unread counts and last messages come from the per-pair Conversation summaries
+        conversations = conversations_for(request.user)
+
         result = []
         for profile in profiles:
-            unread = ChatMessage.objects.filter(
-                sender=profile.user, recipient=request.user, is_read=False
-            ).count()
-
-            # Get last message (if any)
-            last_msg = ChatMessage.objects.filter(
-                Q(sender=profile.user, recipient=request.user) |
-                Q(sender=request.user, recipient=profile.user)
-            ).order_by('-created_at').first()
+            conversation = conversations.get(profile.user_id)
 
             profile_pic = None
             if profile.profile_picture:
@@ -2897,9 +2654,9 @@ class ChatAuthorListView(APIView):
                 'name': profile.name,
                 'profile_picture': profile_pic,
                 'location': profile.location,
-                'unread_count': unread,
-                'last_message': last_msg.content[:60] if last_msg else None,
-                'last_message_time': last_msg.created_at if last_msg else None,
+                'unread_count': conversation.unread_for(request.user.id) if conversation else 0,
+                'last_message': conversation.last_message_snippet[:60] if conversation else None,
+                'last_message_time': conversation.last_message_at if conversation else None,
             })
 
         # Sort by last_message_time (most recent first), then by name
@@ -2921,22 +2678,12 @@ class ConversationListView(APIView):
         user = request.user
         search = request.query_params.get('search', '').strip()
 
-        # 1. Find all swap partners (users from swap requests)
-        swap_requests = SwapRequest.objects.filter(
-            (Q(requester=user) | Q(slot__user=user))
-        ).exclude(status='rejected')
-        
-        swap_partner_ids = set()
-        for sr in swap_requests:
-            if sr.requester == user:
-                swap_partner_ids.add(sr.slot.user_id)
-            else:
-                swap_partner_ids.add(sr.requester_id)
+        # 1. Find all swap partners (users with a non-rejected swap)
+        swap_partner_ids = set(partners_of(user, include_pending=True))
 
-        # 2. Find all users the current user has chatted with
-        sent_to_ids = ChatMessage.objects.filter(sender=user).values_list('recipient_id', flat=True).distinct()
-        received_from_ids = ChatMessage.objects.filter(recipient=user).values_list('sender_id', flat=True).distinct()
-        chat_partner_ids = set(sent_to_ids) | set(received_from_ids)
+        # 2. Find all users the current user has chatted with (one Conversation row per pair)
+        conversations_by_partner = conversations_for(user, full_text=True)
+        chat_partner_ids = set(conversations_by_partner)
 
         # 3. Combine both sets (all swap partners + all chat partners)
         all_partner_ids = swap_partner_ids | chat_partner_ids
@@ -2955,20 +2702,13 @@ class ConversationListView(APIView):
         from django.utils import timezone
         from core.serializers import ConversationListSerializer
 
+        # Latest non-rejected swap per partner, in one query
+        swap_statuses = latest_swap_statuses(user, all_partner_ids)
+
         conversations = []
         for profile in profiles:
             partner = profile.user
-
-            # Last message between the two users
-            last_msg = ChatMessage.objects.filter(
-                Q(sender=user, recipient=partner) |
-                Q(sender=partner, recipient=user)
-            ).order_by('-created_at').first()
-
-            # Unread count (messages FROM this partner that I haven't read)
-            unread = ChatMessage.objects.filter(
-                sender=partner, recipient=user, is_read=False
-            ).count()
+            conversation = conversations_by_partner.get(partner.id)
 
             profile_pic = None
             if profile.profile_picture:
@@ -2976,9 +2716,9 @@ class ConversationListView(APIView):
 
             # Format time
             formatted_time = ""
-            if last_msg:
+            if conversation and conversation.last_message_at:
                 now = timezone.now().date()
-                msg_date = last_msg.created_at.date()
+                msg_date = conversation.last_message_at.date()
                 if msg_date == now:
                     formatted_time = "Today"
                 elif (now - msg_date).days == 1:
@@ -2986,13 +2726,7 @@ class ConversationListView(APIView):
                 else:
                     formatted_time = msg_date.strftime("%m/%d/%Y")
 
-            # Swap status logic
-            swap = SwapRequest.objects.filter(
-                (Q(requester=user) & Q(slot__user=partner)) |
-                (Q(requester=partner) & Q(slot__user=user))
-            ).exclude(status='rejected').order_by('-created_at').first()
-            
-            swap_status = swap.status if swap else None
+            swap_status = swap_statuses.get(partner.id)
 
             conversations.append({
                 'id': partner.id,
@@ -3002,12 +2736,12 @@ class ConversationListView(APIView):
                 'avatar': profile_pic,
                 'profile_picture': profile_pic,
                 'location': profile.location,
-                'lastMessage': last_msg.content if last_msg else "",
-                'last_message': last_msg.content[:80] if last_msg else "",
-                'last_message_time': last_msg.created_at if last_msg else None,
+                'lastMessage': conversation.last_message_text if conversation else "",
+                'last_message': conversation.last_message_snippet[:80] if conversation else "",
+                'last_message_time': conversation.last_message_at if conversation else None,
                 'time': formatted_time,
                 'formatted_time': formatted_time,
-                'unread_count': unread,
+                'unread_count': conversation.unread_for(user.id) if conversation else 0,
                 'swap_status': swap_status,
             })
 
@@ -3042,10 +2776,12 @@ class ComposePartnerListView(APIView):
                 Q(newsletter_slots__preferred_genre__icontains=search)
             )
         
+        swap_partner_ids = partners_of(user, include_pending=True)
+
         # Serialize unique authors with their latest slot info
         result = []
         for u in users:
-            profile = u.profiles.first()
+            profile = Profile.objects.primary_for(u)
             profile_pic = None
             if profile and profile.profile_picture:
                 profile_pic = request.build_absolute_uri(profile.profile_picture.url)
@@ -3065,10 +2801,7 @@ class ComposePartnerListView(APIView):
             ).exists()
             
             # Check if swap partner
-            is_swap_partner = SwapRequest.objects.filter(
-                (Q(requester=user) & Q(slot__user=u)) |
-                (Q(requester=u) & Q(slot__user=user))
-            ).exclude(status='rejected').exists()
+            is_swap_partner = u.id in swap_partner_ids
             
             result.append({
                 'id': u.id,
@@ -3124,7 +2857,12 @@ class MySwapPartnersView(APIView):
         newsletter_users = newsletter_users.exclude(id=user.id)
         
         from core.serializers import ConversationPartnerSerializer
-        serializer = ConversationPartnerSerializer(newsletter_users, many=True, context={'request': request})
+        context = {
+            'request': request,
+            'conversations': conversations_for(user, full_text=True),
+            'swap_statuses': latest_swap_statuses(user),
+        }
+        serializer = ConversationPartnerSerializer(newsletter_users, many=True, context=context)
         return Response(serializer.data)
         search = request.query_params.get('search', '').strip()
 
@@ -3199,11 +2937,20 @@ class MySwapPartnersView(APIView):
 class ChatHistoryView(APIView):
     """
     GET /api/chat/history/<receiver_id>/
-    Returns chat message history between the current user and the specified user.
-    Messages grouped by date with "Yesterday", "Today" labels.
+    Returns chat message history between the current user and the specified user
+    as a flat list, oldest first.
     Also marks all unread messages from the other user as read.
+
+    Windowed mode (any of these params switches the response to an object):
+      ?limit=N          the latest N messages (default 50, max 200)
+      ?before_id=<id>   the N messages before <id>, to load older history
+      ?after_id=<id>    the N messages after <id>, to catch up on newer ones
+    Response: {"results": [...], "has_more": bool, "oldest_id": id, "newest_id": id}
+    where has_more refers to the direction being paged.
     """
     permission_classes = [IsAuthenticated]
+    default_window = 50
+    max_window = 200
 
     def get(self, request, receiver_id):
         user = request.user
@@ -3228,7 +2975,7 @@ class ChatHistoryView(APIView):
             for uid in available_users[:5]:  # Show first 5 users for context
                 try:
                     u = User.objects.get(id=uid)
-                    profile = u.profiles.first()
+                    profile = Profile.objects.primary_for(u)
                     user_details.append(f"{uid}: {profile.name if profile else u.username}")
                 except:
                     user_details.append(f"{uid}: (error loading user)")
@@ -3240,63 +2987,52 @@ class ChatHistoryView(APIView):
                 "message": f"Please check the user ID. Available user IDs are: {available_users[:10]}{'...' if len(available_users) > 10 else ''}"
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # Fetch all messages between the two users
         messages = ChatMessage.objects.filter(
             Q(sender=user, recipient=other_user) |
             Q(sender=other_user, recipient=user)
-        ).select_related('sender', 'recipient').order_by('created_at')
+        ).select_related('sender')
 
         # Mark unread messages from the other user as read
-        ChatMessage.objects.filter(
+        marked = ChatMessage.objects.filter(
             sender=other_user, recipient=user, is_read=False
         ).update(is_read=True)
+        mark_read(user.id, other_user.id)
+        adjust_unread(user.id, 'chat', -marked)
 
-        # Group messages by date
-        from django.utils import timezone
-        now = timezone.now().date()
-        grouped = {}
-        for msg in messages:
-            msg_date = msg.created_at.date()
-            if msg_date == now:
-                label = "Today"
-            elif (now - msg_date).days == 1:
-                label = "Yesterday"
-            else:
-                label = msg_date.strftime("%B %d, %Y")
+        # Both participants' primary profiles in one query
+        profiles_by_user = Profile.objects.primary_for_users([user.id, other_user.id])
+        context = {'request': request, 'profiles_by_user': profiles_by_user}
 
-            if label not in grouped:
-                grouped[label] = []
-            grouped[label].append(msg)
+        params = request.query_params
+        if not any(key in params for key in ('limit', 'before_id', 'after_id')):
+            # CommunicationTools.jsx expects the full history as a flat array
+            return Response(ChatMessageSerializer(messages.order_by('created_at'), many=True, context=context).data)
 
-        # Build response
-        result = []
-        for date_label, msgs in grouped.items():
-            result.append({
-                'date_label': date_label,
-                'messages': ChatMessageSerializer(msgs, many=True, context={'request': request}).data,
-            })
+        try:
+            limit = min(max(int(params.get('limit', self.default_window)), 1), self.max_window)
+            before_id = int(params['before_id']) if params.get('before_id') else None
+            after_id = int(params['after_id']) if params.get('after_id') else None
+        except ValueError:
+            return Response({"detail": "limit, before_id and after_id must be integers."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Other user profile info
-        other_profile = other_user.profiles.first()
-        other_info = {
-            'id': other_user.id, # Added for frontend compatibility
-            'user_id': other_user.id,
-            'username': other_user.username,
-            'name': other_profile.name if other_profile else other_user.username,
-            'avatar': request.build_absolute_uri(other_profile.profile_picture.url) if other_profile and other_profile.profile_picture else None, # Added for frontend compatibility
-            'profile_picture': request.build_absolute_uri(other_profile.profile_picture.url) if other_profile and other_profile.profile_picture else None,
-            'location': other_profile.location if other_profile else None,
-        }
+        # Message ids increase with created_at, so the id is the cursor
+        if after_id is not None:
+            window = list(messages.filter(id__gt=after_id).order_by('id')[:limit + 1])
+            has_more = len(window) > limit
+            window = window[:limit]
+        else:
+            if before_id is not None:
+                messages = messages.filter(id__lt=before_id)
+            window = list(messages.order_by('-id')[:limit + 1])
+            has_more = len(window) > limit
+            window = window[:limit][::-1]
 
-        # Flat list for the frontend's current implementation if it doesn't support grouping
-        # Wait, the frontend expects a flat list: data.map(...)
-        messages_flat = ChatMessageSerializer(messages, many=True, context={'request': request}).data
-        
-        # If the frontend expects a flat list, we should probably return that for now
-        # but the ad6737 version returns grouped. Let's provide BOTH or choose.
-        # CommunicationTools.jsx: const data = await getChatHistory(activeConv); const formattedMessages = data.map(...)
-        # So it expects a FLAT ARRAY.
-        return Response(messages_flat)
+        return Response({
+            'results': ChatMessageSerializer(window, many=True, context=context).data,
+            'has_more': has_more,
+            'oldest_id': window[0].id if window else None,
+            'newest_id': window[-1].id if window else None,
+        })
 
 
 class SendMessageView(APIView):
@@ -3331,7 +3067,7 @@ class SendMessageView(APIView):
             for uid in available_users[:5]:  # Show first 5 users for context
                 try:
                     u = User.objects.get(id=uid)
-                    profile = u.profiles.first()
+                    profile = Profile.objects.primary_for(u)
                     user_details.append(f"{uid}: {profile.name if profile else u.username}")
                 except:
                     user_details.append(f"{uid}: (error loading user)")
@@ -3355,20 +3091,23 @@ class SendMessageView(APIView):
         elif not content and not attachment: # If neither content nor attachment, it's an invalid message
             return Response({"detail": "Message content or an attachment is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-        msg = ChatMessage.objects.create(
-            sender=user,
-            recipient=recipient,
-            content=content,
-            attachment=attachment,
-            is_file=True if attachment else False
-        )
+        from django.db import transaction
+        with transaction.atomic():
+            msg = ChatMessage.objects.create(
+                sender=user,
+                recipient=recipient,
+                content=content,
+                attachment=attachment,
+                is_file=True if attachment else False
+            )
+            record_message(msg)
 
         # Create persistent notification and push real-time updates
         try:
             from channels.layers import get_channel_layer
             from asgiref.sync import async_to_sync
 
-            sender_profile = user.profiles.first()
+            sender_profile = Profile.objects.primary_for(user)
             sender_name = sender_profile.name if sender_profile else user.username
 
             # Create persistent notification (Once)
@@ -3434,6 +3173,7 @@ class ChatMessageDetailView(APIView):
         msg.content = new_content
         msg.is_edited = True
         msg.save(update_fields=['content', 'is_edited', 'updated_at'])
+        refresh_conversation(msg.sender_id, msg.recipient_id)
 
         return Response(
             ChatMessageSerializer(msg, context={'request': request}).data
@@ -3447,7 +3187,9 @@ class ChatMessageDetailView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
+        sender_id, recipient_id = msg.sender_id, msg.recipient_id
         msg.delete()
+        refresh_conversation(sender_id, recipient_id)
         return Response({"detail": "Message deleted."}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -5534,74 +5276,9 @@ class WalletTransactionHistoryView(APIView):
     def get(self, request):
         user = request.user
         
-        # Clean up pending wallet funding transactions
-        from datetime import timedelta
-        expiry_time = timezone.now() - timedelta(minutes=30)  # 30 minutes instead of 1 hour
-        
-        # Clean up all pending wallet funding transactions older than 30 minutes
-        expired_transactions = PaymentTransaction.objects.filter(
-            sender=user,
-            transaction_type='bonus',
-            status='pending',
-            created_at__lt=expiry_time
-        )
-        if expired_transactions.exists():
-            expired_transactions.update(status='cancelled')
-        
-        # Clean up pending direct_payment transactions older than 30 minutes
-        expired_direct_payments = PaymentTransaction.objects.filter(
-            sender=user,
-            transaction_type='direct_payment',
-            status='pending',
-            stripe_payment_intent_id__startswith='cs_',
-            created_at__lt=expiry_time
-        )
-        if expired_direct_payments.exists():
-            expired_direct_payments.update(status='cancelled')
-        
-        # Also clean up transactions with checkout session IDs that are still pending
-        checkout_expired_transactions = PaymentTransaction.objects.filter(
-            sender=user,
-            transaction_type='bonus',
-            status='pending',
-            stripe_payment_intent_id__startswith='cs_'
-        )
-        if checkout_expired_transactions.exists():
-            # Verify with Stripe if these sessions are actually completed
-            import stripe
-            stripe.api_key = settings.STRIPE_SECRET_KEY.strip()
-            
-            for transaction in checkout_expired_transactions:
-                try:
-                    session = stripe.checkout.Session.retrieve(transaction.stripe_payment_intent_id)
-                    if session.payment_status == 'paid':
-                        # Complete the transaction
-                        transaction.status = 'completed'
-                        transaction.completed_at = timezone.now()
-                        transaction.save()
-                        
-                        # Add funds to wallet
-                        wallet, _ = UserWallet.objects.get_or_create(user=user)
-                        wallet.add_balance(transaction.amount)
-                        
-                        # Create notification
-                        from core.models import Notification
-                        Notification.objects.create(
-                            recipient=user,
-                            title="💵 Wallet Funded!",
-                            badge="WALLET",
-                            message=f"${transaction.amount} has been added to your wallet. New balance: ${wallet.balance}",
-                            action_url="/wallet"
-                        )
-                    else:
-                        # Cancel the transaction
-                        transaction.status = 'cancelled'
-                        transaction.save()
-                except Exception:
-                    # If we can't verify, cancel it
-                    transaction.status = 'cancelled'
-                    transaction.save()
-        
+        # Abandoned checkouts are cancelled (or completed, if Stripe reports them paid)
+        # by the `expire_stale_records` management command, not on read.
+
         # Filter for all transactions involving this user that represent monetary movement
         from django.db.models import Q
         wallet_transaction_types = ['bonus', 'withdrawal', 'add_funds', 'direct_payment', 'swap_payment', 'refund']
@@ -5627,9 +5304,9 @@ class WalletTransactionHistoryView(APIView):
                 Q(transaction_type='direct_payment', status='pending', stripe_payment_intent_id__startswith='cs_')
             )
         
-        # DRF Pagination
+        # DRF Pagination (page numbers by default, keyset with ?pagination=cursor)
         from .ui_views import StandardResultsSetPagination
-        paginator = StandardResultsSetPagination()
+        paginator = get_paginator(request, StandardResultsSetPagination)
         page = paginator.paginate_queryset(all_transactions, request)
         
         if page is not None: